@@ -0,0 +1 @@
+"""Бенчмарки горячих путей реестра на синтетических данных (python -m benchmarks)."""
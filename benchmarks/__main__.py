@@ -0,0 +1,210 @@
+"""Замер горячих путей реестра на синтетических данных.
+
+    python -m benchmarks --rows 10000 100000 --backend mongomock --json bench.json
+    python -m benchmarks --rows 100000 --backend mongod --uri mongodb://localhost:27017/
+    python -m benchmarks --rows 1000000 --backend none --cases check_vtb_data
+    python -m benchmarks --rows 100000 --baseline bench-old.json
+
+Время — медиана --repeat запусков; память — пик tracemalloc отдельного
+запуска (под tracemalloc код медленнее, поэтому время так не меряется).
+Qt работает в режиме offscreen. С --baseline сравнивает медианы с прошлым
+JSON и возвращает 1, если какой-то сценарий стал медленнее на --tolerance.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Модели таблиц — QAbstractTableModel; дисплей для них не нужен
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from benchmarks.cases import CASES, Context, case_names
+from benchmarks.generator import DEFAULT_SEED, RegistryData
+
+
+BENCHMARK_DATABASE = 'registry_benchmark'
+DEFAULT_ROWS = [10000, 100000]
+
+
+def open_database(args):
+    """Возвращает (db, close) для выбранного бэкенда или (None, None) для 'none'."""
+    if args.backend == 'none':
+        return None, None
+    if args.backend == 'mongomock':
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("mongomock is not installed: pip install mongomock, "
+                             "or use --backend mongod / --backend none")
+        client = mongomock.MongoClient()
+        return client[args.database], client.close
+
+    from repository import Repository, RepositoryConfig, RepositoryUnavailable
+    from schema import ensure_indexes
+
+    try:
+        repository = Repository(RepositoryConfig.from_env(
+            uri=args.uri or os.environ.get('REGISTRY_MONGO_URI', 'mongodb://localhost:27017/'),
+            database=args.database)).connect()
+    except RepositoryUnavailable as e:
+        raise SystemExit(str(e))
+    repository.client.drop_database(args.database)
+    for problem in ensure_indexes(repository.db):
+        print(f"index problem: {problem}", file=sys.stderr)
+    return repository.db, repository.close
+
+
+def measure(case, context, repeat, trace_memory):
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        if case.setup is not None:
+            case.setup(context)
+        gc.collect()
+        started = time.perf_counter()
+        rows = case.run(context)
+        timings.append(time.perf_counter() - started)
+
+    peak = None
+    if trace_memory:
+        if case.setup is not None:
+            case.setup(context)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            case.run(context)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        'case': case.name,
+        'rows': context.data.rows,
+        'processed': rows,
+        'runs': repeat,
+        'seconds_median': round(median, 4),
+        'seconds_min': round(min(timings), 4),
+        'rows_per_second': round(rows / median) if median > 0 else None,
+        'peak_mb': round(peak / 2 ** 20, 1) if peak is not None else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(args):
+    import numpy
+    import pandas
+
+    info = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+        'backend': args.backend,
+        'seed': args.seed,
+        'format': args.format,
+    }
+    try:
+        import pymongo
+
+        info['pymongo'] = pymongo.version
+    except ImportError:
+        pass
+    return info
+
+
+def compare(results, baseline, tolerance):
+    """Печатает отношение медиан к baseline; возвращает число регрессий."""
+    previous = {(result['case'], result['rows']): result for result in baseline['results']}
+    regressions = 0
+    for result in results:
+        old = previous.get((result['case'], result['rows']))
+        if old is None or not old['seconds_median']:
+            continue
+        ratio = result['seconds_median'] / old['seconds_median']
+        mark = ''
+        if ratio > 1 + tolerance:
+            mark = '  REGRESSION'
+            regressions += 1
+        print(f"  {result['case']:<22} {result['rows']:>9}  x{ratio:.2f} "
+              f"({old['seconds_median']:.3f} s -> {result['seconds_median']:.3f} s){mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registry hot path benchmarks")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--cases', nargs='+', choices=case_names(), default=case_names())
+    parser.add_argument('--backend', choices=['mongomock', 'mongod', 'none'],
+                        default='mongomock',
+                        help="in-process stand-in, local mongod, or no database")
+    parser.add_argument('--uri', help="mongod URI (default: REGISTRY_MONGO_URI)")
+    parser.add_argument('--database', default=BENCHMARK_DATABASE,
+                        help="database dropped and recreated by the run")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx',
+                        help="format of the generated import files")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run")
+    parser.add_argument('--json', dest='json_path')
+    parser.add_argument('--baseline', help="previous JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    db, close = open_database(args)
+    cases = [case for case in CASES if case.name in args.cases
+             and (db is not None or not case.needs_db)]
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix='registry-bench-') as workdir:
+            for rows in args.rows:
+                context = Context(db, RegistryData(rows, args.seed), workdir, args.format)
+                for case in cases:
+                    result = measure(case, context, args.repeat, not args.no_memory)
+                    results.append(result)
+                    peak = f"{result['peak_mb']} MB" if result['peak_mb'] is not None else "n/a"
+                    print(f"{case.name:<22} {rows:>9} rows  {result['seconds_median']:8.3f} s  "
+                          f"peak {peak}", flush=True)
+    finally:
+        if close is not None:
+            close()
+    app.quit()
+
+    report = {'environment': environment(args), 'results': results}
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.baseline} "
+              f"(revision {baseline.get('environment', {}).get('revision')}):")
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
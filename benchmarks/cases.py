@@ -0,0 +1,241 @@
+"""Горячие пути окон реестра в виде замеряемых сценариев.
+
+Каждый сценарий повторяет то, что делает обработчик окна, но без диалогов:
+setup готовит базу и файлы вне замера, run возвращает число обработанных строк.
+"""
+import os
+
+from columns import HOUSE_COLUMNS, OWNER_COLUMNS, PREMISE_COLUMNS
+from registry_cache import registry_cache
+
+
+# Запросы поиска по выписке: фамилия, имя с отчеством, начало счёта, короткий префикс
+SEARCH_QUERIES = ["иванов", "сергеевна", "40817810", "ол", "петрова елена"]
+
+# Видимая часть таблицы после первой отрисовки
+VISIBLE_ROWS = 40
+
+# Пары запросов портфеля (по владельцу и по помещению) за один прогон
+PORTFOLIO_QUERIES = 500
+
+
+class Case:
+    def __init__(self, name, run, setup=None, needs_db=False):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.needs_db = needs_db
+
+
+class Context:
+    """Состояние одного размера данных: база, сгенерированные таблицы, файлы."""
+
+    def __init__(self, db, data, workdir, file_format='csv'):
+        self.db = db
+        self.data = data
+        self.workdir = workdir
+        self.file_format = file_format
+        self._frames = {}
+        self._files = {}
+        self.seeded = False
+        self.links_ready = False
+        self.statement_index = None
+
+    def frame(self, name):
+        if name not in self._frames:
+            self._frames[name] = getattr(self.data, f'{name}_frame')()
+        return self._frames[name]
+
+    def file(self, name):
+        """Файл импорта для таблицы name; пишется один раз на размер данных."""
+        if name not in self._files:
+            path = os.path.join(self.workdir, f'{name}_{self.data.rows}.{self.file_format}')
+            frame = self.frame(name)
+            if self.file_format == 'xlsx':
+                frame.to_excel(path, index=False)
+            else:
+                frame.to_csv(path, index=False, encoding='utf-8')
+            self._files[name] = path
+        return self._files[name]
+
+
+def reset_collections(db, *names):
+    for name in names:
+        db[name].drop()
+        registry_cache.invalidate(db[name])
+
+
+def seed_registry(context):
+    """Заполняет дома, помещения и владельцев один раз на размер данных."""
+    from bulk_import import import_houses
+
+    if context.seeded:
+        return
+    db = context.db
+    reset_collections(db, 'houses', 'premises', 'owners')
+    import_houses(db, context.frame('houses'))
+    premise_ids = [document['_id'] for document in db.premises.find({}, {'_id': 1})]
+    documents = context.data.owner_documents(premise_ids)
+    for start in range(0, len(documents), 10000):
+        db.owners.insert_many(documents[start:start + 10000], ordered=False)
+    context.seeded = True
+    # Связи ссылаются на _id владельцев и помещений прежнего заполнения
+    context.links_ready = False
+
+
+def registry_models(db):
+    from table_models import CursorTableModel
+
+    # Свой кэш не нужен: модели окна тоже делят общий registry_cache
+    return [CursorTableModel(db.houses, HOUSE_COLUMNS),
+            CursorTableModel(db.premises, PREMISE_COLUMNS),
+            CursorTableModel(db.owners, OWNER_COLUMNS)]
+
+
+def paint(model, rows=VISIBLE_ROWS):
+    # Отрисовка запрашивает data() для каждой видимой ячейки
+    index = model.index
+    for row in range(min(rows, model.rowCount())):
+        for column in range(model.columnCount()):
+            model.data(index(row, column))
+
+
+def setup_update_tables(context):
+    seed_registry(context)
+    registry_cache.clear()
+
+
+def run_update_tables(context):
+    # Как MainWindow.update_tables: refresh трёх моделей и первая отрисовка
+    models = registry_models(context.db)
+    for model in models:
+        model.refresh()
+        paint(model)
+    return sum(model.rowCount() for model in models)
+
+
+def setup_update_tables_warm(context):
+    seed_registry(context)
+    registry_cache.clear()
+    run_update_tables(context)
+
+
+def run_scroll_owners(context):
+    # Прокрутка таблицы владельцев до конца: fetchMore страница за страницей
+    model = registry_models(context.db)[2]
+    model.refresh()
+    while model.canFetchMore():
+        model.fetchMore()
+    paint(model)
+    return model.rowCount()
+
+
+def setup_import_from_xls(context):
+    context.file('houses')
+    reset_collections(context.db, 'houses', 'premises')
+    # Следующему update_tables нужны исходные дома и помещения
+    context.seeded = False
+
+
+def run_import_from_xls(context):
+    from bulk_import import import_houses_file
+
+    report = import_houses_file(context.db, context.file('houses'))
+    return report.rows
+
+
+def setup_import_vtb_data(context):
+    context.file('vtb')
+    reset_collections(context.db, 'vtb_registers')
+
+
+def run_import_vtb_data(context):
+    from statement_store import import_file
+
+    _, report = import_file(context.db, 'vtb', context.file('vtb'))
+    return report.rows
+
+
+def setup_import_links(context):
+    from schema import INDEXES
+
+    seed_registry(context)
+    context.file('links')
+    reset_collections(context.db, 'ownership_links')
+    context.db.ownership_links.create_indexes(INDEXES['ownership_links'])
+
+
+def run_import_links(context):
+    from bulk_import import import_links_file
+
+    report = import_links_file(context.db, context.file('links'))
+    context.links_ready = True
+    return report.rows
+
+
+def setup_portfolio_queries(context):
+    if not context.links_ready:
+        setup_import_links(context)
+        run_import_links(context)
+
+
+def run_portfolio_queries(context):
+    # Портфель владельца и владельцы его помещения, как при выборе строки портфеля
+    from ownership_links import portfolio, premise_owners
+
+    db = context.db
+    links = db.ownership_links.find({}, {'owner_id': 1, 'premise_id': 1}).limit(PORTFOLIO_QUERIES)
+    count = 0
+    for link in links:
+        portfolio(db, link['owner_id'])
+        premise_owners(db, link['premise_id'])
+        count += 2
+    return count
+
+
+def run_build_search_index(context):
+    from search_index import FrameSearchIndex
+
+    frame = context.frame('statement')
+    context.statement_index = FrameSearchIndex(frame)
+    return len(frame)
+
+
+def setup_search_in_statements(context):
+    if context.statement_index is None:
+        run_build_search_index(context)
+
+
+def run_search_in_statements(context):
+    # Поиск по всем колонкам и по колонкам ФИО/счёта, как в выпадающем списке окна
+    index = context.statement_index
+    for text in SEARCH_QUERIES:
+        index.search(text)
+        index.search(text, [1, 2])
+    return index.row_count * len(SEARCH_QUERIES)
+
+
+def run_check_vtb_data(context):
+    from validation import validate
+
+    frame = context.frame('vtb')
+    validate(frame)
+    return len(frame)
+
+
+CASES = [
+    Case('update_tables', run_update_tables, setup_update_tables, needs_db=True),
+    Case('update_tables_warm', run_update_tables, setup_update_tables_warm, needs_db=True),
+    Case('scroll_owners', run_scroll_owners, setup_update_tables, needs_db=True),
+    Case('import_from_xls', run_import_from_xls, setup_import_from_xls, needs_db=True),
+    Case('import_vtb_data', run_import_vtb_data, setup_import_vtb_data, needs_db=True),
+    Case('import_links', run_import_links, setup_import_links, needs_db=True),
+    Case('portfolio_queries', run_portfolio_queries, setup_portfolio_queries, needs_db=True),
+    Case('build_search_index', run_build_search_index),
+    Case('search_in_statements', run_search_in_statements, setup_search_in_statements),
+    Case('check_vtb_data', run_check_vtb_data),
+]
+
+
+def case_names():
+    return [case.name for case in CASES]
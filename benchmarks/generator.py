@@ -0,0 +1,229 @@
+"""Воспроизводимые синтетические данные реестра: дома, помещения, владельцы, выписки.
+
+Один seed даёт одинаковые таблицы на любой машине: у каждого набора свой
+генератор, выведенный из seed, поэтому порядок вызовов не влияет на данные.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from columns import STATEMENT_HEADERS, VTB_HEADERS
+from validation import VTB_BIK, _KEY_WEIGHTS
+
+
+DEFAULT_SEED = 20240101
+
+# Фамилии в мужской и женской форме
+SURNAMES = [
+    ("Иванов", "Иванова"), ("Смирнов", "Смирнова"), ("Кузнецов", "Кузнецова"),
+    ("Попов", "Попова"), ("Васильев", "Васильева"), ("Петров", "Петрова"),
+    ("Соколов", "Соколова"), ("Михайлов", "Михайлова"), ("Новиков", "Новикова"),
+    ("Фёдоров", "Фёдорова"), ("Морозов", "Морозова"), ("Волков", "Волкова"),
+    ("Алексеев", "Алексеева"), ("Лебедев", "Лебедева"), ("Семёнов", "Семёнова"),
+    ("Егоров", "Егорова"), ("Павлов", "Павлова"), ("Козлов", "Козлова"),
+    ("Степанов", "Степанова"), ("Николаев", "Николаева"), ("Орлов", "Орлова"),
+    ("Андреев", "Андреева"), ("Макаров", "Макарова"), ("Никитин", "Никитина"),
+    ("Захаров", "Захарова"), ("Зайцев", "Зайцева"), ("Соловьёв", "Соловьёва"),
+    ("Борисов", "Борисова"), ("Яковлев", "Яковлева"), ("Григорьев", "Григорьева"),
+]
+MALE_NAMES = ["Александр", "Сергей", "Дмитрий", "Андрей", "Алексей", "Максим",
+              "Иван", "Михаил", "Николай", "Евгений", "Владимир", "Павел"]
+FEMALE_NAMES = ["Елена", "Ольга", "Наталья", "Татьяна", "Ирина", "Светлана",
+                "Анна", "Мария", "Екатерина", "Юлия", "Марина", "Галина"]
+# Отчества: (мужское, женское)
+PATRONYMICS = [
+    ("Александрович", "Александровна"), ("Сергеевич", "Сергеевна"),
+    ("Дмитриевич", "Дмитриевна"), ("Андреевич", "Андреевна"),
+    ("Алексеевич", "Алексеевна"), ("Иванович", "Ивановна"),
+    ("Михайлович", "Михайловна"), ("Николаевич", "Николаевна"),
+    ("Владимирович", "Владимировна"), ("Павлович", "Павловна"),
+]
+
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Екатеринбург", "Новосибирск", "Самара"]
+STREETS = ["ул. Ленина", "ул. Пушкина", "ул. Гагарина", "ул. Садовая", "пр. Мира",
+           "ул. Советская", "ул. Молодёжная", "ул. Школьная", "наб. Речная",
+           "пер. Лесной", "ул. Центральная", "ш. Энтузиастов"]
+
+VTB_OPERATION_TYPES = ["Зачисление", "Списание", "Поступление", "Расход"]
+VTB_STATUSES = ["Проведена", "Проведена", "Проведена", "Отклонена"]
+PAYMENT_PURPOSES = ["Оплата ЖКУ", "Взнос на капитальный ремонт", "Оплата за содержание жилья",
+                    "Пени за просрочку", "Возврат переплаты"]
+
+# Начало периода операций и его длина в днях
+OPERATIONS_START = np.datetime64('2022-01-01')
+OPERATIONS_DAYS = 730
+
+
+def dataset_rng(seed, dataset):
+    return np.random.default_rng([seed, dataset])
+
+
+def pick(rng, values, count):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), count)]
+
+
+def full_names(rng, count):
+    """ФИО с согласованными по полу фамилией, именем и отчеством."""
+    female = rng.random(count) < 0.5
+    surname = rng.integers(0, len(SURNAMES), count)
+    patronymic = rng.integers(0, len(PATRONYMICS), count)
+    surnames = np.where(female, np.array([pair[1] for pair in SURNAMES], dtype=object)[surname],
+                        np.array([pair[0] for pair in SURNAMES], dtype=object)[surname])
+    names = np.where(female, pick(rng, FEMALE_NAMES, count), pick(rng, MALE_NAMES, count))
+    patronymics = np.where(female,
+                           np.array([pair[1] for pair in PATRONYMICS], dtype=object)[patronymic],
+                           np.array([pair[0] for pair in PATRONYMICS], dtype=object)[patronymic])
+    return pd.DataFrame({'last_name': surnames, 'first_name': names,
+                         'patronymic': patronymics})
+
+
+def accounts(rng, count, bik=VTB_BIK):
+    """Счета физлиц 40817810… с верным контрольным ключом для bik."""
+    rest = pd.Series(rng.integers(0, 10 ** 11, count)).astype(str).str.zfill(11)
+    draft = '40817810' + '0' + rest
+    keyed = (bik[-3:] + draft).str.cat()
+    digits = (np.frombuffer(keyed.encode('ascii'), dtype=np.uint8) - ord('0')).reshape(-1, 23)
+    checksum = ((digits.astype(np.int64) * _KEY_WEIGHTS) % 10).sum(axis=1) % 10
+    # Вес разряда ключа (позиция 11 с учётом БИК) равен 3; 7 — обратный к 3 по модулю 10
+    key = (7 * (10 - checksum)) % 10
+    return '40817810' + pd.Series(key).astype(str) + rest
+
+
+def passports(rng, count):
+    series = pd.Series(rng.integers(1000, 10000, count)).astype(str)
+    number = pd.Series(rng.integers(0, 10 ** 6, count)).astype(str).str.zfill(6)
+    return series + ' ' + number
+
+
+def operation_dates(rng, count):
+    days = rng.integers(0, OPERATIONS_DAYS, count)
+    dates = pd.Series(OPERATIONS_START + days.astype('timedelta64[D]'))
+    return dates.dt.strftime('%d.%m.%Y')
+
+
+def amounts(rng, count):
+    values = np.round(rng.lognormal(mean=8.0, sigma=0.8, size=count), 2)
+    return pd.Series(values).map('{:.2f}'.format)
+
+
+class RegistryData:
+    """Согласованный набор данных на rows строк основной таблицы.
+
+    Владельцы и плательщики берутся из одного списка людей, поэтому
+    выписки сопоставляются с владельцами так же, как реальные.
+    error_rate — доля строк регистра ВТБ с намеренными ошибками.
+    """
+
+    def __init__(self, rows, seed=DEFAULT_SEED, error_rate=0.01):
+        self.rows = rows
+        self.seed = seed
+        self.error_rate = error_rate
+        self._people = None
+
+    @property
+    def people(self):
+        if self._people is None:
+            rng = dataset_rng(self.seed, 0)
+            people = full_names(rng, self.rows)
+            people['account'] = accounts(rng, self.rows)
+            people['passport'] = passports(rng, self.rows)
+            self._people = people
+        return self._people
+
+    def houses_frame(self):
+        """Таблица импорта домов: около rows помещений, по 5–15 на дом."""
+        count = max(1, self.rows // 10)
+        rng = dataset_rng(self.seed, 1)
+        address = (pd.Series(pick(rng, CITIES, count)).radd("г. ") + ", "
+                   + pick(rng, STREETS, count) + ", д. "
+                   + pd.Series(np.arange(1, count + 1)).astype(str))
+        premises = rng.integers(5, 16, count)
+        numbers = [";".join(str(number) for number in range(1, total + 1))
+                   for total in premises]
+        return pd.DataFrame({
+            'address': address,
+            'build_year': rng.integers(1950, 2024, count),
+            'premises': numbers,
+            'area': np.round(rng.uniform(25.0, 140.0, count), 1),
+        })
+
+    def owner_documents(self, premise_ids):
+        """Документы владельцев: по человеку на строку, помещения по кругу."""
+        rng = dataset_rng(self.seed, 2)
+        people = self.people
+        shares = rng.choice([1.0, 0.5, 0.5, 0.25, 0.333], self.rows)
+        statuses = np.where(rng.random(self.rows) < 0.9, 'active', 'inactive')
+        issued = datetime(2010, 1, 1)
+        documents = []
+        for position, person in enumerate(people.itertuples(index=False)):
+            document = {
+                'first_name': person.first_name,
+                'last_name': person.last_name,
+                'document': {'number': person.passport, 'issue_date': issued},
+                'account': person.account,
+                'ownership_share': float(shares[position]),
+                'status': statuses[position],
+            }
+            if premise_ids:
+                document['premise_id'] = premise_ids[position % len(premise_ids)]
+            documents.append(document)
+        return documents
+
+    def links_frame(self):
+        """Файл связей владелец — помещение: у каждого человека 1–3 помещения."""
+        rng = dataset_rng(self.seed, 5)
+        houses = self.houses_frame()
+        premises = (houses.assign(premise=houses['premises'].str.split(';'))
+                    .explode('premise', ignore_index=True))
+        people = np.repeat(np.arange(self.rows), rng.integers(1, 4, self.rows))
+        chosen = premises.iloc[rng.integers(0, len(premises), len(people))]
+        return pd.DataFrame({
+            'address': chosen['address'].to_numpy(),
+            'premise': chosen['premise'].to_numpy(),
+            'document': self.people['passport'].to_numpy()[people],
+            'share': rng.choice([1.0, 0.5, 0.25], len(people)),
+        })
+
+    def vtb_frame(self):
+        """Регистр ВТБ в колонках VTB_HEADERS с долей error_rate ошибочных строк."""
+        rng = dataset_rng(self.seed, 3)
+        payers = self.people.iloc[rng.integers(0, self.rows, self.rows)].reset_index(drop=True)
+        frame = pd.DataFrame({
+            "ID": np.arange(1, self.rows + 1).astype(str),
+            "Номер счета": payers['account'],
+            "ФИО владельца": (payers['last_name'] + ' ' + payers['first_name'] + ' '
+                              + payers['patronymic']),
+            "Дата операции": operation_dates(rng, self.rows),
+            "Тип операции": pick(rng, VTB_OPERATION_TYPES, self.rows),
+            "Сумма": amounts(rng, self.rows),
+            "Статус": pick(rng, VTB_STATUSES, self.rows),
+        }, columns=VTB_HEADERS)
+        return self._spoil(rng, frame)
+
+    def statement_frame(self):
+        """Выписка в колонках STATEMENT_HEADERS; назначение содержит номер паспорта."""
+        rng = dataset_rng(self.seed, 4)
+        payers = self.people.iloc[rng.integers(0, self.rows, self.rows)].reset_index(drop=True)
+        purpose = pd.Series(pick(rng, PAYMENT_PURPOSES, self.rows))
+        return pd.DataFrame({
+            "ID": np.arange(1, self.rows + 1).astype(str),
+            "ФИО": payers['last_name'] + ' ' + payers['first_name'] + ' ' + payers['patronymic'],
+            "Номер счета": payers['account'],
+            "Дата операции": operation_dates(rng, self.rows),
+            "Тип операции": pick(rng, VTB_OPERATION_TYPES, self.rows),
+            "Сумма": amounts(rng, self.rows),
+            "Назначение платежа": purpose + ", паспорт " + payers['passport'],
+            "Статус": pick(rng, VTB_STATUSES, self.rows),
+        }, columns=STATEMENT_HEADERS)
+
+    def _spoil(self, rng, frame):
+        # Ошибки, которые ловят правила validation.vtb_rules
+        bad = np.flatnonzero(rng.random(len(frame)) < self.error_rate)
+        kinds = rng.integers(0, 4, len(bad))
+        frame.loc[bad[kinds == 0], "Номер счета"] = frame.loc[bad[kinds == 0], "Номер счета"].str[1:]
+        frame.loc[bad[kinds == 1], "Дата операции"] = "31.02.2023"
+        frame.loc[bad[kinds == 2], "Сумма"] = "сто рублей"
+        duplicates = bad[kinds == 3]
+        frame.loc[duplicates, "ID"] = frame["ID"].iloc[duplicates // 2].to_numpy()
+        return frame
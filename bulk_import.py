@@ -0,0 +1,314 @@
+import time
+from datetime import datetime
+
+import pandas as pd
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from chunked_reader import DEFAULT_CHUNK_SIZE, iter_chunks
+from metrics import metrics
+from ownership_links import link_update, write_links
+from registry_cache import registry_cache
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Обязательные колонки файла связей; share (по умолчанию 1) и since — необязательные
+LINK_FILE_COLUMNS = ('address', 'premise', 'document')
+
+
+class BatchReport:
+    """Итог пакетной записи: счётчики подкласса (counter_lines) и ошибки."""
+
+    def __init__(self):
+        self.rows = 0
+        # (этап, номер пакета, строка файла или None, сообщение)
+        self.failures = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def counter_lines(self):
+        return []
+
+    def summary(self, max_failures=20):
+        lines = [f"Rows processed: {self.rows}"]
+        lines.extend(self.counter_lines())
+        lines.append(f"Throughput: {self.rows_per_second:.0f} rows/s")
+        if self.failures:
+            lines.append(f"Failures: {len(self.failures)}")
+            for stage, batch, row, message in self.failures[:max_failures]:
+                where = f"row {row}" if row is not None else "whole batch"
+                if batch is not None:
+                    where = f"batch {batch}, {where}"
+                lines.append(f"  {stage}, {where}: {message}")
+            if len(self.failures) > max_failures:
+                lines.append(f"  ... and {len(self.failures) - max_failures} more")
+        return "\n".join(lines)
+
+
+class ImportReport(BatchReport):
+    def __init__(self):
+        super().__init__()
+        self.houses_inserted = 0
+        self.premises_inserted = 0
+
+    def counter_lines(self):
+        return [f"Houses inserted: {self.houses_inserted}",
+                f"Premises inserted: {self.premises_inserted}"]
+
+
+class LinkReport(BatchReport):
+    def __init__(self):
+        super().__init__()
+        self.links_inserted = 0
+        self.links_updated = 0
+
+    def counter_lines(self):
+        return [f"Links created: {self.links_inserted}",
+                f"Links updated: {self.links_updated}"]
+
+
+def prepare_houses(df, report):
+    # Номера строк как в Excel: заголовок занимает первую строку
+    excel_rows = pd.Series(df.index, index=df.index) + 2
+
+    address = df['address'].astype(str).str.strip()
+    build_year = pd.to_numeric(df['build_year'], errors='coerce')
+    valid = df['address'].notna() & address.ne('') & build_year.notna()
+
+    for row in excel_rows[~valid]:
+        report.failures.append(("parse", None, int(row), "missing address or invalid build_year"))
+
+    houses = pd.DataFrame({
+        'address': address[valid],
+        'build_year': build_year[valid].astype('int64'),
+    })
+    houses.insert(0, '_id', [ObjectId() for _ in range(len(houses))])
+    return houses, excel_rows[valid], valid
+
+
+def prepare_premises(df, houses, valid):
+    if 'premises' not in df.columns:
+        return pd.DataFrame(columns=['house_id', 'number', 'area'])
+
+    if 'area' in df.columns:
+        area = pd.to_numeric(df.loc[valid, 'area'], errors='coerce').fillna(0.0)
+    else:
+        area = pd.Series(0.0, index=houses.index)
+
+    premises = pd.DataFrame({
+        'house_id': houses['_id'],
+        'number': df.loc[valid, 'premises'],
+        'area': area.astype('float64'),
+    })
+    premises = premises[premises['number'].notna()]
+    premises['number'] = premises['number'].astype(str).str.split(';')
+    premises = premises.explode('number', ignore_index=True)
+    premises['number'] = premises['number'].str.strip()
+    return premises[premises['number'].ne('')]
+
+
+def write_batches(collection, frame, batch_size, stage, report, row_numbers=None,
+                  progress=None):
+    """Вставляет frame пакетами insert_many(ordered=False).
+
+    Ошибки отдельных документов записываются в report и не прерывают импорт.
+    Возвращает число вставленных документов и множество _id неудачных вставок.
+    """
+    inserted = 0
+    failed_ids = set()
+    for batch_number, start in enumerate(range(0, len(frame), batch_size), 1):
+        documents = frame.iloc[start:start + batch_size].to_dict('records')
+        try:
+            result = collection.insert_many(documents, ordered=False)
+            inserted += len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted += e.details.get('nInserted', 0)
+            for error in e.details.get('writeErrors', []):
+                position = start + error['index']
+                row = int(row_numbers.iloc[position]) if row_numbers is not None else None
+                failed_ids.add(documents[error['index']].get('_id'))
+                report.failures.append((stage, batch_number, row, error.get('errmsg', '')))
+        except PyMongoError as e:
+            failed_ids.update(document.get('_id') for document in documents)
+            report.failures.append((stage, batch_number, None, str(e)))
+        # Сбрасываются только закэшированные страницы, куда попадают новые _id
+        registry_cache.invalidate(collection, [document['_id'] for document in documents])
+        if progress is not None:
+            progress(len(documents))
+    return inserted, failed_ids
+
+
+def import_houses(db, df, batch_size=DEFAULT_BATCH_SIZE, progress=None, report=None):
+    """Импортирует дома и помещения из DataFrame.
+
+    progress(n) вызывается после каждого пакета с общим числом записанных
+    документов; исключение из progress (например, отмена) прерывает импорт.
+    Если передан report, результаты добавляются в него.
+    """
+    if report is None:
+        report = ImportReport()
+    started = time.perf_counter()
+    report.rows += len(df)
+    written = report.houses_inserted + report.premises_inserted
+
+    def batch_written(count):
+        nonlocal written
+        written += count
+        if progress is not None:
+            progress(written)
+
+    with metrics.span('import.prepare'):
+        houses, row_numbers, valid = prepare_houses(df, report)
+        premises = prepare_premises(df, houses, valid)
+
+    with metrics.span('import.write_houses'):
+        houses_inserted, failed_houses = write_batches(
+            db.houses, houses, batch_size, "houses", report, row_numbers, batch_written)
+    report.houses_inserted += houses_inserted
+
+    # Помещения ссылаются на заранее сгенерированные _id домов,
+    # поэтому достаточно отбросить помещения не вставленных домов
+    if failed_houses:
+        premises = premises[~premises['house_id'].isin(failed_houses)]
+    with metrics.span('import.write_premises'):
+        premises_inserted, _ = write_batches(
+            db.premises, premises, batch_size, "premises", report, progress=batch_written)
+    report.premises_inserted += premises_inserted
+
+    report.elapsed += time.perf_counter() - started
+    return report
+
+
+def import_houses_file(db, file_name, batch_size=DEFAULT_BATCH_SIZE, progress=None,
+                       chunksize=DEFAULT_CHUNK_SIZE, engine=None):
+    # Файл читается порциями, поэтому расход памяти не зависит от его размера
+    report = ImportReport()
+    started = time.perf_counter()
+    for chunk in metrics.iterate('import.read_chunk', iter_chunks(file_name, chunksize, engine)):
+        import_houses(db, chunk, batch_size, progress, report)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def text_values(column):
+    # Excel отдаёт номера квартир и документов числами: 12 читается как 12.0
+    return column.map(lambda value: str(int(value))
+                      if isinstance(value, float) and value.is_integer()
+                      else str(value)).str.strip()
+
+
+def prepare_links(df, report):
+    missing = [name for name in LINK_FILE_COLUMNS if name not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    excel_rows = pd.Series(df.index, index=df.index) + 2
+
+    links = pd.DataFrame({name: text_values(df[name]) for name in LINK_FILE_COLUMNS})
+    if 'share' in df.columns:
+        links['share'] = pd.to_numeric(df['share'], errors='coerce')
+    else:
+        links['share'] = 1.0
+    if 'since' in df.columns:
+        links['since'] = pd.to_datetime(df['since'], errors='coerce', dayfirst=True)
+    else:
+        links['since'] = pd.NaT
+    valid = links['share'].gt(0) & links['share'].le(1)
+    for name in LINK_FILE_COLUMNS:
+        valid &= df[name].notna() & links[name].ne('')
+
+    for row in excel_rows[~valid]:
+        report.failures.append(("parse", None, int(row),
+                                "missing address, premise or document, or share not in (0, 1]"))
+    links['row'] = excel_rows
+    return links[valid]
+
+
+def resolve_links(db, links, report):
+    """Находит _id дома, помещения и владельца; нераспознанные строки — в report.
+
+    Каждая порция разрешается тремя запросами $in по индексам address,
+    house_id_number и document_number вместо запроса на строку.
+    """
+    houses = {}
+    for house in db.houses.find({'address': {'$in': links['address'].unique().tolist()}},
+                                {'address': 1}):
+        houses.setdefault(house['address'], house['_id'])
+    house_ids = links['address'].map(houses)
+
+    premises = {(premise['house_id'], premise['number']): premise['_id']
+                for premise in db.premises.find({'house_id': {'$in': list(set(houses.values()))}},
+                                                {'house_id': 1, 'number': 1})}
+    premise_ids = pd.Series([premises.get(key) for key in zip(house_ids, links['premise'])],
+                            index=links.index, dtype=object)
+
+    numbers = links['document'].unique().tolist()
+    owners = {owner['document']['number']: owner['_id'] for owner in db.owners.find(
+        {'document.number': {'$in': numbers, '$type': 'string', '$gt': ''}},
+        {'document.number': 1})}
+    owner_ids = links['document'].map(owners)
+
+    checks = [(house_ids.isna(), "house not found: {address}"),
+              (house_ids.notna() & premise_ids.isna(), "premise not found: {address}, {premise}"),
+              (owner_ids.isna(), "owner not found: document {document}")]
+    for missing, message in checks:
+        for link in links[missing].itertuples(index=False):
+            report.failures.append(("resolve", None, int(link.row),
+                                    message.format(address=link.address, premise=link.premise,
+                                                   document=link.document)))
+
+    resolved = links.assign(house_id=house_ids, premise_id=premise_ids, owner_id=owner_ids)
+    resolved = resolved[house_ids.notna() & premise_ids.notna() & owner_ids.notna()]
+    # Повтор пары в файле — уточнение доли: остаётся последняя строка
+    return resolved.drop_duplicates(['owner_id', 'premise_id'], keep='last')
+
+
+def import_links(db, df, batch_size=DEFAULT_BATCH_SIZE, progress=None, report=None):
+    """Создаёт связи владелец — помещение из DataFrame пакетными upsert.
+
+    Строка файла — адрес дома, номер помещения, номер документа владельца и
+    доля; дом, помещение и владелец должны уже быть в базе. Связи описывают
+    только текущее состояние: события ownership_events, снимки и сводка
+    premise_shares не пишутся, поэтому история, владельцы на дату и
+    check-shares импортированные доли не учитывают.
+    """
+    if report is None:
+        report = LinkReport()
+    started = time.perf_counter()
+    report.rows += len(df)
+    written = report.links_inserted + report.links_updated
+
+    def batch_written(count):
+        nonlocal written
+        written += count
+        if progress is not None:
+            progress(written)
+
+    with metrics.span('links.prepare'):
+        links = prepare_links(df, report)
+    with metrics.span('links.resolve'):
+        links = resolve_links(db, links, report)
+    now = datetime.now()
+    requests = [link_update(owner_id, premise_id, share, house_id,
+                            since.to_pydatetime() if not pd.isna(since) else now, 'import')
+                for owner_id, premise_id, share, house_id, since in zip(
+                    links['owner_id'], links['premise_id'], links['share'],
+                    links['house_id'], links['since'])]
+    with metrics.span('links.write'):
+        write_links(db, requests, report, batch_size, links['row'].tolist(), batch_written)
+
+    report.elapsed += time.perf_counter() - started
+    return report
+
+
+def import_links_file(db, file_name, batch_size=DEFAULT_BATCH_SIZE, progress=None,
+                      chunksize=DEFAULT_CHUNK_SIZE, engine=None):
+    report = LinkReport()
+    started = time.perf_counter()
+    for chunk in metrics.iterate('import.read_chunk', iter_chunks(file_name, chunksize, engine)):
+        import_links(db, chunk, batch_size, progress, report)
+    report.elapsed = time.perf_counter() - started
+    return report
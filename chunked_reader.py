@@ -0,0 +1,145 @@
+from itertools import islice
+
+import pandas as pd
+
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Имя движка -> функция (file_name, chunksize) -> итератор DataFrame
+_engines = {}
+
+
+def register_engine(name, reader):
+    _engines[name] = reader
+
+
+def available_engines():
+    return sorted(_engines)
+
+
+def default_engine(file_name):
+    name = file_name.lower()
+    if name.endswith(('.xlsx', '.xlsm')):
+        return 'openpyxl'
+    if name.endswith('.xls'):
+        return 'xls'
+    if name.endswith('.pdf'):
+        return 'pdf'
+    return 'csv'
+
+
+def iter_chunks(file_name, chunksize=DEFAULT_CHUNK_SIZE, engine=None):
+    """Читает табличный файл порциями по chunksize строк.
+
+    Индекс каждой порции продолжает нумерацию строк данных файла
+    (0 — первая строка после заголовка), так что номера строк в
+    сообщениях об ошибках совпадают с исходным файлом.
+    """
+    if engine is None:
+        engine = default_engine(file_name)
+    if engine not in _engines:
+        raise ValueError(f"Unknown reader engine: {engine}")
+    yield from _engines[engine](file_name, chunksize)
+
+
+def read_all(file_name, chunksize=DEFAULT_CHUNK_SIZE, engine=None, progress=None):
+    chunks = []
+    rows = 0
+    for chunk in iter_chunks(file_name, chunksize, engine):
+        chunks.append(chunk)
+        rows += len(chunk)
+        if progress is not None:
+            progress(rows)
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks)
+
+
+def _header_names(header):
+    return [str(name) if name is not None else f"Unnamed: {position}"
+            for position, name in enumerate(header)]
+
+
+def _records_chunks(rows, columns, chunksize):
+    width = len(columns)
+    start = 0
+    while True:
+        batch = list(islice(rows, chunksize))
+        if not batch:
+            return
+        # В read_only режиме строки бывают короче или длиннее заголовка
+        records = [tuple(row[:width]) + (None,) * (width - len(row)) for row in batch]
+        chunk = pd.DataFrame.from_records(records, columns=columns)
+        chunk.index = pd.RangeIndex(start, start + len(batch))
+        start += len(batch)
+        chunk = chunk[chunk.notna().any(axis=1)]
+        if len(chunk):
+            yield chunk
+
+
+def read_xlsx_chunks(file_name, chunksize):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_name, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield from _records_chunks(rows, _header_names(header), chunksize)
+    finally:
+        workbook.close()
+
+
+def read_xls_chunks(file_name, chunksize):
+    # Старый формат .xls не читается потоково — файл загружается целиком
+    df = pd.read_excel(file_name)
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def read_csv_chunks(file_name, chunksize):
+    yield from pd.read_csv(file_name, encoding='utf-8', chunksize=chunksize)
+
+
+def read_csv_chunks_pyarrow(file_name, chunksize):
+    from pyarrow import csv
+
+    reader = csv.open_csv(file_name, read_options=csv.ReadOptions(encoding='utf-8'))
+    start = 0
+    for batch in reader:
+        frame = batch.to_pandas()
+        for offset in range(0, len(frame), chunksize):
+            chunk = frame.iloc[offset:offset + chunksize]
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            yield chunk
+
+
+def read_xlsx_chunks_calamine(file_name, chunksize):
+    # Быстрый разбор на Rust; лист читается целиком, наружу отдаётся порциями
+    from python_calamine import CalamineWorkbook
+
+    sheet = CalamineWorkbook.from_path(file_name).get_sheet_by_index(0)
+    rows = iter(sheet.to_python(skip_empty_area=False))
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _header_names([name if name != "" else None for name in header])
+    rows = ([value if value != "" else None for value in row] for row in rows)
+    yield from _records_chunks(rows, columns, chunksize)
+
+
+def read_pdf_chunks(file_name, chunksize):
+    # Выписки в PDF: страницы разбираются в пуле процессов (нужен pdfplumber)
+    from pdf_reader import read_pdf_chunks as read_pages
+
+    yield from read_pages(file_name, chunksize)
+
+
+register_engine('openpyxl', read_xlsx_chunks)
+register_engine('xls', read_xls_chunks)
+register_engine('csv', read_csv_chunks)
+register_engine('pyarrow', read_csv_chunks_pyarrow)
+register_engine('calamine', read_xlsx_chunks_calamine)
+register_engine('pdf', read_pdf_chunks)
@@ -0,0 +1,357 @@
+"""Командная строка для ночных заданий: импорт, экспорт, проверка и сверка без Qt.
+
+    python cli.py import houses registry.xlsx
+    python cli.py import links owners_premises.xlsx
+    python cli.py import vtb incoming/ --workers 4 --batch-size 2000
+    python cli.py export owners owners.parquet --where status=active
+    python cli.py validate register.xlsx --output errors.csv
+    python cli.py reconcile statement.xlsx --output matches.xlsx
+    python cli.py backfill-history
+    python cli.py check-shares --rebuild
+    python cli.py backfill-links
+    python cli.py portfolio --document "4510 123456"
+"""
+import argparse
+import sys
+import time
+
+from columns import (ERROR_COLUMNS, HOUSE_COLUMNS, OWNER_COLUMNS, PREMISE_COLUMNS,
+                     STATEMENT_HEADERS, VTB_HEADERS)
+from filters import (HOUSE_FILTER_FIELDS, OWNER_FILTER_FIELDS, PREMISE_FILTER_FIELDS,
+                     STORED_FILTER_FIELDS, house_query, owner_query, premise_query)
+from repository import RepositoryConfig, Repository, RepositoryUnavailable
+from schema import ensure_indexes
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_UNAVAILABLE = 3
+
+REGISTRY_EXPORTS = {
+    'houses': (HOUSE_COLUMNS, HOUSE_FILTER_FIELDS, house_query),
+    'premises': (PREMISE_COLUMNS, PREMISE_FILTER_FIELDS, premise_query),
+    'owners': (OWNER_COLUMNS, OWNER_FILTER_FIELDS, owner_query),
+}
+
+
+def progress_printer(label):
+    """Печатает счётчик строк в stderr, если это терминал."""
+    if not sys.stderr.isatty():
+        return None
+    started = time.perf_counter()
+
+    def progress(rows):
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        print(f"\r{label}: {rows} ({rate:.0f}/s)", end='', file=sys.stderr, flush=True)
+
+    return progress
+
+
+def end_progress(progress):
+    if progress is not None:
+        print(file=sys.stderr)
+
+
+def parse_where(pairs, fields):
+    """--where key=value -> аргументы построителя запроса, как у FilterBar.values()."""
+    allowed = [field[0] for field in fields]
+    values = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition('=')
+        key = key.strip()
+        if not sep:
+            raise ValueError(f"--where expects key=value, got '{pair}'")
+        if key not in allowed:
+            raise ValueError(f"unknown filter '{key}', expected one of: {', '.join(allowed)}")
+        values[key] = value.strip()
+    return values
+
+
+def connect(args):
+    overrides = {}
+    if args.uri:
+        overrides['uri'] = args.uri
+    if args.database:
+        overrides['database'] = args.database
+    repository = Repository(RepositoryConfig.from_env(**overrides)).connect()
+    # Уникальные индексы нужны до первой записи: на них держится дедупликация
+    # выписок и реестров, а база могла ещё не открываться в окне
+    try:
+        problems = ensure_indexes(repository.db)
+    except Exception as e:
+        problems = [str(e)]
+    if problems:
+        print("Some indexes could not be created:\n" + "\n".join(problems), file=sys.stderr)
+    return repository
+
+
+def import_registry(repository, files, args, import_file):
+    failed = False
+    for file_name in files:
+        progress = progress_printer(file_name)
+        report = import_file(repository.db, file_name, batch_size=args.batch_size,
+                             progress=progress)
+        end_progress(progress)
+        print(f"{file_name}\n{report.summary()}")
+        failed = failed or bool(report.failures)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def import_statements(repository, kind, paths, args):
+    from folder_import import batch_summary, collect_files, import_files
+    from statement_store import import_file
+
+    files = collect_files(paths, kind)
+    if not files:
+        print("No supported files found", file=sys.stderr)
+        return EXIT_FAILED
+    progress = progress_printer(kind)
+    if len(files) == 1:
+        _, report = import_file(repository.db, kind, files[0], batch_size=args.batch_size,
+                                progress=progress)
+        end_progress(progress)
+        print(f"{files[0]}\n{report.summary()}")
+        return EXIT_FAILED if report.failures else EXIT_OK
+
+    _, statuses = import_files(repository.db, kind, files, workers=args.workers,
+                               batch_size=args.batch_size, progress=progress)
+    end_progress(progress)
+    head, details = batch_summary(statuses)
+    print(f"{head}\n{details}")
+    return EXIT_OK if all(status.ok for status in statuses) else EXIT_FAILED
+
+
+def command_import(args):
+    repository = connect(args)
+    try:
+        if args.kind == 'houses':
+            from bulk_import import import_houses_file
+            return import_registry(repository, args.paths, args, import_houses_file)
+        if args.kind == 'links':
+            from bulk_import import import_links_file
+            return import_registry(repository, args.paths, args, import_links_file)
+        return import_statements(repository, args.kind, args.paths, args)
+    finally:
+        repository.close()
+
+
+def command_export(args):
+    from export import export_collection, export_frame
+
+    if args.kind in REGISTRY_EXPORTS:
+        values = parse_where(args.where, REGISTRY_EXPORTS[args.kind][1])
+    else:
+        values = parse_where(args.where, STORED_FILTER_FIELDS)
+    repository = connect(args)
+    try:
+        progress = progress_printer(args.output)
+        if args.kind in REGISTRY_EXPORTS:
+            columns, _, build_query = REGISTRY_EXPORTS[args.kind]
+            rows = export_collection(repository.db[args.kind], columns, args.output,
+                                     build_query(**values), args.limit, progress=progress)
+        else:
+            from statement_store import (DEFAULT_LOAD_LIMIT, load_statements,
+                                         load_vtb_registers, stored_query)
+
+            load, headers = ((load_vtb_registers, VTB_HEADERS) if args.kind == 'vtb'
+                             else (load_statements, STATEMENT_HEADERS))
+            frame = load(repository.db, stored_query(**values), args.limit or DEFAULT_LOAD_LIMIT)
+            rows = export_frame(frame, headers, args.output, progress=progress)
+        end_progress(progress)
+        print(f"Exported {rows} rows to {args.output}")
+        return EXIT_OK
+    finally:
+        repository.close()
+
+
+def command_validate(args):
+    from chunked_reader import read_all
+    from export import export_frame
+    from validation import VTB_BIK, validate, vtb_rules
+
+    frame = read_all(args.file)
+    errors = validate(frame, vtb_rules(args.bik if args.bik is not None else VTB_BIK))
+    print(f"{args.file}: {len(frame)} rows, {len(errors)} errors")
+    for record in errors.head(args.show).itertuples(index=False):
+        print("  " + " | ".join(str(value) for value in record))
+    if args.output:
+        export_frame(errors, ERROR_COLUMNS, args.output)
+    return EXIT_FAILED if len(errors) else EXIT_OK
+
+
+def command_reconcile(args):
+    from chunked_reader import read_all
+    from export import export_frame
+    from reconcile import RESULT_COLUMNS, load_owners, reconcile, summary
+
+    repository = connect(args)
+    try:
+        statement = read_all(args.file).reset_index(drop=True)
+        result = reconcile(statement, load_owners(repository.db))
+    finally:
+        repository.close()
+    print(f"{args.file}: {summary(result)}")
+    if args.output:
+        export_frame(result, RESULT_COLUMNS, args.output)
+    return EXIT_OK
+
+
+def command_backfill_history(args):
+    from ownership import backfill_events
+
+    repository = connect(args)
+    try:
+        progress = progress_printer("owners")
+        created = backfill_events(repository.db, progress=progress)
+        end_progress(progress)
+    finally:
+        repository.close()
+    print(f"Created {created} ownership events")
+    return EXIT_OK
+
+
+def command_check_shares(args):
+    from share_totals import inconsistent_premises, rebuild
+
+    repository = connect(args)
+    try:
+        if args.rebuild:
+            print(f"Recalculated share totals of {rebuild(repository.db)} premises")
+        premises = inconsistent_premises(repository.db, args.limit)
+    finally:
+        repository.close()
+    for premise in premises:
+        print(f"premise {premise['premise_id']} (house {premise['house_id']}, "
+              f"No. {premise['number']}): total {premise['total']:g}, "
+              f"owners {premise['owners']}")
+    print(f"Inconsistent premises: {len(premises)}")
+    return EXIT_FAILED if premises else EXIT_OK
+
+
+def command_backfill_links(args):
+    from ownership_links import backfill
+
+    repository = connect(args)
+    try:
+        progress = progress_printer("links")
+        report = backfill(repository.db, batch_size=args.batch_size, progress=progress)
+        end_progress(progress)
+    finally:
+        repository.close()
+    print(report.summary())
+    return EXIT_FAILED if report.failures else EXIT_OK
+
+
+def command_portfolio(args):
+    from bson import ObjectId
+    from bson.errors import InvalidId
+
+    repository = connect(args)
+    try:
+        if args.premise:
+            try:
+                premise_id = ObjectId(args.premise)
+            except InvalidId:
+                raise ValueError(f"invalid premise id '{args.premise}'")
+            owners = repository.premise_owners(premise_id, args.all)
+            for owner in owners:
+                document = (owner.get('document') or {}).get('number', '')
+                print(f"owner {owner['_id']} {owner.get('last_name') or ''} "
+                      f"{owner.get('first_name') or ''} ({document}): share {owner['share']:g}"
+                      f"{'' if owner['active'] else ', inactive'}")
+            print(f"Owners: {len(owners)}")
+            return EXIT_OK
+        owner = repository.owner_by_document(args.document)
+        if owner is None:
+            raise ValueError(f"no owner with document '{args.document}'")
+        premises = repository.portfolio(owner['_id'], args.all)
+    finally:
+        repository.close()
+    for premise in premises:
+        print(f"premise {premise['_id']} ({premise['address']}, No. {premise['number']}): "
+              f"share {premise['share']:g}{'' if premise['active'] else ', inactive'}")
+    print(f"Premises: {len(premises)}")
+    return EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Real Estate Registry command line")
+    parser.add_argument('--uri', help="MongoDB URI (default: REGISTRY_MONGO_URI)")
+    parser.add_argument('--database', help="database name")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processes for parsing several files (default: CPUs - 1)")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help="documents per bulk write")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser(
+        'import', help="import files into MongoDB",
+        epilog="links: owner-premise links (address, premise, document, share, since) as "
+               "current state only; ownership history and share totals are not updated")
+    import_parser.add_argument('kind', choices=['houses', 'links', 'vtb', 'statement'])
+    import_parser.add_argument('paths', nargs='+', help="files or folders")
+    import_parser.set_defaults(handler=command_import)
+
+    export_parser = commands.add_parser('export', help="export a collection to xlsx/csv/parquet")
+    export_parser.add_argument('kind', choices=['houses', 'premises', 'owners', 'vtb',
+                                                'statements'])
+    export_parser.add_argument('output')
+    export_parser.add_argument('--where', action='append', metavar='KEY=VALUE',
+                               help="filter field, e.g. year_from=1990 or account=...")
+    export_parser.add_argument('--limit', type=int)
+    export_parser.set_defaults(handler=command_export)
+
+    validate_parser = commands.add_parser('validate', help="validate a VTB register file")
+    validate_parser.add_argument('file')
+    validate_parser.add_argument('--output', help="write errors to xlsx/csv/parquet")
+    validate_parser.add_argument('--bik', help="bank BIK for the account key check "
+                                               "(empty string disables it)")
+    validate_parser.add_argument('--show', type=int, default=20, help="errors to print")
+    validate_parser.set_defaults(handler=command_validate)
+
+    reconcile_parser = commands.add_parser('reconcile', help="match statement payments to owners")
+    reconcile_parser.add_argument('file')
+    reconcile_parser.add_argument('--output', help="write results to xlsx/csv/parquet")
+    reconcile_parser.set_defaults(handler=command_reconcile)
+
+    backfill_parser = commands.add_parser(
+        'backfill-history', help="create ownership events for owners added before the history")
+    backfill_parser.set_defaults(handler=command_backfill_history)
+
+    shares_parser = commands.add_parser(
+        'check-shares', help="list premises whose owner shares do not add up to 1")
+    shares_parser.add_argument('--rebuild', action='store_true',
+                               help="recalculate the share totals from owners first")
+    shares_parser.add_argument('--limit', type=int, default=1000)
+    shares_parser.set_defaults(handler=command_check_shares)
+
+    links_parser = commands.add_parser(
+        'backfill-links', help="create owner-premise links from the history and owners")
+    links_parser.set_defaults(handler=command_backfill_links)
+
+    portfolio_parser = commands.add_parser(
+        'portfolio', help="list premises of an owner or owners of a premise")
+    target = portfolio_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--document', help="owner document number")
+    target.add_argument('--premise', help="premise ID")
+    portfolio_parser.add_argument('--all', action='store_true',
+                                  help="include links of former owners")
+    portfolio_parser.set_defaults(handler=command_portfolio)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except RepositoryUnavailable as e:
+        print(e, file=sys.stderr)
+        return EXIT_UNAVAILABLE
+    except (ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# Колонки таблиц реестра: (заголовок, путь к полю документа)
+HOUSE_COLUMNS = [
+    ("ID", "_id"),
+    ("Address", "address"),
+    ("Build Year", "build_year"),
+]
+
+PREMISE_COLUMNS = [
+    ("ID", "_id"),
+    ("House ID", "house_id"),
+    ("Number", "number"),
+    ("Area", "area"),
+]
+
+OWNER_COLUMNS = [
+    ("ID", "_id"),
+    ("First Name", "first_name"),
+    ("Last Name", "last_name"),
+    ("Document", "document.number"),
+    ("Share", "ownership_share"),
+    ("Status", "status"),
+]
+
+# История владения: события журнала и владельцы помещения на дату
+OWNERSHIP_EVENT_COLUMNS = [
+    ("Date", "effective_date"),
+    ("Event", "kind"),
+    ("Share", "share"),
+    ("Premise ID", "premise_id"),
+    ("Owner ID", "owner_id"),
+    ("Note", "note"),
+]
+
+OWNERS_ON_DATE_COLUMNS = [
+    ("ID", "_id"),
+    ("First Name", "first_name"),
+    ("Last Name", "last_name"),
+    ("Share", "share"),
+]
+
+# Портфель владельца: его помещения по ownership_links
+PORTFOLIO_COLUMNS = [
+    ("Premise ID", "_id"),
+    ("Address", "address"),
+    ("Number", "number"),
+    ("Area", "area"),
+    ("Share", "share"),
+    ("Since", "since"),
+    ("Until", "until"),
+]
+
+# Помещения, у которых сумма долей активных владельцев не равна 1
+INCONSISTENT_PREMISE_COLUMNS = [
+    ("Premise ID", "premise_id"),
+    ("House ID", "house_id"),
+    ("Number", "number"),
+    ("Total Share", "total"),
+    ("Owners", "owners"),
+]
+
+# Колонки регистров и выписок ВТБ (по позиции в исходном файле)
+VTB_HEADERS = [
+    "ID", "Номер счета", "ФИО владельца",
+    "Дата операции", "Тип операции", "Сумма", "Статус"
+]
+
+STATEMENT_HEADERS = [
+    "ID", "ФИО", "Номер счета", "Дата операции",
+    "Тип операции", "Сумма", "Назначение платежа", "Статус"
+]
+
+ERROR_COLUMNS = ["Строка", "Колонка", "Код", "Сообщение"]
+
+
+def field_value(document, path):
+    value = document
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def format_value(value):
+    return "" if value is None else str(value)
@@ -0,0 +1,142 @@
+import csv
+import math
+import os
+from datetime import date, datetime
+
+import pandas as pd
+
+from columns import field_value
+
+
+DEFAULT_EXPORT_CHUNK = 5000
+
+EXPORT_FILTER = "Excel Files (*.xlsx);;CSV Files (*.csv);;Parquet Files (*.parquet)"
+
+
+def export_value(value):
+    # Значения, которые понимают openpyxl и pyarrow; остальное (ObjectId и т.п.) — строкой
+    if value is None or isinstance(value, (str, bool, int, date, datetime)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if hasattr(value, 'item'):
+        return export_value(value.item())
+    return str(value)
+
+
+def frame_chunks(frame, chunksize=DEFAULT_EXPORT_CHUNK, rows=None):
+    """Порции DataFrame; rows — номера строк для выгрузки (например, найденные)."""
+    if rows is not None:
+        frame = frame.iloc[rows]
+    for start in range(0, len(frame), chunksize):
+        yield frame.iloc[start:start + chunksize]
+
+
+def cursor_chunks(cursor, columns, chunksize=DEFAULT_EXPORT_CHUNK):
+    """Порции DataFrame из курсора MongoDB; документы не накапливаются целиком."""
+    headers = [header for header, _ in columns]
+    batch = []
+    for document in cursor:
+        batch.append(tuple(export_value(field_value(document, path)) for _, path in columns))
+        if len(batch) >= chunksize:
+            yield pd.DataFrame.from_records(batch, columns=headers)
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch, columns=headers)
+
+
+def write_xlsx(file_name, headers, chunks, progress=None):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(headers))
+    rows = 0
+    for chunk in chunks:
+        for values in chunk.itertuples(index=False, name=None):
+            sheet.append([export_value(value) for value in values])
+        rows += len(chunk)
+        if progress is not None:
+            progress(rows)
+    workbook.save(file_name)
+    return rows
+
+
+def write_csv(file_name, headers, chunks, progress=None):
+    rows = 0
+    with open(file_name, 'w', encoding='utf-8', newline='') as output:
+        csv.writer(output).writerow(headers)
+        for chunk in chunks:
+            chunk.to_csv(output, header=False, index=False)
+            rows += len(chunk)
+            if progress is not None:
+                progress(rows)
+    return rows
+
+
+def write_parquet(file_name, headers, chunks, progress=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            chunk = chunk.set_axis(list(headers), axis=1)
+            for column in chunk.columns[chunk.dtypes == object]:
+                chunk[column] = chunk[column].map(export_value)
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(file_name, table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            rows += len(chunk)
+            if progress is not None:
+                progress(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+WRITERS = {
+    '.xlsx': write_xlsx,
+    '.csv': write_csv,
+    '.parquet': write_parquet,
+}
+
+
+def export_chunks(file_name, headers, chunks, progress=None):
+    """Записывает порции в файл; формат определяется по расширению."""
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unsupported export format: {extension or file_name}")
+    return WRITERS[extension](file_name, headers, chunks, progress)
+
+
+def export_collection(collection, columns, file_name, query=None, limit=None,
+                      chunksize=DEFAULT_EXPORT_CHUNK, progress=None):
+    cursor = collection.find(query or {}).sort('_id', 1).batch_size(chunksize)
+    if limit:
+        cursor = cursor.limit(limit)
+    headers = [header for header, _ in columns]
+    return export_chunks(file_name, headers, cursor_chunks(cursor, columns, chunksize), progress)
+
+
+def export_frame(frame, headers, file_name, rows=None, chunksize=DEFAULT_EXPORT_CHUNK,
+                 progress=None):
+    # Колонки сопоставляются с заголовками по позиции, как в таблицах
+    frame = frame.iloc[:, :len(headers)]
+    headers = list(headers)[:frame.shape[1]]
+    return export_chunks(file_name, headers, frame_chunks(frame, chunksize, rows), progress)
+
+
+def ensure_extension(file_name, selected_filter):
+    """Добавляет расширение из выбранного в QFileDialog фильтра, если его нет."""
+    if os.path.splitext(file_name)[1]:
+        return file_name
+    start = selected_filter.find('(*')
+    if start < 0:
+        return file_name
+    return file_name + selected_filter[start + 2:].split(')')[0].split()[0]
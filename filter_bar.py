@@ -0,0 +1,64 @@
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLineEdit, QComboBox, QPushButton
+
+
+class FilterBar(QWidget):
+    """Панель фильтра над таблицей реестра.
+
+    Поля задаются списком (ключ, подсказка[, варианты]); по кнопке Apply
+    или Enter испускается filter_changed со словарём ключ -> текст,
+    по кнопке Export — export_requested для выгрузки отфильтрованных строк.
+    """
+
+    filter_changed = pyqtSignal(dict)
+    export_requested = pyqtSignal()
+
+    def __init__(self, fields, apply_text="Apply", exportable=True, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.inputs = {}
+
+        for field in fields:
+            key, placeholder = field[0], field[1]
+            if len(field) > 2:
+                widget = QComboBox()
+                for choice in field[2]:
+                    widget.addItem(choice or f"Any {placeholder.lower()}", choice)
+            else:
+                widget = QLineEdit()
+                widget.setPlaceholderText(placeholder)
+                widget.returnPressed.connect(self.apply)
+            self.inputs[key] = widget
+            layout.addWidget(widget)
+
+        apply_button = QPushButton(apply_text)
+        reset_button = QPushButton("Reset")
+        apply_button.clicked.connect(self.apply)
+        reset_button.clicked.connect(self.reset)
+        layout.addWidget(apply_button)
+        layout.addWidget(reset_button)
+        if exportable:
+            export_button = QPushButton("Export")
+            export_button.clicked.connect(self.export_requested)
+            layout.addWidget(export_button)
+
+    def values(self):
+        values = {}
+        for key, widget in self.inputs.items():
+            if isinstance(widget, QComboBox):
+                values[key] = widget.currentData() or ''
+            else:
+                values[key] = widget.text()
+        return values
+
+    def apply(self):
+        self.filter_changed.emit(self.values())
+
+    def reset(self):
+        for widget in self.inputs.values():
+            if isinstance(widget, QComboBox):
+                widget.setCurrentIndex(0)
+            else:
+                widget.clear()
+        self.apply()
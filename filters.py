@@ -0,0 +1,85 @@
+import re
+
+
+DEFAULT_RESULT_LIMIT = 1000
+
+# Поля панелей фильтров: (ключ, подсказка[, варианты выбора])
+HOUSE_FILTER_FIELDS = [
+    ('address_prefix', "Address starts with"),
+    ('year_from', "Build year from"),
+    ('year_to', "Build year to"),
+]
+
+PREMISE_FILTER_FIELDS = [
+    ('area_from', "Area from"),
+    ('area_to', "Area to"),
+]
+
+OWNER_FILTER_FIELDS = [
+    ('last_name_prefix', "Last name starts with"),
+    ('status', "Status", ["", "active", "inactive"]),
+    ('share_from', "Share from"),
+    ('share_to', "Share to"),
+]
+
+# Поля панели загрузки сохранённых регистров и выписок: (ключ, подсказка)
+STORED_FILTER_FIELDS = [
+    ('account', "Номер счета"),
+    ('name_prefix', "ФИО начинается с"),
+    ('date_from', "Дата с (дд.мм.гггг)"),
+    ('date_to', "Дата по (дд.мм.гггг)"),
+]
+
+
+def parse_number(text, cast=float):
+    text = (text or '').strip().replace(',', '.')
+    if not text:
+        return None
+    try:
+        return cast(text)
+    except ValueError:
+        raise ValueError(f"'{text}' is not a number")
+
+
+def range_condition(low, high):
+    condition = {}
+    if low is not None:
+        condition['$gte'] = low
+    if high is not None:
+        condition['$lte'] = high
+    return condition
+
+
+def prefix_condition(prefix):
+    # Якорный регулярный префикс без флагов MongoDB обслуживает по индексу
+    return {'$regex': '^' + re.escape(prefix)}
+
+
+def house_query(address_prefix='', year_from='', year_to=''):
+    query = {}
+    if address_prefix.strip():
+        query['address'] = prefix_condition(address_prefix.strip())
+    years = range_condition(parse_number(year_from, int), parse_number(year_to, int))
+    if years:
+        query['build_year'] = years
+    return query
+
+
+def premise_query(area_from='', area_to=''):
+    query = {}
+    area = range_condition(parse_number(area_from), parse_number(area_to))
+    if area:
+        query['area'] = area
+    return query
+
+
+def owner_query(last_name_prefix='', status='', share_from='', share_to=''):
+    query = {}
+    if last_name_prefix.strip():
+        query['last_name'] = prefix_condition(last_name_prefix.strip())
+    if status:
+        query['status'] = status
+    share = range_condition(parse_number(share_from), parse_number(share_to))
+    if share:
+        query['ownership_share'] = share
+    return query
@@ -0,0 +1,229 @@
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import pandas as pd
+
+from chunked_reader import DEFAULT_CHUNK_SIZE, default_engine, iter_chunks
+from metrics import metrics
+from pdf_reader import PARSE_WARNINGS, read_pdf_chunks
+from process_pool import default_workers, process_pool
+from statement_store import (DEFAULT_BATCH_SIZE, DEFAULT_LOAD_LIMIT, StatementDeduplicator,
+                             StoreReport, source_name, store_frame)
+from statements import normalize_statement, parse_dates
+from validation import normalize_register
+
+
+SUPPORTED_EXTENSIONS = {
+    'vtb': ('.xlsx', '.xlsm', '.xls', '.csv'),
+    'statement': ('.xlsx', '.xlsm', '.xls', '.csv', '.pdf'),
+}
+
+NORMALIZERS = {
+    'vtb': normalize_register,
+    'statement': normalize_statement,
+}
+
+# Как часто parse_files проверяет отмену, пока файлы ещё разбираются (с)
+CANCEL_POLL_INTERVAL = 0.2
+
+
+class FileStatus:
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.warnings = []
+        self.first_date = None
+        self.error = None
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def line(self):
+        name = os.path.basename(self.file_name)
+        if self.error is not None:
+            return f"{name}: ошибка — {self.error}"
+        line = (f"{name}: строк {self.rows}, добавлено {self.inserted}, "
+                f"обновлено {self.updated}, пропущено {self.skipped} "
+                f"({self.elapsed:.1f} с)")
+        if self.warnings:
+            line += f"; пропущено при разборе: {len(self.warnings)}"
+            line += "".join(f"\n  {message}" for message in self.warnings)
+        return line
+
+
+def collect_files(paths, kind):
+    """Раскрывает папки в список поддерживаемых файлов (без вложенных папок)."""
+    extensions = SUPPORTED_EXTENSIONS[kind]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.listdir(path))
+            files.extend(os.path.join(path, name) for name in names
+                         if name.lower().endswith(extensions)
+                         and os.path.isfile(os.path.join(path, name)))
+        elif path.lower().endswith(extensions):
+            files.append(path)
+    return files
+
+
+def file_chunks(file_name):
+    if default_engine(file_name) == 'pdf':
+        # Файлы и так разбираются параллельно, вложенный пул не нужен
+        return read_pdf_chunks(file_name, DEFAULT_CHUNK_SIZE, workers=1)
+    return iter_chunks(file_name)
+
+
+def parse_file(file_name, kind, spool_dir):
+    """Читает и нормализует один файл порциями в рабочем процессе.
+
+    Порции по очереди сохраняются во временный файл в spool_dir, в главный
+    процесс возвращается только сводка: (путь к порциям, строк, первая дата
+    операции, время разбора, сообщения о пропущенных строках). Так ни один
+    файл не держится в памяти целиком ни в рабочем, ни в главном процессе.
+    """
+    started = time.perf_counter()
+    warnings = []
+    rows = 0
+    first_date = None
+    handle, spool = tempfile.mkstemp(suffix='.chunks', dir=spool_dir)
+    with os.fdopen(handle, 'wb') as output:
+        for chunk in file_chunks(file_name):
+            warnings.extend(chunk.attrs.get(PARSE_WARNINGS, []))
+            if not len(chunk):
+                continue
+            frame = NORMALIZERS[kind](chunk)
+            # Номера строк файла нужны store_frame для строк без ID
+            frame.index = chunk.index
+            dates = parse_dates(frame["Дата операции"]).dropna()
+            if len(dates) and (first_date is None or dates.min() < first_date):
+                first_date = dates.min()
+            pickle.dump(frame, output, protocol=pickle.HIGHEST_PROTOCOL)
+            rows += len(frame)
+    return spool, rows, first_date, time.perf_counter() - started, warnings
+
+
+def spooled_chunks(spool):
+    with open(spool, 'rb') as source:
+        while True:
+            try:
+                yield pickle.load(source)
+            except EOFError:
+                return
+
+
+def parse_files(files, kind, spool_dir, workers=None, progress=None, is_cancelled=None):
+    """Разбирает файлы в пуле процессов.
+
+    Возвращает статусы в порядке files и словарь имя файла -> путь к
+    порциям (см. parse_file) для успешно прочитанных файлов. progress(rows)
+    вызывается по мере готовности файлов.
+    """
+    statuses = {file_name: FileStatus(file_name) for file_name in files}
+    spools = {}
+    if not files:
+        return [], spools
+
+    rows = 0
+    workers = min(workers or default_workers(), len(files))
+    executor = process_pool(workers)
+    cancelled = False
+    try:
+        futures = {executor.submit(parse_file, file_name, kind, spool_dir): file_name
+                   for file_name in files}
+        pending = set(futures)
+        while pending:
+            # Таймаут нужен, чтобы отмена не ждала окончания разбора текущих файлов
+            done, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL,
+                                 return_when=FIRST_COMPLETED)
+            if is_cancelled is not None and is_cancelled():
+                cancelled = True
+                break
+            for future in done:
+                status = statuses[futures[future]]
+                try:
+                    (spool, status.rows, status.first_date, status.elapsed,
+                     status.warnings) = future.result()
+                except Exception as e:
+                    status.error = str(e)
+                    continue
+                spools[status.file_name] = spool
+                rows += status.rows
+                if progress is not None:
+                    progress(rows)
+    finally:
+        # При отмене не ждём разбираемые файлы: их результаты уже не нужны
+        executor.shutdown(wait=not cancelled, cancel_futures=cancelled)
+    return [statuses[file_name] for file_name in files], spools
+
+
+def date_order(statuses):
+    """Успешные файлы по дате первой операции; файлы без дат — в конце."""
+    ok = [status for status in statuses if status.ok]
+    return sorted(ok, key=lambda status: (status.first_date is None,
+                                          status.first_date or pd.Timestamp.min,
+                                          status.file_name))
+
+
+def merge_by_date(frames):
+    """Объединяет таблицы файлов и упорядочивает строки по дате операции."""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, ignore_index=True)
+    order = parse_dates(merged["Дата операции"]).sort_values(kind='stable',
+                                                              na_position='last').index
+    return merged.loc[order].reset_index(drop=True)
+
+
+def import_files(db, kind, files, workers=None, batch_size=DEFAULT_BATCH_SIZE, progress=None,
+                 is_cancelled=None, check_cancelled=None, preview_rows=DEFAULT_LOAD_LIMIT):
+    """Пакетный импорт: разбор в пуле процессов, запись в базу по очереди.
+
+    Файлы пишутся в порядке дат порциями, через те же функции, что и при
+    импорте одного файла. Для показа остаются только первые preview_rows
+    строк; остальное читается из базы. Возвращает (первые строки,
+    упорядоченные по дате, статусы файлов). is_cancelled() останавливает
+    разбор, check_cancelled() прерывает импорт исключением.
+    """
+    preview = []
+    previewed = 0
+    # Рабочие процессы, брошенные при отмене, могут ещё писать в папку
+    with tempfile.TemporaryDirectory(prefix='registry-import-',
+                                     ignore_cleanup_errors=True) as spool_dir:
+        with metrics.span('import.parse_files'):
+            statuses, spools = parse_files(files, kind, spool_dir, workers, progress,
+                                           is_cancelled)
+        if check_cancelled is not None:
+            check_cancelled()
+        for status in date_order(statuses):
+            report = StoreReport()
+            deduplicator = StatementDeduplicator(db.statements) if kind == 'statement' else None
+            source = source_name(status.file_name)
+            for chunk in spooled_chunks(spools[status.file_name]):
+                if check_cancelled is not None:
+                    check_cancelled()
+                store_frame(db, kind, chunk, source, report, batch_size, deduplicator)
+                if previewed < preview_rows:
+                    part = chunk.iloc[:preview_rows - previewed]
+                    preview.append(part)
+                    previewed += len(part)
+            status.inserted = report.inserted
+            status.updated = report.updated
+            status.skipped = report.skipped
+            if report.failures:
+                status.error = f"не сохранено в базу строк: {len(report.failures)}"
+    return merge_by_date(preview), statuses
+
+
+def batch_summary(statuses):
+    failed = sum(not status.ok for status in statuses)
+    head = f"Файлов: {len(statuses)}, с ошибками: {failed}"
+    return head, "\n".join(status.line() for status in statuses)
@@ -0,0 +1,48 @@
+import bson
+
+from registry_cache import registry_cache
+
+
+def documents_nbytes(entry):
+    premises, owners = entry
+    return sum(len(bson.encode(document)) for document in premises + owners)
+
+
+class HouseDetailCache:
+    """Помещения и владельцы недавно выбранных домов в общем registry_cache.
+
+    Запись о доме меняется только при изменении его помещений или владельцев,
+    поэтому сбрасывается явно через invalidate(house_id), а не любой
+    записью в коллекции.
+    """
+
+    def __init__(self, db, cache=None):
+        self.db = db
+        self.cache = cache if cache is not None else registry_cache
+
+    def key(self, house_id):
+        return ('house_details', self.db.name, house_id)
+
+    def get(self, house_id):
+        return self.cache.get_or_load(self.key(house_id), lambda: self.load(house_id),
+                                      documents_nbytes)
+
+    def load(self, house_id):
+        # Помещения дома по индексу house_id, владельцы — через $lookup по premise_id
+        premises = list(self.db.premises.aggregate([
+            {'$match': {'house_id': house_id}},
+            {'$sort': {'number': 1}},
+            {'$lookup': {
+                'from': 'owners',
+                'localField': '_id',
+                'foreignField': 'premise_id',
+                'as': 'owners',
+            }},
+        ]))
+        owners = []
+        for premise in premises:
+            owners.extend(premise.pop('owners'))
+        return premises, owners
+
+    def invalidate(self, house_id):
+        self.cache.invalidate_key(self.key(house_id))
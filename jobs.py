@@ -0,0 +1,118 @@
+import threading
+import time
+
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtWidgets import QProgressDialog
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobSignals(QObject):
+    progress = pyqtSignal(int, float)  # строк обработано, строк в секунду
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class Job(QRunnable):
+    """Фоновая задача для QThreadPool.
+
+    fn вызывается в рабочем потоке как fn(job) и должна периодически
+    вызывать job.report_progress(rows) — там же проверяется отмена.
+    Результат и ошибки передаются в GUI-поток через сигналы.
+    """
+
+    def __init__(self, fn):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.signals = JobSignals()
+        self._cancel_event = threading.Event()
+        self._started = time.perf_counter()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def report_progress(self, rows):
+        self.check_cancelled()
+        elapsed = time.perf_counter() - self._started
+        self.signals.progress.emit(rows, rows / elapsed if elapsed > 0 else 0.0)
+
+    def run(self):
+        self._started = time.perf_counter()
+        try:
+            result = self.fn(self)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+
+
+class JobProgressDialog(QProgressDialog):
+    def __init__(self, title, total=0, parent=None):
+        super().__init__(title, "Cancel", 0, total, parent)
+        self.setWindowTitle(title)
+        self.setWindowModality(Qt.WindowModality.WindowModal)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.title = title
+
+    def update_progress(self, rows, rows_per_second):
+        if self.maximum() > 0:
+            self.setValue(min(rows, self.maximum()))
+        self.setLabelText(f"{self.title}\n{rows} rows, {rows_per_second:.0f} rows/s")
+
+
+# Ссылки на запущенные задачи, чтобы их не собрал сборщик мусора
+_running_jobs = set()
+
+
+def start_job(parent, title, fn, on_finished, on_failed=None, on_cancelled=None, total=0):
+    job = Job(fn)
+    dialog = JobProgressDialog(title, total, parent)
+    dialog.canceled.connect(job.cancel)
+    job.signals.progress.connect(dialog.update_progress)
+
+    def done():
+        _running_jobs.discard(job)
+        dialog.canceled.disconnect(job.cancel)
+        # Диалог создаётся на каждую задачу: удаляем его, а не копим в окне
+        dialog.close()
+        dialog.deleteLater()
+
+    def finished(result):
+        done()
+        on_finished(result)
+
+    def failed(message):
+        done()
+        if on_failed is not None:
+            on_failed(message)
+
+    def cancelled():
+        done()
+        if on_cancelled is not None:
+            on_cancelled()
+
+    job.signals.finished.connect(finished)
+    job.signals.failed.connect(failed)
+    job.signals.cancelled.connect(cancelled)
+
+    _running_jobs.add(job)
+    dialog.show()
+    QThreadPool.globalInstance().start(job)
+    return job
@@ -1,27 +1,34 @@
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                            QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
-                            QDialog, QLineEdit, QLabel, QMessageBox, QFileDialog)
+                            QHBoxLayout, QPushButton, QDialog, QLineEdit, QLabel,
+                            QMessageBox, QFileDialog)
 from PyQt6.QtCore import Qt, QEvent
 from PyQt6.QtGui import QIntValidator, QShortcut, QKeySequence, QCloseEvent
-import pandas as pd
-from pymongo import MongoClient
 from datetime import datetime
 from bson import ObjectId
-
-class MainWindow(QMainWindow):
+# pandas и зависящие от него модули импортируются в обработчиках при первом
+# использовании, чтобы окно появлялось без ожидания их загрузки
+from jobs import start_job
+from registry_tabs import RegistryTablesMixin
+from repository import Repository, RepositoryUnavailable
+from startup import defer_first_load
+
+class MainWindow(RegistryTablesMixin, QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Real Estate Registry")
         self.setGeometry(100, 100, 1200, 800)
 
         # MongoDB connection
+        # open() не обращается к серверу: ping выполняется фоновой задачей
+        # первой загрузки, и недоступная база обнаруживается за
+        # serverSelectionTimeoutMS без зависания окна
         try:
-            self.client = MongoClient('mongodb://localhost:27017/')
-            self.db = self.client['real_estate_registry']
-        except Exception as e:
-            QMessageBox.critical(self, "Database Error", f"Cannot connect to MongoDB: {str(e)}")
+            self.repository = Repository().open()
+        except RepositoryUnavailable as e:
+            QMessageBox.critical(self, "Database Error", str(e))
             sys.exit(1)
+        self.db = self.repository.db
 
         # Создаем центральный виджет
         self.central_widget = QWidget()
@@ -30,6 +37,9 @@ class MainWindow(QMainWindow):
         # Создаем главный layout
         self.main_layout = QVBoxLayout(self.central_widget)
 
+        # Модели и таблицы реестра
+        self.create_registry_tables()
+
         # Создаем и добавляем кнопки
         self.create_buttons()
 
@@ -40,8 +50,8 @@ class MainWindow(QMainWindow):
         exit_shortcut = QShortcut(QKeySequence('Ctrl+Q'), self)
         exit_shortcut.activated.connect(self.exit_application)
 
-        # Загружаем начальные данные
-        self.update_tables()
+        # Начальные данные загружаются после первой отрисовки окна
+        defer_first_load(self, self.load_initial_data)
 
     def create_buttons(self):
         # Создаем контейнер для кнопок
@@ -110,7 +120,7 @@ class MainWindow(QMainWindow):
         import_button.clicked.connect(self.import_from_xls)
         add_house_button.clicked.connect(self.add_house)
         add_owner_button.clicked.connect(self.add_owner)
-        refresh_button.clicked.connect(self.update_tables)
+        refresh_button.clicked.connect(self.reload_data)
         exit_button.clicked.connect(self.exit_application)
 
         # Добавляем кнопки в layout
@@ -118,6 +128,7 @@ class MainWindow(QMainWindow):
         button_layout.addWidget(add_house_button)
         button_layout.addWidget(add_owner_button)
         button_layout.addWidget(refresh_button)
+        button_layout.addWidget(self.detail_mode_checkbox)
         button_layout.addStretch()
         button_layout.addWidget(exit_button)
 
@@ -128,34 +139,24 @@ class MainWindow(QMainWindow):
         # Houses table
         houses_label = QLabel("Houses:")
         houses_label.setStyleSheet("font-size: 14px; font-weight: bold; margin-top: 10px;")
-        self.houses_table = QTableWidget()
-        self.houses_table.setColumnCount(3)
-        self.houses_table.setHorizontalHeaderLabels(["ID", "Address", "Build Year"])
-        self.houses_table.horizontalHeader().setStretchLastSection(True)
 
         # Premises table
         premises_label = QLabel("Premises:")
         premises_label.setStyleSheet("font-size: 14px; font-weight: bold; margin-top: 10px;")
-        self.premises_table = QTableWidget()
-        self.premises_table.setColumnCount(4)
-        self.premises_table.setHorizontalHeaderLabels(["ID", "House ID", "Number", "Area"])
-        self.premises_table.horizontalHeader().setStretchLastSection(True)
 
         # Owners table
         owners_label = QLabel("Owners:")
         owners_label.setStyleSheet("font-size: 14px; font-weight: bold; margin-top: 10px;")
-        self.owners_table = QTableWidget()
-        self.owners_table.setColumnCount(6)
-        self.owners_table.setHorizontalHeaderLabels(
-            ["ID", "First Name", "Last Name", "Document", "Share", "Status"])
-        self.owners_table.horizontalHeader().setStretchLastSection(True)
 
         # Add tables to layout
         self.main_layout.addWidget(houses_label)
+        self.main_layout.addWidget(self.houses_filter)
         self.main_layout.addWidget(self.houses_table)
         self.main_layout.addWidget(premises_label)
+        self.main_layout.addWidget(self.premises_filter)
         self.main_layout.addWidget(self.premises_table)
         self.main_layout.addWidget(owners_label)
+        self.main_layout.addWidget(self.owners_filter)
         self.main_layout.addWidget(self.owners_table)
 
     def import_from_xls(self):
@@ -163,80 +164,35 @@ class MainWindow(QMainWindow):
             self, "Open Excel File", "", "Excel Files (*.xlsx *.xls)")
 
         if file_name:
-            try:
-                df = pd.read_excel(file_name)
+            def run_import(job):
+                from bulk_import import import_houses_file
 
-                for _, row in df.iterrows():
-                    house_data = {
-                        'address': str(row['address']),
-                        'build_year': int(row['build_year'])
-                    }
+                return import_houses_file(self.db, file_name, progress=job.report_progress)
 
-                    house_id = self.db.houses.insert_one(house_data).inserted_id
+            start_job(self, "Importing houses", run_import,
+                      on_finished=self.house_import_finished,
+                      on_failed=self.house_import_failed,
+                      on_cancelled=self.update_tables)
 
-                    if 'premises' in row:
-                        for premise in str(row['premises']).split(';'):
-                            premise_data = {
-                                'house_id': house_id,
-                                'number': premise.strip(),
-                                'area': float(row.get('area', 0))
-                            }
-                            self.db.premises.insert_one(premise_data)
-
-                self.update_tables()
-                QMessageBox.information(self, "Success", "Data imported successfully")
+    def house_import_finished(self, report):
+        self.update_tables()
+        if report.failures:
+            QMessageBox.warning(self, "Import finished with errors", report.summary())
+        else:
+            QMessageBox.information(self, "Success", report.summary())
 
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Import failed: {str(e)}")
+    def house_import_failed(self, message):
+        self.update_tables()
+        QMessageBox.critical(self, "Error", f"Import failed: {message}")
 
     def add_house(self):
         # Реализация добавления дома
         pass
 
-    def add_owner(self):
-        # Реализация добавления владельца
-        pass
-
-    def update_tables(self):
-        try:
-            # Update Houses Table
-            self.houses_table.setRowCount(0)
-            for house in self.db.houses.find():
-                row = self.houses_table.rowCount()
-                self.houses_table.insertRow(row)
-                self.houses_table.setItem(row, 0, QTableWidgetItem(str(house['_id'])))
-                self.houses_table.setItem(row, 1, QTableWidgetItem(house['address']))
-                self.houses_table.setItem(row, 2, QTableWidgetItem(str(house['build_year'])))
-
-            # Update Premises Table
-            self.premises_table.setRowCount(0)
-            for premise in self.db.premises.find():
-                row = self.premises_table.rowCount()
-                self.premises_table.insertRow(row)
-                self.premises_table.setItem(row, 0, QTableWidgetItem(str(premise['_id'])))
-                self.premises_table.setItem(row, 1, QTableWidgetItem(str(premise['house_id'])))
-                self.premises_table.setItem(row, 2, QTableWidgetItem(premise['number']))
-                self.premises_table.setItem(row, 3, QTableWidgetItem(str(premise['area'])))
-
-            # Update Owners Table
-            self.owners_table.setRowCount(0)
-            for owner in self.db.owners.find():
-                row = self.owners_table.rowCount()
-                self.owners_table.insertRow(row)
-                self.owners_table.setItem(row, 0, QTableWidgetItem(str(owner['_id'])))
-                self.owners_table.setItem(row, 1, QTableWidgetItem(owner['first_name']))
-                self.owners_table.setItem(row, 2, QTableWidgetItem(owner['last_name']))
-                self.owners_table.setItem(row, 3, QTableWidgetItem(owner['document']['number']))
-                self.owners_table.setItem(row, 4, QTableWidgetItem(str(owner['ownership_share'])))
-                self.owners_table.setItem(row, 5, QTableWidgetItem(owner['status']))
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to update tables: {str(e)}")
-
     def closeEvent(self, a0: QCloseEvent | None) -> None:
         if a0 is not None:
             if self.confirm_exit():
-                self.client.close()
+                self.repository.close()
                 a0.accept()
             else:
                 a0.ignore()
@@ -251,7 +207,7 @@ class MainWindow(QMainWindow):
 
     def exit_application(self) -> None:
         if self.confirm_exit():
-            self.client.close()
+            self.repository.close()
             QApplication.quit()
 
 def main():
@@ -1,28 +1,132 @@
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                            QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
-                            QDialog, QLineEdit, QLabel, QMessageBox, QFileDialog,
-                            QTabWidget)
-from PyQt6.QtCore import Qt, QEvent
-from PyQt6.QtGui import QIntValidator, QShortcut, QKeySequence, QCloseEvent
-import pandas as pd
-from pymongo import MongoClient
+                            QHBoxLayout, QPushButton,
+                            QTableView, QAbstractItemView, QDialog, QLineEdit, QLabel,
+                            QMessageBox, QFileDialog, QTabWidget, QComboBox, QInputDialog)
+from PyQt6.QtCore import Qt, QEvent, QTimer, QSortFilterProxyModel, pyqtSignal
+from PyQt6.QtGui import (QIntValidator, QShortcut, QKeySequence, QCloseEvent, QTextDocument,
+                         QPdfWriter, QPageSize)
 from datetime import datetime
 from bson import ObjectId
-
-class MainWindow(QMainWindow):
+# pandas и зависящие от него модули импортируются в обработчиках при первом
+# использовании, чтобы окно появлялось без ожидания их загрузки
+from columns import ERROR_COLUMNS, STATEMENT_HEADERS, VTB_HEADERS
+from filter_bar import FilterBar
+from filters import STORED_FILTER_FIELDS
+from jobs import start_job
+from metrics import metrics
+from ownership_view import InconsistentPremisesDialog, OwnershipHistoryView
+from perf_panel import exporter_from_env, install_perf_panel
+from registry_tabs import RegistryTablesMixin
+from repository import Repository, RepositoryUnavailable
+from startup import defer_first_load
+from table_models import FrameTableModel
+
+# Области поиска по выписке: подпись -> позиции колонок (None — все колонки)
+STATEMENT_SEARCH_FIELDS = [
+    ("Все поля", None),
+    ("ФИО", [STATEMENT_HEADERS.index("ФИО")]),
+    ("Номер счета", [STATEMENT_HEADERS.index("Номер счета")]),
+]
+
+
+class ValidationErrorsDialog(QDialog):
+    # Номер строки регистра (с нуля), к которой нужно перейти
+    row_activated = pyqtSignal(int)
+
+    def __init__(self, errors, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Результаты проверки")
+        self.resize(700, 400)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Найдено ошибок: {len(errors)}. "
+                                "Двойной щелчок — переход к строке регистра."))
+
+        self.errors_model = FrameTableModel(ERROR_COLUMNS, self)
+        self.errors_model.set_frame(errors)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.errors_model)
+        self.proxy.setSortRole(Qt.ItemDataRole.UserRole)
+
+        self.errors_table = QTableView()
+        self.errors_table.setModel(self.proxy)
+        self.errors_table.setSortingEnabled(True)
+        self.errors_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.errors_table.horizontalHeader().setStretchLastSection(True)
+        self.errors_table.doubleClicked.connect(self.activate_row)
+        layout.addWidget(self.errors_table)
+
+    def activate_row(self, index):
+        source = self.proxy.mapToSource(index)
+        line = self.errors_model.frame.iat[source.row(), ERROR_COLUMNS.index("Строка")]
+        self.row_activated.emit(int(line) - 1)
+
+
+class ReconciliationDialog(QDialog):
+    # Номер строки выписки (с нуля), к которой нужно перейти
+    row_activated = pyqtSignal(int)
+
+    def __init__(self, result, parent=None):
+        super().__init__(parent)
+        from reconcile import AMBIGUOUS, MATCHED, RESULT_COLUMNS, UNMATCHED, summary
+
+        self.setWindowTitle("Сопоставление платежей")
+        self.resize(1000, 500)
+        layout = QVBoxLayout(self)
+
+        tools_layout = QHBoxLayout()
+        tools_layout.addWidget(QLabel(f"{summary(result)}. "
+                                      "Двойной щелчок — переход к строке выписки."))
+        self.status_filter = QComboBox()
+        self.status_filter.addItem("Все", "")
+        for status in (MATCHED, AMBIGUOUS, UNMATCHED):
+            self.status_filter.addItem(status, status)
+        self.status_filter.currentIndexChanged.connect(self.filter_status)
+        tools_layout.addWidget(self.status_filter)
+        layout.addLayout(tools_layout)
+
+        self.result_model = FrameTableModel(RESULT_COLUMNS, self)
+        self.result_model.set_frame(result)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.result_model)
+        self.proxy.setSortRole(Qt.ItemDataRole.UserRole)
+        self.proxy.setFilterKeyColumn(RESULT_COLUMNS.index("Результат"))
+        self.line_column = RESULT_COLUMNS.index("Строка")
+
+        self.result_table = QTableView()
+        self.result_table.setModel(self.proxy)
+        self.result_table.setSortingEnabled(True)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.result_table.horizontalHeader().setStretchLastSection(True)
+        self.result_table.doubleClicked.connect(self.activate_row)
+        layout.addWidget(self.result_table)
+
+    def filter_status(self):
+        status = self.status_filter.currentData()
+        self.proxy.setFilterFixedString(status)
+
+    def activate_row(self, index):
+        source = self.proxy.mapToSource(index)
+        line = self.result_model.frame.iat[source.row(), self.line_column]
+        self.row_activated.emit(int(line) - 1)
+
+
+class MainWindow(RegistryTablesMixin, QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Real Estate Registry")
         self.setGeometry(100, 100, 1200, 800)
 
         # MongoDB connection
+        # open() не обращается к серверу: ping выполняется фоновой задачей
+        # первой загрузки, и недоступная база обнаруживается за
+        # serverSelectionTimeoutMS без зависания окна
         try:
-            self.client = MongoClient('mongodb://localhost:27017/')
-            self.db = self.client['real_estate_registry']
-        except Exception as e:
-            QMessageBox.critical(self, "Database Error", f"Cannot connect to MongoDB: {str(e)}")
+            self.repository = Repository().open()
+        except RepositoryUnavailable as e:
+            QMessageBox.critical(self, "Database Error", str(e))
             sys.exit(1)
+        self.db = self.repository.db
 
         # Создаем центральный виджет
         self.central_widget = QWidget()
@@ -31,18 +135,32 @@ class MainWindow(QMainWindow):
         # Создаем главный layout
         self.main_layout = QVBoxLayout(self.central_widget)
 
+        # Модели и таблицы реестра
+        self.create_registry_tables()
+
         # Создаем и добавляем кнопки
         self.create_buttons()
 
+        # Загруженные регистр ВТБ и выписка
+        self.vtb_frame = None
+        self.statement_frame = None
+        self.statement_index = None
+        self.statement_hash = None
+
         # Создаем вкладки
         self.create_tabs()
 
+        # Панель производительности и периодический экспорт метрик
+        # (REGISTRY_METRICS_FILE), как в main.py
+        self.perf_panel = install_perf_panel(self, self.perf_button)
+        self.metrics_exporter = exporter_from_env(self)
+
         # Добавляем горячую клавишу
         exit_shortcut = QShortcut(QKeySequence('Ctrl+Q'), self)
         exit_shortcut.activated.connect(self.exit_application)
 
-        # Загружаем начальные данные
-        self.update_tables()
+        # Начальные данные загружаются после первой отрисовки окна
+        defer_first_load(self, self.load_initial_data)
 
         # Настраиваем обработчик поиска
         self.setup_search_handler()
@@ -58,12 +176,15 @@ class MainWindow(QMainWindow):
         add_house_button = QPushButton("Add House")
         add_owner_button = QPushButton("Add Owner")
         refresh_button = QPushButton("Refresh Data")
+        shares_button = QPushButton("Check Shares")
+        self.perf_button = QPushButton("Performance")
+        self.perf_button.setCheckable(True)
         exit_button = QPushButton("Exit")
 
         # Устанавливаем минимальную ширину для кнопок
         min_button_width = 120
         for button in [import_button, add_house_button, add_owner_button,
-                      refresh_button, exit_button]:
+                      refresh_button, shares_button, self.perf_button, exit_button]:
             button.setMinimumWidth(min_button_width)
 
         # Стилизуем кнопки
@@ -102,7 +223,8 @@ class MainWindow(QMainWindow):
         """
 
         # Применяем стили
-        for button in [import_button, add_house_button, add_owner_button, refresh_button]:
+        for button in [import_button, add_house_button, add_owner_button, refresh_button,
+                       shares_button, self.perf_button]:
             button.setStyleSheet(button_style)
         exit_button.setStyleSheet(exit_button_style)
 
@@ -110,7 +232,8 @@ class MainWindow(QMainWindow):
         import_button.clicked.connect(self.import_from_xls)
         add_house_button.clicked.connect(self.add_house)
         add_owner_button.clicked.connect(self.add_owner)
-        refresh_button.clicked.connect(self.update_tables)
+        refresh_button.clicked.connect(self.reload_data)
+        shares_button.clicked.connect(self.show_inconsistent_premises)
         exit_button.clicked.connect(self.exit_application)
 
         # Добавляем кнопки в layout
@@ -118,6 +241,9 @@ class MainWindow(QMainWindow):
         button_layout.addWidget(add_house_button)
         button_layout.addWidget(add_owner_button)
         button_layout.addWidget(refresh_button)
+        button_layout.addWidget(shares_button)
+        button_layout.addWidget(self.perf_button)
+        button_layout.addWidget(self.detail_mode_checkbox)
         button_layout.addStretch()
         button_layout.addWidget(exit_button)
 
@@ -148,6 +274,8 @@ class MainWindow(QMainWindow):
         import_vtb_button = QPushButton("Импорт из ВТБ")
         export_vtb_button = QPushButton("Экспорт в ВТБ")
         check_vtb_button = QPushButton("Проверка данных")
+        batch_vtb_button = QPushButton("Пакетный импорт")
+        folder_vtb_button = QPushButton("Импорт папки")
 
                 # Стиль для кнопок ВТБ
         vtb_button_style = """
@@ -172,8 +300,11 @@ class MainWindow(QMainWindow):
 
                 # Кнопки для работы с выписками
         import_statement_button = QPushButton("Импорт выписки")
+        batch_statement_button = QPushButton("Пакетный импорт")
+        folder_statement_button = QPushButton("Импорт папки")
         process_statement_button = QPushButton("Обработать выписку")
         generate_report_button = QPushButton("Сформировать отчет")
+        export_statement_button = QPushButton("Экспорт выписки")
         search_statement_button = QPushButton("Поиск")
 
                 # Стиль для кнопок выписок
@@ -198,31 +329,44 @@ class MainWindow(QMainWindow):
         import_vtb_button.setStyleSheet(vtb_button_style)
         export_vtb_button.setStyleSheet(vtb_button_style)
         check_vtb_button.setStyleSheet(vtb_button_style)
+        batch_vtb_button.setStyleSheet(vtb_button_style)
+        folder_vtb_button.setStyleSheet(vtb_button_style)
 
-        for button in [import_statement_button, process_statement_button,
-                  generate_report_button, search_statement_button]:
+        for button in [import_statement_button, batch_statement_button,
+                  folder_statement_button, process_statement_button,
+                  generate_report_button, export_statement_button, search_statement_button]:
               button.setStyleSheet(statement_button_style)
 
                 # Подключаем сигналы
         import_vtb_button.clicked.connect(self.import_vtb_data)
         export_vtb_button.clicked.connect(self.export_vtb_data)
         check_vtb_button.clicked.connect(self.check_vtb_data)
+        batch_vtb_button.clicked.connect(lambda: self.batch_import_files('vtb'))
+        folder_vtb_button.clicked.connect(lambda: self.batch_import_folder('vtb'))
 
         import_statement_button.clicked.connect(self.import_statement)
+        batch_statement_button.clicked.connect(lambda: self.batch_import_files('statement'))
+        folder_statement_button.clicked.connect(lambda: self.batch_import_folder('statement'))
         process_statement_button.clicked.connect(self.process_statement)
         generate_report_button.clicked.connect(self.generate_statement_report)
+        export_statement_button.clicked.connect(self.export_statement)
         search_statement_button.clicked.connect(self.search_in_statements)
 
                 # Добавляем кнопки ВТБ в layout
         vtb_buttons_layout.addWidget(import_vtb_button)
+        vtb_buttons_layout.addWidget(batch_vtb_button)
+        vtb_buttons_layout.addWidget(folder_vtb_button)
         vtb_buttons_layout.addWidget(export_vtb_button)
         vtb_buttons_layout.addWidget(check_vtb_button)
         vtb_buttons_layout.addStretch()
 
                 # Добавляем кнопки выписок в layout
         statements_tools_layout.addWidget(import_statement_button)
+        statements_tools_layout.addWidget(batch_statement_button)
+        statements_tools_layout.addWidget(folder_statement_button)
         statements_tools_layout.addWidget(process_statement_button)
         statements_tools_layout.addWidget(generate_report_button)
+        statements_tools_layout.addWidget(export_statement_button)
         statements_tools_layout.addWidget(search_statement_button)
         statements_tools_layout.addStretch()
 
@@ -231,50 +375,54 @@ class MainWindow(QMainWindow):
         self.statement_search_input = QLineEdit()
         self.statement_search_input.setPlaceholderText("Поиск по ФИО или номеру счета...")
         self.statement_search_input.setMinimumWidth(300)
+        self.statement_search_field = QComboBox()
+        for label, columns in STATEMENT_SEARCH_FIELDS:
+            self.statement_search_field.addItem(label, columns)
         search_layout.addWidget(self.statement_search_input)
-        self.houses_table = QTableWidget()
-        self.houses_table.setColumnCount(3)
-        self.houses_table.setHorizontalHeaderLabels(["ID", "Address", "Build Year"])
-        self.houses_table.horizontalHeader().setStretchLastSection(True)
-
-        self.premises_table = QTableWidget()
-        self.premises_table.setColumnCount(4)
-        self.premises_table.setHorizontalHeaderLabels(["ID", "House ID", "Number", "Area"])
-        self.premises_table.horizontalHeader().setStretchLastSection(True)
-
-        self.owners_table = QTableWidget()
-        self.owners_table.setColumnCount(6)
-        self.owners_table.setHorizontalHeaderLabels(
-                    ["ID", "First Name", "Last Name", "Document", "Share", "Status"])
-        self.owners_table.horizontalHeader().setStretchLastSection(True)
+        search_layout.addWidget(self.statement_search_field)
+
+        # История владения выбранного владельца; clicked переживает смену модели таблицы
+        self.ownership_history = OwnershipHistoryView(self.repository)
+        self.owners_table.clicked.connect(self.show_ownership_history)
+        self.ownership_history.ownership_changed.connect(self.ownership_changed)
 
                         # Создаем таблицу ВТБ
-        self.vtb_table = QTableWidget()
-        self.vtb_table.setColumnCount(7)
-        self.vtb_table.setHorizontalHeaderLabels([
-                    "ID", "Номер счета", "ФИО владельца",
-                    "Дата операции", "Тип операции", "Сумма", "Статус"
-                    ])
+        self.vtb_model = FrameTableModel(VTB_HEADERS, self)
+        self.vtb_table = QTableView()
+        self.vtb_table.setModel(self.vtb_model)
+        self.vtb_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.vtb_table.horizontalHeader().setStretchLastSection(True)
 
                         # Создаем таблицу выписок
-        self.statements_table = QTableWidget()
-        self.statements_table.setColumnCount(8)
-        self.statements_table.setHorizontalHeaderLabels([
-                    "ID", "ФИО", "Номер счета", "Дата операции",
-                    "Тип операции", "Сумма", "Назначение платежа", "Статус"
-                    ])
+        self.statements_model = FrameTableModel(STATEMENT_HEADERS, self)
+        self.statements_table = QTableView()
+        self.statements_table.setModel(self.statements_model)
         self.statements_table.horizontalHeader().setStretchLastSection(True)
 
+                        # Панели загрузки сохранённых данных из MongoDB
+        self.vtb_store_filter = FilterBar(STORED_FILTER_FIELDS, apply_text="Загрузить из БД",
+                                          exportable=False)
+        self.vtb_store_filter.filter_changed.connect(self.load_stored_vtb)
+        self.statements_store_filter = FilterBar(STORED_FILTER_FIELDS,
+                                                 apply_text="Загрузить из БД",
+                                                 exportable=False)
+        self.statements_store_filter.filter_changed.connect(self.load_stored_statements)
+
                         # Добавляем таблицы на вкладки
+        houses_layout.addWidget(self.houses_filter)
         houses_layout.addWidget(self.houses_table)
+        premises_layout.addWidget(self.premises_filter)
         premises_layout.addWidget(self.premises_table)
-        owners_layout.addWidget(self.owners_table)
+        owners_layout.addWidget(self.owners_filter)
+        owners_layout.addWidget(self.owners_table, 3)
+        owners_layout.addWidget(self.ownership_history, 2)
         vtb_layout.addLayout(vtb_buttons_layout)
+        vtb_layout.addWidget(self.vtb_store_filter)
         vtb_layout.addWidget(self.vtb_table)
 
                         # Добавляем элементы на вкладку выписок
         vtb_statements_layout.addLayout(statements_tools_layout)
+        vtb_statements_layout.addWidget(self.statements_store_filter)
         vtb_statements_layout.addLayout(search_layout)
         vtb_statements_layout.addWidget(self.statements_table)
 
@@ -312,376 +460,549 @@ class MainWindow(QMainWindow):
         self.tab_widget.setStyleSheet(tab_style)
                         # Добавляем виджет вкладок в главный layout
         self.main_layout.addWidget(self.tab_widget)
-        def import_from_xls(self):
-            file_name, _ = QFileDialog.getOpenFileName(
-                self, "Open Excel File", "", "Excel Files (*.xlsx *.xls)")
-            if file_name:
-                try:
-                  df = pd.read_excel(file_name)
-
-                  for _, row in df.iterrows():
-                      house_data = {
-                          'address': str(row['address']),
-                          'build_year': int(row['build_year'])
-                      }
-
-                      house_id = self.db.houses.insert_one(house_data).inserted_id
-
-                      if 'premises' in row:
-                          for premise in str(row['premises']).split(';'):
-                              premise_data = {
-                                  'house_id': house_id,
-                                  'number': premise.strip(),
-                                  'area': float(row.get('area', 0))
-                              }
-                  self.db.premises.insert_one(premise_data)
-
-                  self.update_tables()
-                  QMessageBox.information(self, "Success", "Data imported successfully")
-
-                except Exception as e:
-                    QMessageBox.critical(self, "Error", f"Import failed: {str(e)}")
+
+    def import_from_xls(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, "Open Excel File", "", "Excel Files (*.xlsx *.xls)")
+
+        if file_name:
+            def run_import(job):
+                from bulk_import import import_houses_file
+
+                return import_houses_file(self.db, file_name, progress=job.report_progress)
+
+            start_job(self, "Importing houses", run_import,
+                      on_finished=self.house_import_finished,
+                      on_failed=self.house_import_failed,
+                      on_cancelled=self.update_tables)
+
+    def house_import_finished(self, report):
+        self.update_tables()
+        if report.failures:
+            QMessageBox.warning(self, "Import finished with errors", report.summary())
+        else:
+            QMessageBox.information(self, "Success", report.summary())
+
+    def house_import_failed(self, message):
+        self.update_tables()
+        QMessageBox.critical(self, "Error", f"Import failed: {message}")
+
+    def add_house(self):
+        # Реализация добавления дома
+        pass
 
     def import_vtb_data(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self,
+            "Выберите файл регистра ВТБ",
+            "",
+            "Excel Files (*.xlsx *.xls);;CSV Files (*.csv)"
+        )
+
+        if file_name:
+            start_job(self, "Импорт регистра ВТБ",
+                      lambda job: self.read_vtb_file(job, self.db, file_name),
+                      on_finished=self.vtb_import_finished,
+                      on_failed=lambda message: QMessageBox.critical(
+                          self,
+                          "Ошибка",
+                          f"Ошибка при импорте данных ВТБ: {message}"
+                      ))
+
+    def vtb_import_finished(self, result):
+        df, report = result
+        self.show_vtb_frame(df)
+        self.show_store_report("Данные из регистра ВТБ успешно импортированы", report,
+                               len(df))
+
+    def show_vtb_frame(self, df):
+        with metrics.span('ui.vtb_table'):
+            self.vtb_frame = df.reset_index(drop=True)
+            self.vtb_model.set_frame(self.vtb_frame)
+
+    def show_store_report(self, title, report, shown=None):
+        if shown is not None and shown < report.rows:
+            # import_file оставляет для показа только первые строки файла
+            title += (f"\nПоказаны первые {shown} строк, остальные загружаются "
+                      f"из базы через фильтр")
+        if report.failures:
+            QMessageBox.warning(self, "Предупреждение",
+                                f"{title}, но часть строк не сохранена в базу\n\n"
+                                f"{report.summary()}")
+        else:
+            QMessageBox.information(self, "Успех", f"{title}\n\n{report.summary()}")
+
+    def import_statement(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self,
+            "Выберите файл выписки",
+            "",
+            "Excel Files (*.xlsx *.xls);;CSV Files (*.csv);;PDF Files (*.pdf)"
+        )
+
+        if not file_name:
+            return
+
+        start_job(self, "Импорт выписки",
+                  lambda job: self.read_statement_file(job, self.db, file_name),
+                  on_finished=self.statement_import_finished,
+                  on_failed=lambda message: QMessageBox.critical(
+                      self,
+                      "Ошибка",
+                      f"Ошибка при импорте выписки: {message}"
+                  ))
+
+    def statement_import_finished(self, result):
+        prepared, report = result
+        self.show_statement_frame(prepared)
+        self.show_store_report("Выписка успешно импортирована", report, len(prepared[0]))
+
+    def show_statement_frame(self, prepared):
+        self.statement_frame, self.statement_index, self.statement_hash = prepared
+        with metrics.span('ui.statements_table'):
+            self.statements_model.set_frame(self.statement_frame)
+        self.search_in_statements()
+
+    @staticmethod
+    def read_vtb_file(job, db, file_name):
+        # Выполняется в рабочем потоке: каждая порция файла сразу пишется
+        # в MongoDB пакетными upsert, для таблицы остаются первые строки
+        from statement_store import import_file
+
+        with metrics.action('import_vtb'):
+            return import_file(db, 'vtb', file_name, progress=job.report_progress,
+                               check_cancelled=job.check_cancelled)
+
+    @staticmethod
+    def read_statement_file(job, db, file_name):
+        from statement_store import import_file
+
+        with metrics.action('import_statement'):
+            df, report = import_file(db, 'statement', file_name, progress=job.report_progress,
+                                     check_cancelled=job.check_cancelled)
+            job.check_cancelled()
+            return MainWindow.prepare_statement(df), report
+
+    @staticmethod
+    def prepare_statement(df):
+        # Поисковый индекс строится один раз, в том же рабочем потоке;
+        # хэш содержимого — ключ кэша отчётов по этой выписке
+        from reports import content_hash
+        from search_index import FrameSearchIndex
+
+        with metrics.span('search.build_index'):
+            index = FrameSearchIndex(df)
+        return df, index, content_hash(df)
+
+    def batch_import_files(self, kind):
+        file_filter = "Excel Files (*.xlsx *.xls);;CSV Files (*.csv)"
+        if kind == 'statement':
+            file_filter += ";;PDF Files (*.pdf)"
+        file_names, _ = QFileDialog.getOpenFileNames(self, "Выберите файлы", "", file_filter)
+        if file_names:
+            self.start_batch_import(kind, file_names)
+
+    def batch_import_folder(self, kind):
+        directory = QFileDialog.getExistingDirectory(self, "Выберите папку с файлами")
+        if directory:
+            self.start_batch_import(kind, [directory])
+
+    def start_batch_import(self, kind, paths):
+        from folder_import import collect_files
+
+        files = collect_files(paths, kind)
+        if not files:
+            QMessageBox.warning(self, "Предупреждение", "Подходящие файлы не найдены")
+            return
+        title = "Пакетный импорт регистров ВТБ" if kind == 'vtb' else "Пакетный импорт выписок"
+        on_finished = (self.vtb_batch_finished if kind == 'vtb'
+                       else self.statement_batch_finished)
+        start_job(self, title,
+                  lambda job: self.run_batch_import(job, self.db, kind, files),
+                  on_finished=on_finished,
+                  on_failed=lambda message: QMessageBox.critical(
+                      self, "Ошибка", f"Ошибка пакетного импорта: {message}"))
+
+    @staticmethod
+    def run_batch_import(job, db, kind, files):
+        # Файлы разбираются параллельно в процессах, а пишутся в базу по очереди
+        # в порядке дат, через те же функции, что и при импорте одного файла
+        from folder_import import import_files
+
+        with metrics.action(f'batch_import_{kind}'):
+            merged, statuses = import_files(db, kind, files, progress=job.report_progress,
+                                            is_cancelled=job.is_cancelled,
+                                            check_cancelled=job.check_cancelled)
+            if kind == 'statement':
+                merged = MainWindow.prepare_statement(merged)
+            return merged, statuses
+
+    def vtb_batch_finished(self, result):
+        merged, statuses = result
+        self.show_vtb_frame(merged)
+        self.show_batch_statuses(statuses, len(merged))
+
+    def statement_batch_finished(self, result):
+        prepared, statuses = result
+        self.show_statement_frame(prepared)
+        self.show_batch_statuses(statuses, len(prepared[0]))
+
+    def show_batch_statuses(self, statuses, shown):
+        from folder_import import batch_summary
+
+        head, details = batch_summary(statuses)
+        if shown < sum(status.rows for status in statuses if status.ok):
+            # import_files оставляет для показа только первые строки
+            head += (f"\nПоказаны первые {shown} строк, остальные загружаются "
+                     f"из базы через фильтр")
+        box = QMessageBox(self)
+        box.setWindowTitle("Пакетный импорт")
+        failed = any(not status.ok for status in statuses)
+        box.setIcon(QMessageBox.Icon.Warning if failed else QMessageBox.Icon.Information)
+        box.setText(head)
+        box.setDetailedText(details)
+        box.exec()
+
+    def stored_query_or_warn(self, values):
+        from statement_store import stored_query
+
         try:
-            file_name, _ = QFileDialog.getOpenFileName(
-                self,
-                "Выберите файл регистра ВТБ",
-                "",
-                "Excel Files (*.xlsx *.xls);;CSV Files (*.csv)"
-            )
+            return stored_query(**values)
+        except ValueError as e:
+            QMessageBox.warning(self, "Неверный фильтр", str(e))
+            return None
+
+    def load_stored_vtb(self, values):
+        query = self.stored_query_or_warn(values)
+        if query is None:
+            return
+        start_job(self, "Загрузка регистров ВТБ из базы",
+                  lambda job: self.read_stored_vtb(self.db, query),
+                  on_finished=self.show_vtb_frame,
+                  on_failed=lambda message: QMessageBox.critical(
+                      self, "Ошибка", f"Ошибка загрузки регистров: {message}"))
+
+    def load_stored_statements(self, values):
+        query = self.stored_query_or_warn(values)
+        if query is None:
+            return
+        start_job(self, "Загрузка выписок из базы",
+                  lambda job: self.read_stored_statements(self.db, query),
+                  on_finished=self.show_statement_frame,
+                  on_failed=lambda message: QMessageBox.critical(
+                      self, "Ошибка", f"Ошибка загрузки выписок: {message}"))
 
-            if file_name:
-                if file_name.endswith(('.xlsx', '.xls')):
-                    df = pd.read_excel(file_name)
-                else:
-                    df = pd.read_csv(file_name, encoding='utf-8')
+    @staticmethod
+    def read_stored_vtb(db, query):
+        from statement_store import load_vtb_registers
 
-                self.vtb_table.setRowCount(0)
+        with metrics.action('load_vtb'):
+            return load_vtb_registers(db, query)
 
-                                        # Заполняем таблицу данными
-                for index, row in df.iterrows():
-                    self.vtb_table.insertRow(index)
-                    for col, value in enumerate(row):
-                        self.vtb_table.setItem(
-                            index, col, QTableWidgetItem(str(value))
-                        )
+    @staticmethod
+    def read_stored_statements(db, query):
+        from statement_store import load_statements
 
-                QMessageBox.information(
-                    self,
-                    "Успех",
-                    "Данные из регистра ВТБ успешно импортированы"
-                )
+        with metrics.action('load_statements'):
+            return MainWindow.prepare_statement(load_statements(db, query))
 
-        except Exception as e:
-          QMessageBox.critical(
+    def export_vtb_data(self):
+        import pandas as pd
+        from export import EXPORT_FILTER, ensure_extension
+        from validation import normalize_register
+
+        file_name, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Сохранить регистр ВТБ",
+            "",
+            EXPORT_FILTER
+        )
+
+        if file_name:
+            file_name = ensure_extension(file_name, selected_filter)
+            if self.vtb_frame is not None:
+                frame = normalize_register(self.vtb_frame)
+            else:
+                frame = pd.DataFrame(columns=VTB_HEADERS)
+            self.start_frame_export("Экспорт регистра ВТБ", frame, VTB_HEADERS, file_name)
+
+    def export_statement(self):
+        from export import EXPORT_FILTER, ensure_extension
+
+        if self.statement_frame is None or self.statement_frame.empty:
+            QMessageBox.warning(
                 self,
-                "Ошибка",
-                f"Ошибка при импорте данных ВТБ: {str(e)}"
-          )
+                "Предупреждение",
+                "Нет данных для экспорта. Сначала импортируйте выписку."
+            )
+            return
 
-    def import_statement(self):
+        file_name, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Сохранить выписку",
+            "",
+            EXPORT_FILTER
+        )
+
+        if file_name:
+            # Выгружаются только строки, оставшиеся после поиска
+            self.start_frame_export("Экспорт выписки", self.statement_frame, STATEMENT_HEADERS,
+                                    ensure_extension(file_name, selected_filter),
+                                    self.statements_model.visible_rows())
+
+    def start_frame_export(self, title, frame, headers, file_name, rows=None):
+        def run_export(job):
+            from export import export_frame
+
+            return export_frame(frame, headers, file_name, rows, progress=job.report_progress)
+
+        start_job(self, title, run_export,
+                  on_finished=lambda count: QMessageBox.information(
+                      self, "Успех", f"Данные успешно экспортированы ({count} строк)"),
+                  on_failed=lambda message: QMessageBox.critical(
+                      self, "Ошибка", f"Ошибка при экспорте данных: {message}"))
+
+    def process_statement(self):
+        if self.statement_frame is None or self.statement_frame.empty:
+            QMessageBox.warning(
+                self,
+                "Предупреждение",
+                "Нет данных для обработки. Сначала импортируйте выписку."
+            )
+            return
+
+        statement = self.statement_frame
+        start_job(self, "Сопоставление платежей с владельцами",
+                  lambda job: self.reconcile_statement(statement, self.db),
+                  on_finished=self.show_reconciliation,
+                  on_failed=lambda message: QMessageBox.critical(
+                      self,
+                      "Ошибка",
+                      f"Ошибка при обработке выписки: {message}"
+                  ))
+
+    @staticmethod
+    def reconcile_statement(statement, db):
+        from reconcile import load_owners, reconcile
+
+        with metrics.action('reconcile'):
+            return reconcile(statement, load_owners(db))
+
+    def show_reconciliation(self, result):
+        self.reconciliation_dialog = ReconciliationDialog(result, self)
+        self.reconciliation_dialog.row_activated.connect(self.show_statement_row)
+        self.reconciliation_dialog.show()
+
+    def show_statement_row(self, row):
+        view_row = self.statements_model.view_row(row)
+        if view_row is None:
+            # Строка скрыта поиском — показываем выписку целиком
+            self.statement_search_input.clear()
+            self.search_in_statements()
+            view_row = row
+        self.tab_widget.setCurrentWidget(self.vtb_statements_tab)
+        index = self.statements_model.index(view_row, 0)
+        self.statements_table.setCurrentIndex(index)
+        self.statements_table.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    def generate_statement_report(self):
+        from export import ensure_extension
+        from reports import REPORTS, build_reports, write_reports_xlsx
+
+        if self.statement_frame is None or self.statement_frame.empty:
+            QMessageBox.warning(
+                self,
+                "Предупреждение",
+                "Нет данных для формирования отчета"
+            )
+            return
+
+        names = list(REPORTS)
+        choice, ok = QInputDialog.getItem(
+            self,
+            "Сформировать отчет",
+            "Отчет:",
+            ["Все отчеты"] + names,
+            0,
+            False
+        )
+        if not ok:
+            return
+        selected = names if choice == "Все отчеты" else [choice]
+
+        file_name, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Сохранить отчет",
+            "",
+            "Excel Files (*.xlsx);;PDF Files (*.pdf)"
+        )
+
+        if not file_name:
+            return
+        file_name = ensure_extension(file_name, selected_filter)
+
+        # Отчёты считаются в фоне; повторный запрос берётся из кэша по хэшу выписки
+        frame, key = self.statement_frame, self.statement_hash
+
+        def run_reports(job):
+            with metrics.action('statement_reports'):
+                reports = build_reports(frame, selected, key)
+                if file_name.endswith('.xlsx'):
+                    write_reports_xlsx(file_name, reports)
+                return reports
+
+        start_job(self, "Формирование отчета", run_reports,
+                  on_finished=lambda reports: self.statement_reports_ready(file_name, reports),
+                  on_failed=lambda message: QMessageBox.critical(
+                      self,
+                      "Ошибка",
+                      f"Ошибка при формировании отчета: {message}"
+                  ))
+
+    def statement_reports_ready(self, file_name, reports):
         try:
-          file_name, _ = QFileDialog.getOpenFileName(
-          self,
-          "Выберите файл выписки",
-          "",
-          "Excel Files (*.xlsx *.xls);;CSV Files (*.csv);;PDF Files (*.pdf)"
-          )
-
-          if not file_name:
-             return
-
-          if file_name.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file_name)
-          elif file_name.endswith('.csv'):
-            df = pd.read_csv(file_name, encoding='utf-8')
-          elif file_name.endswith('.pdf'):
+            if file_name.endswith('.pdf'):
+                self.write_reports_pdf(file_name, reports)
+
             QMessageBox.information(
                 self,
-                "PDF Import",
-                "Обработка PDF файлов будет добавлена в следующей версии"
+                "Успех",
+                "Отчет успешно сформирован"
             )
-            return
-                                    # Очищаем таблицу
-          self.statements_table.setRowCount(0)
-
-                                    # Заполняем таблицу данными
-          for index, row in df.iterrows():
-              self.statements_table.insertRow(index)
-              for col, value in enumerate(row):
-                  self.statements_table.setItem(
-                      index, col, QTableWidgetItem(str(value))
-                  )
-          QMessageBox.information(
-              self,
-              "Успех",
-              "Выписка успешно импортирована"
-          )
 
         except Exception as e:
             QMessageBox.critical(
                 self,
                 "Ошибка",
-                f"Ошибка при импорте выписки: {str(e)}"
+                f"Ошибка при формировании отчета: {str(e)}"
             )
-    def export_vtb_data(self):
-        try:
-          file_name, _ = QFileDialog.getSaveFileName(
-              self,
-              "Сохранить регистр ВТБ",
-              "",
-              "Excel Files (*.xlsx);;CSV Files (*.csv)"
-          )
-
-          if file_name:
-              data = []
-              for row in range(self.vtb_table.rowCount()):
-                  row_data = []
-                  for col in range(self.vtb_table.columnCount()):
-                      item = self.vtb_table.item(row, col)
-                      row_data.append(item.text() if item else "")
-                  data.append(row_data)
-
-              df = pd.DataFrame(
-                  data,
-                  columns=[
-                      "ID", "Номер счета", "ФИО владельца",
-                      "Дата операции", "Тип операции", "Сумма", "Статус"
-                  ]
-              )                try:
-                        file_name, _ = QFileDialog.getSaveFileName(
-                            self,
-                            "Сохранить регистр ВТБ",
-                            "",
-                            "Excel Files (*.xlsx);;CSV Files (*.csv)"
-                        )
-
-                        if file_name:
-                            data = []
-                            for row in range(self.vtb_table.rowCount()):
-                                row_data = []
-                                for col in range(self.vtb_table.columnCount()):
-                                    item = self.vtb_table.item(row, col)
-                                    row_data.append(item.text() if item else "")
-                                data.append(row_data)
-
-                            df = pd.DataFrame(
-                                data,
-                                columns=[
-                                    "ID", "Номер счета", "ФИО владельца",
-                                    "Дата операции", "Тип операции", "Сумма", "Статус"
-                                ]
-                            )
-                                                    if file_name.endswith('.xlsx'):
-                                                        df.to_excel(file_name, index=False)
-                                                    else:
-                                                        df.to_csv(file_name, index=False, encoding='utf-8')
-
-                                                    QMessageBox.information(self, "Успех", "Данные успешно экспортированы")
-
-                                            except Exception as e:
-                                                QMessageBox.critical(self, "Ошибка", f"Ошибка при экспорте данных: {str(e)}")
-
-                                        def process_statement(self):
-                                            try:
-                                                if self.statements_table.rowCount() == 0:
-                                                    QMessageBox.warning(
-                                                        self,
-                                                        "Предупреждение",
-                                                        "Нет данных для обработки. Сначала импортируйте выписку."
-                                                    )
-                                                    return
-
-                                                # Здесь будет логика обработки выписки
-
-                                                QMessageBox.information(
-                                                    self,
-                                                    "Обработка выписки",
-                                                    "Выписка успешно обработана"
-                                                )
-
-                                            except Exception as e:
-                                                QMessageBox.critical(
-                                                    self,
-                                                    "Ошибка",
-                                                    f"Ошибка при обработке выписки: {str(e)}"
-                                                )
-
-                                        def generate_statement_report(self):
-                                            try:
-                                                if self.statements_table.rowCount() == 0:
-                                                    QMessageBox.warning(
-                                                        self,
-                                                        "Предупреждение",
-                                                        "Нет данных для формирования отчета"
-                                                    )
-                                                    return
-
-                                                file_name, _ = QFileDialog.getSaveFileName(
-                                                    self,
-                                                    "Сохранить отчет",
-                                                    "",
-                                                    "Excel Files (*.xlsx);;PDF Files (*.pdf)"
-                                                )
-
-                                                if not file_name:
-                                                    return
-
-                                                data = []
-                                                headers = []
-                                                for col in range(self.statements_table.columnCount()):
-                                                    headers.append(self.statements_table.horizontalHeaderItem(col).text())
-
-                                                for row in range(self.statements_table.rowCount()):
-                                                    row_data = []
-                                                    for col in range(self.statements_table.columnCount()):
-                                                        item = self.statements_table.item(row, col)
-                                                        row_data.append(item.text() if item else "")
-                                                    data.append(row_data)
-
-                                                df = pd.DataFrame(data, columns=headers)
-
-                                                if file_name.endswith('.xlsx'):
-                                                    df.to_excel(file_name, index=False)
-                                                elif file_name.endswith('.pdf'):
-                                                    # Здесь можно добавить генерацию PDF
-                                                    pass
-
-                                                QMessageBox.information(
-                                                    self,
-                                                    "Успех",
-                                                    "Отчет успешно сформирован"
-                                                )
-
-                                            except Exception as e:
-                                                QMessageBox.critical(
-                                                    self,
-                                                    "Ошибка",
-                                                    f"Ошибка при формировании отчета: {str(e)}"
-                                                )
-
-                                        def check_vtb_data(self):
-                                            try:
-                                                errors = []
-                                                for row in range(self.vtb_table.rowCount()):
-                                                    account = self.vtb_table.item(row, 1)
-                                                    if account and not account.text().isdigit():
-                                                        errors.append(f"Строка {row + 1}: Неверный формат номера счета")
-
-                                                    amount = self.vtb_table.item(row, 5)
-                                                    if amount:
-                                                        try:
-                                                            float(amount.text().replace(',', '.'))
-                                                        except ValueError:
-                                                            errors.append(f"Строка {row + 1}: Неверный формат суммы")
-
-                                                if errors:
-                                                    error_text = "\n".join(errors)
-                                                    QMessageBox.warning(
-                                                        self,
-                                                        "Результаты проверки",
-                                                        f"Найдены ошибки в данных:\n{error_text}"
-                                                    )
-                                                else:
-                                                    QMessageBox.information(
-                                                        self,
-                                                        "Результаты проверки",
-                                                        "Ошибок в данных не обнаружено"
-                                                    )
-
-                                            except Exception as e:
-                                                QMessageBox.critical(
-                                                    self,
-                                                    "Ошибка",
-                                                    f"Ошибка при проверке данных: {str(e)}"
-                                                )
-
-                                        def search_in_statements(self):
-                                            search_text = self.statement_search_input.text().lower()
-
-                                            if not search_text:
-                                                for row in range(self.statements_table.rowCount()):
-                                                    self.statements_table.setRowHidden(row, False)
-                                                return
-
-                                            for row in range(self.statements_table.rowCount()):
-                                                row_matches = False
-                                                for col in range(self.statements_table.columnCount()):
-                                                    item = self.statements_table.item(row, col)
-                                                    if item and search_text in item.text().lower():
-                                                        row_matches = True
-                                                        break
-                                                self.statements_table.setRowHidden(row, not row_matches)
-
-                                        def setup_search_handler(self):
-                                            self.statement_search_input.textChanged.connect(self.search_in_statements)
-
-                                        def update_tables(self):
-                                            try:
-                                                # Update Houses Table
-                                                self.houses_table.setRowCount(0)
-                                                for house in self.db.houses.find():
-                                                    row = self.houses_table.rowCount()
-                                                    self.houses_table.insertRow(row)
-                                                    self.houses_table.setItem(row, 0, QTableWidgetItem(str(house['_id'])))
-                                                    self.houses_table.setItem(row, 1, QTableWidgetItem(house['address']))
-                                                    self.houses_table.setItem(row, 2, QTableWidgetItem(str(house['build_year'])))
-
-                                                # Update Premises Table
-                                                self.premises_table.setRowCount(0)
-                                                for premise in self.db.premises.find():
-                                                    row = self.premises_table.rowCount()
-                                                    self.premises_table.insertRow(row)
-                                                    self.premises_table.setItem(row, 0, QTableWidgetItem(str(premise['_id'])))
-                                                    self.premises_table.setItem(row, 1, QTableWidgetItem(str(premise['house_id'])))
-                                                    self.premises_table.setItem(row, 2, QTableWidgetItem(premise['number']))
-                                                    self.premises_table.setItem(row, 3, QTableWidgetItem(str(premise['area'])))
-
-                                                # Update Owners Table
-                                                self.owners_table.setRowCount(0)
-                                                for owner in self.db.owners.find():
-                                                    row = self.owners_table.rowCount()
-                                                    self.owners_table.insertRow(row)
-                                                    self.owners_table.setItem(row, 0, QTableWidgetItem(str(owner['_id'])))
-                                                    self.owners_table.setItem(row, 1, QTableWidgetItem(owner['first_name']))
-                                                    self.owners_table.setItem(row, 2, QTableWidgetItem(owner['last_name']))
-                                                    self.owners_table.setItem(row, 3, QTableWidgetItem(owner['document']['number']))
-                                                    self.owners_table.setItem(row, 4, QTableWidgetItem(str(owner['ownership_share'])))
-                                                    self.owners_table.setItem(row, 5, QTableWidgetItem(owner['status']))
-
-                                            except Exception as e:
-                                                QMessageBox.critical(self, "Error", f"Failed to update tables: {str(e)}")
-
-                                        def closeEvent(self, a0: QCloseEvent | None) -> None:
-                                            if a0 is not None:
-                                                if self.confirm_exit():
-                                                    self.client.close()
-                                                    a0.accept()
-                                                else:
-                                                    a0.ignore()
-
-                                        def confirm_exit(self) -> bool:
-                                            reply = QMessageBox.question(self, 'Exit',
-                                                "Are you sure you want to exit?",
-                                                QMessageBox.StandardButton.Yes |
-                                                QMessageBox.StandardButton.No,
-                                                QMessageBox.StandardButton.No)
-                                            return reply == QMessageBox.StandardButton.Yes
-
-                                        def exit_application(self) -> None:
-                                            if self.confirm_exit():
-                                                self.client.close()
-                                                QApplication.quit()
-
-                                    def main():
-                                        app = QApplication(sys.argv)
-                                        app.setStyle('Fusion')
-
-                                        window = MainWindow()
-                                        window.show()
-
-                                        sys.exit(app.exec())
-
-                                    if __name__ == '__main__':
-                                        main()
+
+    def write_reports_pdf(self, file_name, reports):
+        parts = []
+        for name, report in reports.items():
+            parts.append(f"<h2>{name}</h2>")
+            parts.append(report.to_html(index=False, float_format=lambda value: f"{value:,.2f}",
+                                        na_rep=""))
+        document = QTextDocument()
+        document.setHtml("\n".join(parts))
+
+        writer = QPdfWriter(file_name)
+        writer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
+        document.print(writer)
+
+    def check_vtb_data(self):
+        if self.vtb_frame is None or self.vtb_frame.empty:
+            QMessageBox.warning(
+                self,
+                "Предупреждение",
+                "Нет данных для проверки. Сначала импортируйте регистр."
+            )
+            return
+
+        frame = self.vtb_frame
+        start_job(self, "Проверка данных", lambda job: self.validate_register(frame),
+                  on_finished=self.show_validation_results,
+                  on_failed=lambda message: QMessageBox.critical(
+                      self,
+                      "Ошибка",
+                      f"Ошибка при проверке данных: {message}"
+                  ))
+
+    @staticmethod
+    def validate_register(frame):
+        from validation import validate
+
+        with metrics.action('validate_register'):
+            return validate(frame)
+
+    def show_validation_results(self, errors):
+        if errors.empty:
+            QMessageBox.information(
+                self,
+                "Результаты проверки",
+                "Ошибок в данных не обнаружено"
+            )
+            return
+
+        self.validation_dialog = ValidationErrorsDialog(errors, self)
+        self.validation_dialog.row_activated.connect(self.show_vtb_row)
+        self.validation_dialog.show()
+
+    def show_vtb_row(self, row):
+        view_row = self.vtb_model.view_row(row)
+        if view_row is None:
+            return
+        self.tab_widget.setCurrentWidget(self.vtb_tab)
+        index = self.vtb_model.index(view_row, 0)
+        self.vtb_table.setCurrentIndex(index)
+        self.vtb_table.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    def search_in_statements(self):
+        self.search_timer.stop()
+        if self.statement_index is None:
+            return
+        with metrics.action('search_statements'):
+            rows = self.statement_index.search(
+                self.statement_search_input.text(),
+                self.statement_search_field.currentData()
+            )
+            self.statements_model.set_visible_rows(rows)
+
+    def setup_search_handler(self):
+        # Поиск запускается после паузы в наборе, а не на каждое нажатие
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.search_in_statements)
+        self.statement_search_input.textChanged.connect(lambda _text: self.search_timer.start())
+        self.statement_search_field.currentIndexChanged.connect(self.search_in_statements)
+
+    def show_inconsistent_premises(self):
+        InconsistentPremisesDialog(self.repository, self).exec()
+
+    def show_ownership_history(self, index):
+        owner_id = self.owners_table.model().document_id(index.row()) if index.isValid() else None
+        self.ownership_history.show_owner(owner_id)
+
+    def ownership_changed(self, premise_id):
+        # Событие журнала меняет долю в owners и сводку долей помещения
+        self.owners_changed(self.repository.house_of_premise(premise_id))
+
+    def stop_metrics_export(self):
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+
+    def closeEvent(self, a0: QCloseEvent | None) -> None:
+        if a0 is not None:
+            if self.confirm_exit():
+                self.stop_metrics_export()
+                self.repository.close()
+                a0.accept()
+            else:
+                a0.ignore()
+
+    def confirm_exit(self) -> bool:
+        reply = QMessageBox.question(self, 'Exit',
+            "Are you sure you want to exit?",
+            QMessageBox.StandardButton.Yes |
+            QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No)
+        return reply == QMessageBox.StandardButton.Yes
+
+    def exit_application(self) -> None:
+        if self.confirm_exit():
+            self.stop_metrics_export()
+            self.repository.close()
+            QApplication.quit()
+
+def main():
+    app = QApplication(sys.argv)
+    app.setStyle('Fusion')
+
+    window = MainWindow()
+    window.show()
+
+    sys.exit(app.exec())
+
+if __name__ == '__main__':
+    main()
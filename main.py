@@ -1,41 +1,20 @@
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                            QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
-                            QDialog, QLineEdit, QLabel, QMessageBox, QFileDialog)
+                            QHBoxLayout, QPushButton, QDialog, QLineEdit, QLabel,
+                            QMessageBox, QFileDialog)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIntValidator
 from PyQt6.QtGui import QShortcut, QKeySequence
-import pandas as pd
-from pymongo import MongoClient
-from datetime import datetime
 from bson import ObjectId
-
-class OwnerDialog(QDialog):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("Add/Edit Owner")
-        self.setMinimumWidth(300)
-        layout = QVBoxLayout()
-
-        self.first_name = QLineEdit()
-        self.last_name = QLineEdit()
-        self.doc_number = QLineEdit()
-        self.ownership_share = QLineEdit()
-
-        layout.addWidget(QLabel("First Name:"))
-        layout.addWidget(self.first_name)
-        layout.addWidget(QLabel("Last Name:"))
-        layout.addWidget(self.last_name)
-        layout.addWidget(QLabel("Document Number:"))
-        layout.addWidget(self.doc_number)
-        layout.addWidget(QLabel("Ownership Share:"))
-        layout.addWidget(self.ownership_share)
-
-        save_button = QPushButton("Save")
-        save_button.clicked.connect(self.accept)
-        layout.addWidget(save_button)
-
-        self.setLayout(layout)
+# pandas и зависящие от него модули импортируются в обработчиках при первом
+# использовании, чтобы окно появлялось без ожидания их загрузки
+from jobs import start_job
+from metrics import metrics
+from ownership_view import InconsistentPremisesDialog
+from perf_panel import exporter_from_env, install_perf_panel
+from registry_tabs import RegistryTablesMixin
+from repository import Repository, RepositoryUnavailable
+from startup import defer_first_load
 
 class HouseDialog(QDialog):
     def __init__(self, parent=None):
@@ -66,7 +45,7 @@ class HouseDialog(QDialog):
 
         self.setLayout(layout)
 
-class MainWindow(QMainWindow):
+class MainWindow(RegistryTablesMixin, QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Real Estate Registry")
@@ -75,18 +54,23 @@ class MainWindow(QMainWindow):
         exit_shortcut = QShortcut(QKeySequence('Ctrl+Q'), self)
         exit_shortcut.activated.connect(self.exit_application)
         # MongoDB connection
+        # open() не обращается к серверу: ping выполняется фоновой задачей
+        # первой загрузки, и недоступная база обнаруживается за
+        # serverSelectionTimeoutMS без зависания окна
         try:
-            self.client = MongoClient('mongodb://localhost:27017/')
-            self.db = self.client['real_estate_registry']
-        except Exception as e:
-            QMessageBox.critical(self, "Database Error", f"Cannot connect to MongoDB: {str(e)}")
+            self.repository = Repository().open()
+        except RepositoryUnavailable as e:
+            QMessageBox.critical(self, "Database Error", str(e))
             sys.exit(1)
+        self.db = self.repository.db
         exit_shortcut = QShortcut(QKeySequence('Ctrl+Q'), self)
         exit_shortcut.activated.connect(self.exit_application)
 
         self.setup_ui()
 
     def setup_ui(self):
+        self.create_registry_tables()
+
         # Create central widget and main layout
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -101,6 +85,9 @@ class MainWindow(QMainWindow):
         add_house_button = QPushButton("Add House")
         add_owner_button = QPushButton("Add Owner")
         refresh_button = QPushButton("Refresh Data")
+        shares_button = QPushButton("Check Shares")
+        perf_button = QPushButton("Performance")
+        perf_button.setCheckable(True)
         exit_button = QPushButton("Exit")
         exit_button.setStyleSheet("""
                 QPushButton {
@@ -123,50 +110,49 @@ class MainWindow(QMainWindow):
         import_button.clicked.connect(self.import_from_xls)
         add_house_button.clicked.connect(self.add_house)
         add_owner_button.clicked.connect(self.add_owner)
-        refresh_button.clicked.connect(self.update_tables)
+        refresh_button.clicked.connect(self.reload_data)
+        shares_button.clicked.connect(self.show_inconsistent_premises)
 
         # Add buttons to layout
         button_layout.addWidget(import_button)
         button_layout.addWidget(add_house_button)
         button_layout.addWidget(add_owner_button)
         button_layout.addWidget(refresh_button)
+        button_layout.addWidget(shares_button)
+        button_layout.addWidget(perf_button)
+        button_layout.addWidget(self.detail_mode_checkbox)
         button_layout.addStretch()
 
         main_layout.addWidget(button_panel)
 
         # Create tables
-        # Houses table
         houses_label = QLabel("Houses:")
-        self.houses_table = QTableWidget()
-        self.houses_table.setColumnCount(3)
-        self.houses_table.setHorizontalHeaderLabels(["ID", "Address", "Build Year"])
-        self.houses_table.horizontalHeader().setStretchLastSection(True)
-
-        # Premises table
         premises_label = QLabel("Premises:")
-        self.premises_table = QTableWidget()
-        self.premises_table.setColumnCount(4)
-        self.premises_table.setHorizontalHeaderLabels(["ID", "House ID", "Number", "Area"])
-        self.premises_table.horizontalHeader().setStretchLastSection(True)
-
-        # Owners table
         owners_label = QLabel("Owners:")
-        self.owners_table = QTableWidget()
-        self.owners_table.setColumnCount(6)
-        self.owners_table.setHorizontalHeaderLabels(
-            ["ID", "First Name", "Last Name", "Document", "Share", "Status"])
-        self.owners_table.horizontalHeader().setStretchLastSection(True)
 
         # Add tables to layout
         main_layout.addWidget(houses_label)
+        main_layout.addWidget(self.houses_filter)
         main_layout.addWidget(self.houses_table)
         main_layout.addWidget(premises_label)
+        main_layout.addWidget(self.premises_filter)
         main_layout.addWidget(self.premises_table)
         main_layout.addWidget(owners_label)
+        main_layout.addWidget(self.owners_filter)
         main_layout.addWidget(self.owners_table)
 
-        # Initial data load
-        self.update_tables()
+        # Performance panel: spans and counters of DB calls, imports and table fills
+        self.perf_panel = install_perf_panel(self, perf_button)
+        # Periodic metrics export when REGISTRY_METRICS_FILE is set
+        self.metrics_exporter = exporter_from_env(self)
+
+        # Initial data load happens after the window is first painted
+        defer_first_load(self, self.load_initial_data)
+
+    def stop_metrics_export(self):
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+
     def exit_application(self):
                 reply = QMessageBox.question(self, 'Exit',
                     "Are you sure you want to exit?",
@@ -176,7 +162,8 @@ class MainWindow(QMainWindow):
 
                 if reply == QMessageBox.StandardButton.Yes:
                     # Закрываем соединение с базой данных
-                    self.client.close()
+                    self.stop_metrics_export()
+                    self.repository.close()
                     QApplication.quit()
 
     def closeEvent(self, event):
@@ -188,7 +175,8 @@ class MainWindow(QMainWindow):
 
                 if reply == QMessageBox.StandardButton.Yes:
                     # Закрываем соединение с базой данных
-                    self.client.close()
+                    self.stop_metrics_export()
+                    self.repository.close()
                     event.accept()
                 else:
                     event.ignore()
@@ -197,102 +185,40 @@ class MainWindow(QMainWindow):
             self, "Open Excel File", "", "Excel Files (*.xlsx *.xls)")
 
         if file_name:
-            try:
-                df = pd.read_excel(file_name)
+            def run_import(job):
+                from bulk_import import import_houses_file
 
-                for _, row in df.iterrows():
-                    house_data = {
-                        'address': str(row['address']),
-                        'build_year': int(row['build_year'])
-                    }
+                with metrics.action('import_houses'):
+                    return import_houses_file(self.db, file_name, progress=job.report_progress)
 
-                    house_id = self.db.houses.insert_one(house_data).inserted_id
+            start_job(self, "Importing houses", run_import,
+                      on_finished=self.house_import_finished,
+                      on_failed=self.house_import_failed,
+                      on_cancelled=self.update_tables)
 
-                    if 'premises' in row:
-                        for premise in str(row['premises']).split(';'):
-                            premise_data = {
-                                'house_id': house_id,
-                                'number': premise.strip(),
-                                'area': float(row.get('area', 0))
-                            }
-                            self.db.premises.insert_one(premise_data)
-
-                self.update_tables()
-                QMessageBox.information(self, "Success", "Data imported successfully")
+    def house_import_finished(self, report):
+        self.update_tables()
+        if report.failures:
+            QMessageBox.warning(self, "Import finished with errors", report.summary())
+        else:
+            QMessageBox.information(self, "Success", report.summary())
 
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Import failed: {str(e)}")
+    def house_import_failed(self, message):
+        self.update_tables()
+        QMessageBox.critical(self, "Error", f"Import failed: {message}")
 
     def add_house(self):
         dialog = HouseDialog(self)
         if dialog.exec():
             try:
-                house_data = {
-                    'address': dialog.address.text(),
-                    'build_year': int(dialog.build_year.text())
-                }
-                self.db.houses.insert_one(house_data)
+                self.repository.add_house(dialog.address.text(), dialog.build_year.text())
                 self.update_tables()
                 QMessageBox.information(self, "Success", "House added successfully")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to add house: {str(e)}")
 
-    def add_owner(self):
-        dialog = OwnerDialog(self)
-        if dialog.exec():
-            try:
-                owner_data = {
-                    'first_name': dialog.first_name.text(),
-                    'last_name': dialog.last_name.text(),
-                    'document': {
-                        'number': dialog.doc_number.text(),
-                        'issue_date': datetime.now()
-                    },
-                    'ownership_share': float(dialog.ownership_share.text()),
-                    'status': 'active'
-                }
-
-                self.db.owners.insert_one(owner_data)
-                self.update_tables()
-                QMessageBox.information(self, "Success", "Owner added successfully")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to add owner: {str(e)}")
-
-    def update_tables(self):
-        try:
-            # Update Houses Table
-            self.houses_table.setRowCount(0)
-            for house in self.db.houses.find():
-                row = self.houses_table.rowCount()
-                self.houses_table.insertRow(row)
-                self.houses_table.setItem(row, 0, QTableWidgetItem(str(house['_id'])))
-                self.houses_table.setItem(row, 1, QTableWidgetItem(house['address']))
-                self.houses_table.setItem(row, 2, QTableWidgetItem(str(house['build_year'])))
-
-            # Update Premises Table
-            self.premises_table.setRowCount(0)
-            for premise in self.db.premises.find():
-                row = self.premises_table.rowCount()
-                self.premises_table.insertRow(row)
-                self.premises_table.setItem(row, 0, QTableWidgetItem(str(premise['_id'])))
-                self.premises_table.setItem(row, 1, QTableWidgetItem(str(premise['house_id'])))
-                self.premises_table.setItem(row, 2, QTableWidgetItem(premise['number']))
-                self.premises_table.setItem(row, 3, QTableWidgetItem(str(premise['area'])))
-
-            # Update Owners Table
-            self.owners_table.setRowCount(0)
-            for owner in self.db.owners.find():
-                row = self.owners_table.rowCount()
-                self.owners_table.insertRow(row)
-                self.owners_table.setItem(row, 0, QTableWidgetItem(str(owner['_id'])))
-                self.owners_table.setItem(row, 1, QTableWidgetItem(owner['first_name']))
-                self.owners_table.setItem(row, 2, QTableWidgetItem(owner['last_name']))
-                self.owners_table.setItem(row, 3, QTableWidgetItem(owner['document']['number']))
-                self.owners_table.setItem(row, 4, QTableWidgetItem(str(owner['ownership_share'])))
-                self.owners_table.setItem(row, 5, QTableWidgetItem(owner['status']))
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to update tables: {str(e)}")
+    def show_inconsistent_premises(self):
+        InconsistentPremisesDialog(self.repository, self).exec()
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,243 @@
+"""Замеры горячих путей: длительности (spans), счётчики и снимки для экспорта.
+
+Модуль не зависит от Qt и pandas, поэтому его используют и окна, и cli.py,
+и фоновые задачи. Длительности команд MongoDB собирает CommandMetrics —
+слушатель pymongo, который Repository подключает к клиенту.
+
+    with metrics.span('import.read_chunk'):
+        ...
+    with metrics.action('refresh_data'):   # span + cProfile, если запись включена
+        ...
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from pymongo import monitoring
+
+
+PROFILE_DIR_ENV = 'REGISTRY_PROFILE_DIR'
+PROMETHEUS_PREFIX = 'registry'
+
+
+class SpanStats:
+    __slots__ = ('count', 'total', 'max', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class Metrics:
+    """Накопленные длительности и счётчики; безопасен для вызова из потоков."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+        # Имя -> функция без аргументов; значения читаются в момент снимка
+        self.gauges = {}
+        self.started = time.time()
+        self.profiler = ActionProfiler()
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(seconds)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def register_gauge(self, name, read):
+        self.gauges[name] = read
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def iterate(self, name, iterable):
+        """Отдаёт элементы iterable, записывая время получения каждого как span name."""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(name, time.perf_counter() - started)
+            yield item
+
+    @contextmanager
+    def action(self, name):
+        """Действие пользователя: span 'action.<name>' и cProfile, если он взведён."""
+        with self.profiler.capture(name), self.span(f'action.{name}'):
+            yield
+
+    def reset(self):
+        with self._lock:
+            self.spans = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            spans = {name: {'count': stats.count,
+                            'total_ms': round(stats.total * 1000, 3),
+                            'mean_ms': round(stats.total * 1000 / stats.count, 3),
+                            'max_ms': round(stats.max * 1000, 3),
+                            'last_ms': round(stats.last * 1000, 3)}
+                     for name, stats in self.spans.items()}
+            counters = dict(self.counters)
+        gauges = {}
+        for name, read in self.gauges.items():
+            try:
+                gauges[name] = read()
+            except Exception:
+                continue
+        return {'time': datetime.now().isoformat(timespec='seconds'),
+                'since': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+                'pid': os.getpid(), 'spans': spans, 'counters': counters, 'gauges': gauges}
+
+
+class ActionProfiler:
+    """cProfile одного действия: arm() включает запись ближайшего action().
+
+    Профиль пишется в REGISTRY_PROFILE_DIR (по умолчанию временный каталог)
+    как .prof для snakeviz/pstats; last_summary — первые строки по cumtime.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.armed = False
+        self.last_path = None
+        self.last_summary = None
+        self._lock = threading.Lock()
+
+    def arm(self):
+        self.armed = True
+
+    def disarm(self):
+        self.armed = False
+
+    def _take(self):
+        # Профилируется только одно действие, даже если два начались одновременно
+        with self._lock:
+            armed, self.armed = self.armed, False
+        return armed
+
+    @contextmanager
+    def capture(self, name):
+        if not self.armed or not self._take():
+            yield
+            return
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._save(profile, name)
+
+    def _save(self, profile, name):
+        import io
+        import pstats
+
+        directory = (self.directory or os.environ.get(PROFILE_DIR_ENV)
+                     or tempfile.gettempdir())
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(directory, f'registry-{name}-{stamp}.prof')
+        try:
+            profile.dump_stats(path)
+        except OSError:
+            path = None
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats('cumulative').print_stats(25)
+        self.last_path = path
+        self.last_summary = text.getvalue()
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Длительность каждой команды MongoDB как span 'mongo.<команда>'.
+
+    duration_micros — время от отправки команды до разобранного ответа,
+    то есть сеть, сервер и декодирование ответа драйвером.
+    """
+
+    def __init__(self, target):
+        self.target = target
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.target.record(f'mongo.{event.command_name}', event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.target.record(f'mongo.{event.command_name}', event.duration_micros / 1e6)
+        self.target.count(f'mongo.{event.command_name}.failed')
+
+
+def metric_label(name):
+    return name.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_text(snapshot, prefix=PROMETHEUS_PREFIX):
+    """Снимок в текстовом формате Prometheus (для node_exporter textfile)."""
+    spans = sorted(snapshot['spans'].items())
+    families = [
+        ('span_seconds_total', 'counter', 'span',
+         [(name, stats['total_ms'] / 1000) for name, stats in spans]),
+        ('span_count_total', 'counter', 'span',
+         [(name, stats['count']) for name, stats in spans]),
+        ('span_max_seconds', 'gauge', 'span',
+         [(name, stats['max_ms'] / 1000) for name, stats in spans]),
+        ('events_total', 'counter', 'name', sorted(snapshot['counters'].items())),
+        ('gauge', 'gauge', 'name', sorted(snapshot['gauges'].items())),
+    ]
+    # Строки одного семейства метрик должны идти подряд после его # TYPE
+    lines = []
+    for family, kind, label, samples in families:
+        lines.append(f'# TYPE {prefix}_{family} {kind}')
+        for name, value in samples:
+            lines.append(f'{prefix}_{family}{{{label}="{metric_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def export_snapshot(path, snapshot=None):
+    """Пишет снимок: .prom — файл Prometheus целиком, иначе строка JSON-lines."""
+    if snapshot is None:
+        snapshot = metrics.snapshot()
+    if path.endswith('.prom'):
+        # Через временный файл, чтобы сборщик не прочитал файл наполовину
+        temporary = path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(prometheus_text(snapshot))
+        os.replace(temporary, path)
+    else:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+
+
+metrics = Metrics()
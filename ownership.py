@@ -0,0 +1,260 @@
+"""История владения помещениями: журнал событий и снимки состояния.
+
+ownership_events — только добавление. Событие фиксирует долю владельца в
+помещении после операции (0 — владелец выбыл) на дату effective_date;
+seq — порядковый номер события помещения, он упорядочивает события одной
+даты. Состояние помещения на дату — ближайший снимок из ownership_snapshots
+не позже этой даты плюс короткое воспроизведение событий после него.
+Текущие доли по всем помещениям владельца хранит ownership_links.
+"""
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from registry_cache import registry_cache
+from share_totals import apply_change
+
+
+ACQUIRE = 'acquire'
+CHANGE = 'change'
+RELEASE = 'release'
+TRANSFER_OUT = 'transfer_out'
+TRANSFER_IN = 'transfer_in'
+
+# Снимок состояния помещения пишется после каждых SNAPSHOT_INTERVAL событий
+SNAPSHOT_INTERVAL = 32
+
+# Доли сравниваются с этой точностью (1/3 + 2/3 и т. п.)
+SHARE_EPSILON = 1e-9
+
+
+def owner_since(owner):
+    """Дата появления владельца: выдача документа или время создания записи."""
+    issued = (owner.get('document') or {}).get('issue_date')
+    since = issued if isinstance(issued, datetime) else owner['_id'].generation_time
+    # generation_time приходит с часовым поясом, даты реестра хранятся без него
+    return since.replace(tzinfo=None)
+
+
+def owner_share(owner):
+    """Доля из документа владельца; не указанная доля означает владение целиком."""
+    share = owner.get('ownership_share')
+    return 1.0 if share is None else float(share)
+
+
+def next_seq(db, premise_id):
+    # Счётчик событий хранится в самом помещении и увеличивается атомарно
+    premise = db.premises.find_one_and_update(
+        {'_id': premise_id}, {'$inc': {'event_seq': 1}},
+        projection={'event_seq': 1}, return_document=ReturnDocument.AFTER)
+    if premise is None:
+        raise ValueError(f"Premise {premise_id} not found")
+    return premise['event_seq']
+
+
+def after_position(date, seq):
+    """Условие «событие позже позиции (date, seq)» в порядке журнала."""
+    return {'$or': [{'effective_date': {'$gt': date}},
+                    {'effective_date': date, 'seq': {'$gt': seq}}]}
+
+
+def replay(state, events):
+    """Применяет события к состоянию {owner_id: доля} и возвращает его."""
+    for event in events:
+        if event['share'] > SHARE_EPSILON:
+            state[event['owner_id']] = event['share']
+        else:
+            state.pop(event['owner_id'], None)
+    return state
+
+
+def nearest_snapshot(db, premise_id, at=None):
+    query = {'premise_id': premise_id}
+    if at is not None:
+        query['effective_date'] = {'$lte': at}
+    return db.ownership_snapshots.find_one(
+        query, sort=[('effective_date', DESCENDING), ('seq', DESCENDING)])
+
+
+def state_at(db, premise_id, at=None):
+    """Доли владельцев помещения на дату at (None — текущее состояние).
+
+    Возвращает (состояние {owner_id: доля}, число воспроизведённых событий).
+    """
+    snapshot = nearest_snapshot(db, premise_id, at)
+    query = {'premise_id': premise_id}
+    conditions = []
+    state = {}
+    if snapshot is not None:
+        state = {entry['owner_id']: entry['share'] for entry in snapshot['owners']}
+        conditions.append(after_position(snapshot['effective_date'], snapshot['seq']))
+    if at is not None:
+        conditions.append({'effective_date': {'$lte': at}})
+    if conditions:
+        query['$and'] = conditions
+    events = list(db.ownership_events.find(query, {'owner_id': 1, 'share': 1})
+                  .sort([('effective_date', ASCENDING), ('seq', ASCENDING)]))
+    return replay(state, events), len(events)
+
+
+def take_snapshot(db, premise_id):
+    """Записывает снимок текущего состояния на позицию последнего события."""
+    last = db.ownership_events.find_one(
+        {'premise_id': premise_id},
+        sort=[('effective_date', DESCENDING), ('seq', DESCENDING)])
+    if last is None:
+        return None
+    state, _ = state_at(db, premise_id)
+    snapshot = {
+        'premise_id': premise_id,
+        'effective_date': last['effective_date'],
+        'seq': last['seq'],
+        'owners': [{'owner_id': owner_id, 'share': share} for owner_id, share in state.items()],
+        'created_at': datetime.now(),
+    }
+    db.ownership_snapshots.insert_one(snapshot)
+    return snapshot
+
+
+def record_event(db, premise_id, owner_id, share, kind, effective_date=None, note=None,
+                 transfer_id=None):
+    """Добавляет событие в журнал и поддерживает снимки и документ владельца.
+
+    Событие задним числом делает недействительными снимки после его даты:
+    они удаляются, и сразу пишется новый снимок на конец журнала.
+    """
+    if share < 0 or share > 1 + SHARE_EPSILON:
+        raise ValueError(f"Share must be between 0 and 1, got {share}")
+    effective_date = effective_date or datetime.now()
+    event = {
+        'premise_id': premise_id,
+        'owner_id': owner_id,
+        'kind': kind,
+        'share': float(share),
+        'effective_date': effective_date,
+        'seq': next_seq(db, premise_id),
+        'recorded_at': datetime.now(),
+    }
+    if note:
+        event['note'] = note
+    if transfer_id is not None:
+        event['transfer_id'] = transfer_id
+    event['_id'] = db.ownership_events.insert_one(event).inserted_id
+
+    stale = db.ownership_snapshots.delete_many({'premise_id': premise_id,
+                                                'effective_date': {'$gt': effective_date}})
+    if stale.deleted_count or event['seq'] % SNAPSHOT_INTERVAL == 0:
+        take_snapshot(db, premise_id)
+    sync_owner(db, premise_id, owner_id, effective_date)
+    return event
+
+
+def sync_owner(db, premise_id, owner_id, effective_date=None):
+    """Переносит текущую долю из журнала в связь, документ владельца и сводку долей.
+
+    Документ владельца описывает его долю в своём помещении (premise_id),
+    доли во всех помещениях, включая другие, отражает ownership_links.
+    """
+    # ownership_links сам импортирует этот модуль, поэтому импорт здесь
+    from ownership_links import set_link
+
+    state, _ = state_at(db, premise_id)
+    share = state.get(owner_id)
+    set_link(db, owner_id, premise_id, share or 0.0, effective_date, source='history')
+    update = ({'ownership_share': share, 'status': 'active'} if share is not None
+              else {'status': 'inactive'})
+    before = db.owners.find_one_and_update(
+        {'_id': owner_id, 'premise_id': premise_id}, {'$set': update},
+        projection={'premise_id': 1, 'ownership_share': 1, 'status': 1})
+    if before is None:
+        return
+    apply_change(db, before, {**before, **update})
+    registry_cache.invalidate(db.owners, [owner_id])
+
+
+def current_share(db, premise_id, owner_id, at=None):
+    state, _ = state_at(db, premise_id, at)
+    return state.get(owner_id, 0.0)
+
+
+def acquire(db, premise_id, owner_id, share, effective_date=None, note=None):
+    return record_event(db, premise_id, owner_id, share, ACQUIRE, effective_date, note)
+
+
+def change_share(db, premise_id, owner_id, share, effective_date=None, note=None):
+    return record_event(db, premise_id, owner_id, share, CHANGE, effective_date, note)
+
+
+def release(db, premise_id, owner_id, effective_date=None, note=None):
+    return record_event(db, premise_id, owner_id, 0.0, RELEASE, effective_date, note)
+
+
+def transfer(db, premise_id, from_owner_id, to_owner_id, share=None, effective_date=None,
+             note=None):
+    """Передаёт долю (по умолчанию всю) от одного владельца другому.
+
+    Пишутся два события с общим transfer_id: уменьшение доли продавца и
+    увеличение доли покупателя.
+    """
+    if from_owner_id == to_owner_id:
+        raise ValueError("Cannot transfer a share to the same owner")
+    effective_date = effective_date or datetime.now()
+    state, _ = state_at(db, premise_id, effective_date)
+    held = state.get(from_owner_id, 0.0)
+    if share is None:
+        share = held
+    if share <= 0 or share > held + SHARE_EPSILON:
+        raise ValueError(f"Owner holds {held:g} of the premise, cannot transfer {share:g}")
+    transfer_id = ObjectId()
+    outgoing = record_event(db, premise_id, from_owner_id, max(held - share, 0.0), TRANSFER_OUT,
+                            effective_date, note, transfer_id)
+    incoming = record_event(db, premise_id, to_owner_id, state.get(to_owner_id, 0.0) + share,
+                            TRANSFER_IN, effective_date, note, transfer_id)
+    return outgoing, incoming
+
+
+def owners_on(db, premise_id, at):
+    """Владельцы помещения на дату: документы владельцев с полем share."""
+    state, _ = state_at(db, premise_id, at)
+    if not state:
+        return []
+    owners = {owner['_id']: owner for owner in db.owners.find({'_id': {'$in': list(state)}})}
+    result = []
+    for owner_id, share in state.items():
+        owner = dict(owners.get(owner_id, {'_id': owner_id}))
+        owner['share'] = share
+        result.append(owner)
+    return sorted(result, key=lambda owner: -owner['share'])
+
+
+def owner_history(db, owner_id, limit=1000):
+    """Все события владельца по всем помещениям в хронологическом порядке."""
+    return list(db.ownership_events.find({'owner_id': owner_id})
+                .sort([('effective_date', ASCENDING), ('seq', ASCENDING)]).limit(limit))
+
+
+def premise_history(db, premise_id, limit=1000):
+    return list(db.ownership_events.find({'premise_id': premise_id})
+                .sort([('effective_date', ASCENDING), ('seq', ASCENDING)]).limit(limit))
+
+
+def backfill_events(db, progress=None):
+    """Создаёт события acquire для владельцев, добавленных до появления журнала.
+
+    Дата события — дата выдачи документа или время создания записи. Уже
+    имеющие события владельцы пропускаются; возвращает число новых событий.
+    """
+    known = set(db.ownership_events.distinct('owner_id'))
+    created = 0
+    cursor = db.owners.find({'premise_id': {'$ne': None}},
+                            {'premise_id': 1, 'ownership_share': 1, 'status': 1, 'document': 1})
+    for owner in cursor:
+        if owner['_id'] in known or owner.get('status') == 'inactive':
+            continue
+        acquire(db, owner['premise_id'], owner['_id'], owner_share(owner), owner_since(owner),
+                note="backfill")
+        created += 1
+        if progress is not None:
+            progress(created)
+    return created
@@ -0,0 +1,216 @@
+"""Связи владелец — помещение (многие ко многим) и запросы портфеля.
+
+ownership_links хранит по документу на пару (owner_id, premise_id): текущую
+долю, признак active, дом помещения и даты since/until. Индексы в обе
+стороны — owner_premise (уникальный) и premise_owner — отдают портфель
+владельца и владельцев помещения диапазоном одного индекса, без обхода
+owners и журнала владения, сколько бы связей ни было в коллекции.
+
+Связи, созданные через журнал владения, обновляет ownership.sync_owner при
+каждом событии; backfill создаёт их из уже накопленных ownership_events и
+owners.premise_id. bulk_import.import_links_file пишет связи пакетами в
+обход журнала: это только текущее состояние, поэтому история владения,
+владельцы на дату и сводка premise_shares (check-shares) такие связи не
+видят, пока по паре не будет записано событие.
+"""
+import time
+from datetime import datetime
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from ownership import SHARE_EPSILON, owner_share, owner_since
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+LINK_PROJECTION = {'owner_id': 1, 'premise_id': 1, 'house_id': 1, 'share': 1,
+                   'active': 1, 'since': 1, 'until': 1}
+
+
+def link_change(share, house_id=None, effective_date=None, source=None):
+    """Обновление связи до доли share на дату effective_date.
+
+    since — дата первого приобретения ($min переживает события задним
+    числом), until — дата выбытия, пока связь неактивна.
+    """
+    effective_date = effective_date or datetime.now()
+    active = share > SHARE_EPSILON
+    fields = {'share': float(share) if active else 0.0, 'active': active,
+              'updated_at': datetime.now()}
+    if house_id is not None:
+        fields['house_id'] = house_id
+    update = {'$set': fields}
+    if active:
+        update['$min'] = {'since': effective_date}
+        update['$unset'] = {'until': ''}
+    else:
+        fields['until'] = effective_date
+    if source is not None:
+        update['$setOnInsert'] = {'source': source}
+    return update
+
+
+def link_update(owner_id, premise_id, share, house_id=None, effective_date=None, source=None):
+    return UpdateOne({'owner_id': owner_id, 'premise_id': premise_id},
+                     link_change(share, house_id, effective_date, source), upsert=True)
+
+
+def set_link(db, owner_id, premise_id, share, effective_date=None, source=None):
+    """Записывает текущую долю владельца в помещении (0 — владелец выбыл)."""
+    premise = db.premises.find_one({'_id': premise_id}, {'house_id': 1}) or {}
+    db.ownership_links.update_one(
+        {'owner_id': owner_id, 'premise_id': premise_id},
+        link_change(share, premise.get('house_id'), effective_date, source), upsert=True)
+
+
+def write_links(db, requests, report, batch_size=DEFAULT_BATCH_SIZE, row_numbers=None,
+                progress=None):
+    """Выполняет UpdateOne связей пакетами bulk_write(ordered=False).
+
+    Ошибки отдельных связей записываются в report и не прерывают запись;
+    row_numbers — номера строк файла для сообщений об ошибках.
+    """
+    for batch_number, start in enumerate(range(0, len(requests), batch_size), 1):
+        batch = requests[start:start + batch_size]
+        try:
+            result = db.ownership_links.bulk_write(batch, ordered=False)
+            report.links_inserted += result.upserted_count
+            report.links_updated += result.modified_count
+        except BulkWriteError as e:
+            report.links_inserted += e.details.get('nUpserted', 0)
+            report.links_updated += e.details.get('nModified', 0)
+            for error in e.details.get('writeErrors', []):
+                position = start + error['index']
+                row = int(row_numbers[position]) if row_numbers is not None else None
+                report.failures.append(("links", batch_number, row, error.get('errmsg', '')))
+        except PyMongoError as e:
+            report.failures.append(("links", batch_number, None, str(e)))
+        if progress is not None:
+            progress(len(batch))
+
+
+def documents_by_id(collection, ids, projection):
+    ids = [value for value in set(ids) if value is not None]
+    if not ids:
+        return {}
+    return {document['_id']: document
+            for document in collection.find({'_id': {'$in': ids}}, projection)}
+
+
+def houses_of_premises(db, premise_ids):
+    return {premise_id: premise.get('house_id') for premise_id, premise
+            in documents_by_id(db.premises, premise_ids, {'house_id': 1}).items()}
+
+
+def find_links(db, field, value, include_inactive, sort_field, limit):
+    query = {field: value}
+    if not include_inactive:
+        query['active'] = True
+    return list(db.ownership_links.find(query, LINK_PROJECTION)
+                .sort(sort_field, ASCENDING).limit(limit))
+
+
+def portfolio(db, owner_id, include_inactive=False, limit=1000):
+    """Помещения владельца с адресом дома и долей (индекс owner_premise)."""
+    links = find_links(db, 'owner_id', owner_id, include_inactive, 'premise_id', limit)
+    premises = documents_by_id(db.premises, [link['premise_id'] for link in links],
+                               {'number': 1, 'area': 1})
+    houses = documents_by_id(db.houses, [link.get('house_id') for link in links],
+                             {'address': 1})
+    result = []
+    for link in links:
+        premise = premises.get(link['premise_id'], {})
+        house = houses.get(link.get('house_id'), {})
+        result.append({
+            '_id': link['premise_id'],
+            'house_id': link.get('house_id'),
+            'address': house.get('address'),
+            'number': premise.get('number'),
+            'area': premise.get('area'),
+            'share': link['share'],
+            'active': link['active'],
+            'since': link.get('since'),
+            'until': link.get('until'),
+        })
+    return result
+
+
+def premise_owners(db, premise_id, include_inactive=False, limit=1000):
+    """Владельцы помещения с документом и долей (индекс premise_owner)."""
+    links = find_links(db, 'premise_id', premise_id, include_inactive, 'owner_id', limit)
+    owners = documents_by_id(db.owners, [link['owner_id'] for link in links],
+                             {'first_name': 1, 'last_name': 1, 'document.number': 1})
+    result = []
+    for link in links:
+        owner = owners.get(link['owner_id'], {})
+        result.append({
+            '_id': link['owner_id'],
+            'first_name': owner.get('first_name'),
+            'last_name': owner.get('last_name'),
+            'document': owner.get('document'),
+            'share': link['share'],
+            'active': link['active'],
+            'since': link.get('since'),
+            'until': link.get('until'),
+        })
+    return sorted(result, key=lambda owner: -owner['share'])
+
+
+def backfill(db, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Создаёт связи по журналу владения и по owners.premise_id.
+
+    Для пар из журнала берётся доля последнего события, для владельцев без
+    событий — ownership_share и status документа. Существующие связи
+    обновляются, поэтому повторный запуск безопасен. Возвращает
+    bulk_import.LinkReport.
+    """
+    # bulk_import сам импортирует этот модуль и тянет pandas, поэтому импорт здесь
+    from bulk_import import LinkReport
+
+    report = LinkReport()
+    started = time.perf_counter()
+    pending = []
+
+    def flush():
+        houses = houses_of_premises(db, [premise_id for _, premise_id, _, _ in pending])
+        requests = [link_update(owner_id, premise_id, share, houses.get(premise_id), date,
+                                'backfill')
+                    for owner_id, premise_id, share, date in pending]
+        write_links(db, requests, report, batch_size, progress=progress)
+        report.rows += len(pending)
+        pending.clear()
+
+    # Последнее событие каждой пары в порядке журнала; сортировка идёт по индексу premise_date_seq
+    latest = db.ownership_events.aggregate([
+        {'$sort': {'premise_id': ASCENDING, 'effective_date': ASCENDING, 'seq': ASCENDING}},
+        {'$group': {'_id': {'owner_id': '$owner_id', 'premise_id': '$premise_id'},
+                    'share': {'$last': '$share'},
+                    'first_date': {'$first': '$effective_date'},
+                    'last_date': {'$last': '$effective_date'}}},
+    ], allowDiskUse=True)
+    for pair in latest:
+        # Для активной связи $min оставит дату первого события, для выбывшего — дату выбытия
+        date = pair['first_date'] if pair['share'] > SHARE_EPSILON else pair['last_date']
+        pending.append((pair['_id']['owner_id'], pair['_id']['premise_id'], pair['share'], date))
+        if len(pending) >= batch_size:
+            flush()
+
+    # Владельцы без событий отбираются на сервере: $lookup идёт по индексу
+    # owner_date_seq, и список владельцев с событиями не держится в памяти
+    without_events = db.owners.aggregate([
+        {'$match': {'premise_id': {'$ne': None}}},
+        {'$lookup': {'from': 'ownership_events', 'localField': '_id',
+                     'foreignField': 'owner_id', 'as': 'events'}},
+        {'$match': {'events': {'$size': 0}}},
+        {'$project': {'premise_id': 1, 'ownership_share': 1, 'status': 1, 'document': 1}},
+    ], allowDiskUse=True)
+    for owner in without_events:
+        share = owner_share(owner) if owner.get('status') != 'inactive' else 0.0
+        pending.append((owner['_id'], owner['premise_id'], share, owner_since(owner)))
+        if len(pending) >= batch_size:
+            flush()
+    if pending:
+        flush()
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,315 @@
+from datetime import datetime, time
+
+from PyQt6.QtCore import QDate, pyqtSignal
+from PyQt6.QtGui import QDoubleValidator
+from PyQt6.QtWidgets import (QWidget, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
+                             QDateEdit, QLineEdit, QPushButton, QTableView, QAbstractItemView,
+                             QMessageBox)
+
+from columns import (INCONSISTENT_PREMISE_COLUMNS, OWNERS_ON_DATE_COLUMNS,
+                     OWNERSHIP_EVENT_COLUMNS, PORTFOLIO_COLUMNS)
+from jobs import start_job
+from share_totals import rebuild
+from table_models import DocumentTableModel
+
+
+CHANGE_SHARE = 'change'
+RELEASE = 'release'
+TRANSFER = 'transfer'
+
+
+def effective_date(date_edit):
+    """Дата события из QDateEdit: сегодня — текущее время, иначе начало дня.
+
+    Событие за сегодня должно идти после уже записанных сегодня событий,
+    поэтому его время — «сейчас», а не полночь.
+    """
+    date = date_edit.date().toPyDate()
+    if date == datetime.now().date():
+        return None
+    return datetime.combine(date, time.min)
+
+
+class OwnershipHistoryView(QWidget):
+    """История владения выбранного владельца и состав владельцев на дату.
+
+    Слева — события владельца (или его помещения) либо его портфель по
+    ownership_links, справа — владельцы помещения на выбранную дату:
+    ближайший снимок плюс воспроизведение событий после него (см.
+    ownership.py). Щелчок по строке портфеля выбирает это помещение.
+    Кнопки Change share, Release и Transfer пишут события в журнал для
+    выбранного владельца и помещения.
+    """
+
+    # _id помещения, доли в котором изменились
+    ownership_changed = pyqtSignal(object)
+
+    def __init__(self, repository, parent=None):
+        super().__init__(parent)
+        self.repository = repository
+        self.owner_id = None
+        self.premise_id = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        controls = QHBoxLayout()
+        self.title = QLabel("Ownership history: select an owner")
+        self.scope = QComboBox()
+        self.scope.addItem("Owner history", 'owner')
+        self.scope.addItem("Premise history", 'premise')
+        self.scope.addItem("Portfolio", 'portfolio')
+        self.scope.currentIndexChanged.connect(self.load_history)
+        self.date_edit = QDateEdit(QDate.currentDate())
+        self.date_edit.setCalendarPopup(True)
+        self.date_edit.setDisplayFormat("dd.MM.yyyy")
+        owners_on_button = QPushButton("Owners on date")
+        owners_on_button.clicked.connect(self.load_owners_on_date)
+        controls.addWidget(self.title)
+        controls.addStretch()
+        controls.addWidget(self.scope)
+        controls.addWidget(QLabel("On:"))
+        controls.addWidget(self.date_edit)
+        controls.addWidget(owners_on_button)
+
+        actions = QHBoxLayout()
+        self.action_buttons = []
+        for text, kind in (("Change share", CHANGE_SHARE), ("Release", RELEASE),
+                           ("Transfer", TRANSFER)):
+            button = QPushButton(text)
+            button.clicked.connect(lambda _checked, kind=kind: self.change_ownership(kind))
+            button.setEnabled(False)
+            actions.addWidget(button)
+            self.action_buttons.append(button)
+        actions.addStretch()
+
+        tables = QHBoxLayout()
+        self.events_model = DocumentTableModel(OWNERSHIP_EVENT_COLUMNS, self)
+        self.portfolio_model = DocumentTableModel(PORTFOLIO_COLUMNS, self)
+        self.owners_model = DocumentTableModel(OWNERS_ON_DATE_COLUMNS, self)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.events_model)
+        self.history_table.clicked.connect(self.select_portfolio_premise)
+        owners_table = QTableView()
+        owners_table.setModel(self.owners_model)
+        for table in (self.history_table, owners_table):
+            table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+            table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            table.horizontalHeader().setStretchLastSection(True)
+        tables.addWidget(self.history_table, 3)
+        tables.addWidget(owners_table, 2)
+
+        layout.addLayout(controls)
+        layout.addLayout(actions)
+        layout.addLayout(tables)
+
+    def show_owner(self, owner_id):
+        self.owner_id = owner_id
+        owner = None
+        if owner_id is not None:
+            try:
+                owner = self.repository.owners.find_one(
+                    {'_id': owner_id}, {'first_name': 1, 'last_name': 1, 'premise_id': 1})
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to load owner: {str(e)}")
+        self.premise_id = owner.get('premise_id') if owner is not None else None
+        if owner is None:
+            self.title.setText("Ownership history: select an owner")
+        else:
+            name = f"{owner.get('last_name', '')} {owner.get('first_name', '')}".strip()
+            self.title.setText(f"Ownership history: {name or owner_id}")
+        self.update_actions()
+        self.load_history()
+        self.load_owners_on_date()
+
+    def update_actions(self):
+        enabled = self.owner_id is not None and self.premise_id is not None
+        for button in self.action_buttons:
+            button.setEnabled(enabled)
+
+    def change_ownership(self, kind):
+        owner_id, premise_id = self.owner_id, self.premise_id
+        if owner_id is None or premise_id is None:
+            return
+        try:
+            held = self.repository.current_share(premise_id, owner_id)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load the current share: {str(e)}")
+            return
+        dialog = OwnershipChangeDialog(kind, held, self)
+        if not dialog.exec():
+            return
+        try:
+            date, note = effective_date(dialog.date_edit), dialog.note.text().strip() or None
+            share = dialog.share_value()
+            if kind == CHANGE_SHARE:
+                if share is None:
+                    raise ValueError("Enter the new share")
+                self.repository.change_share(premise_id, owner_id, share, date, note)
+            elif kind == RELEASE:
+                self.repository.release(premise_id, owner_id, date, note)
+            else:
+                number = dialog.document.text().strip()
+                target = self.repository.owner_by_document(number) if number else None
+                if target is None:
+                    raise ValueError(f"No owner with document '{number}'")
+                self.repository.transfer(premise_id, owner_id, target['_id'], share, date, note)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to record the change: {str(e)}")
+            return
+        self.ownership_changed.emit(premise_id)
+        self.load_history()
+        self.load_owners_on_date()
+
+    def load_history(self):
+        if self.scope.currentData() == 'portfolio':
+            self.history_table.setModel(self.portfolio_model)
+            self.load_portfolio()
+            return
+        self.history_table.setModel(self.events_model)
+        events = []
+        try:
+            if self.scope.currentData() == 'premise':
+                if self.premise_id is not None:
+                    events = self.repository.premise_history(self.premise_id)
+            elif self.owner_id is not None:
+                events = self.repository.owner_history(self.owner_id)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load ownership history: {str(e)}")
+        self.events_model.set_documents(events)
+
+    def load_portfolio(self):
+        premises = []
+        if self.owner_id is not None:
+            try:
+                premises = self.repository.portfolio(self.owner_id)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to load portfolio: {str(e)}")
+        self.portfolio_model.set_documents(premises)
+
+    def select_portfolio_premise(self, index):
+        if self.scope.currentData() != 'portfolio':
+            return
+        premise_id = self.portfolio_model.document_id(index.row())
+        if premise_id is not None:
+            self.premise_id = premise_id
+            self.update_actions()
+            self.load_owners_on_date()
+
+    def load_owners_on_date(self):
+        owners = []
+        if self.premise_id is not None:
+            # Дата включает весь выбранный день
+            at = datetime.combine(self.date_edit.date().toPyDate(), time.max)
+            try:
+                owners = self.repository.owners_on(self.premise_id, at)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to load owners on date: {str(e)}")
+        self.owners_model.set_documents(owners)
+
+
+class OwnershipChangeDialog(QDialog):
+    """Параметры события журнала: новая доля, выбытие или передача доли."""
+
+    TITLES = {CHANGE_SHARE: "Change share", RELEASE: "Release", TRANSFER: "Transfer share"}
+
+    def __init__(self, kind, held, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(self.TITLES[kind])
+        self.setMinimumWidth(300)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Current share: {held:g}"))
+
+        self.share = QLineEdit()
+        share_validator = QDoubleValidator(0.0, 1.0, 6)
+        share_validator.setNotation(QDoubleValidator.Notation.StandardNotation)
+        self.share.setValidator(share_validator)
+        self.document = QLineEdit()
+        if kind == CHANGE_SHARE:
+            layout.addWidget(QLabel("New share:"))
+            layout.addWidget(self.share)
+        elif kind == TRANSFER:
+            self.share.setPlaceholderText("whole share")
+            layout.addWidget(QLabel("Share to transfer:"))
+            layout.addWidget(self.share)
+            layout.addWidget(QLabel("To owner (document number):"))
+            layout.addWidget(self.document)
+
+        self.date_edit = QDateEdit(QDate.currentDate())
+        self.date_edit.setCalendarPopup(True)
+        self.date_edit.setDisplayFormat("dd.MM.yyyy")
+        self.note = QLineEdit()
+        layout.addWidget(QLabel("Effective date:"))
+        layout.addWidget(self.date_edit)
+        layout.addWidget(QLabel("Note:"))
+        layout.addWidget(self.note)
+
+        buttons = QHBoxLayout()
+        save_button = QPushButton("Save")
+        cancel_button = QPushButton("Cancel")
+        save_button.clicked.connect(self.accept)
+        cancel_button.clicked.connect(self.reject)
+        buttons.addWidget(save_button)
+        buttons.addWidget(cancel_button)
+        layout.addLayout(buttons)
+
+    def share_value(self):
+        # Валидатор принимает десятичный разделитель локали
+        text = self.share.text().strip().replace(',', '.')
+        return float(text) if text else None
+
+
+class InconsistentPremisesDialog(QDialog):
+    """Помещения, у которых сумма долей активных владельцев не равна 1.
+
+    Список читается из сводки premise_shares по индексу; Recalculate
+    пересчитывает сводку по owners, если данные меняли в обход приложения.
+    """
+
+    def __init__(self, repository, parent=None):
+        super().__init__(parent)
+        self.repository = repository
+        self.setWindowTitle("Inconsistent ownership shares")
+        self.resize(700, 450)
+        layout = QVBoxLayout(self)
+
+        self.summary = QLabel()
+        self.model = DocumentTableModel(INCONSISTENT_PREMISE_COLUMNS, self)
+        table = QTableView()
+        table.setModel(self.model)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.horizontalHeader().setStretchLastSection(True)
+
+        buttons = QHBoxLayout()
+        refresh_button = QPushButton("Refresh")
+        recalculate_button = QPushButton("Recalculate")
+        close_button = QPushButton("Close")
+        refresh_button.clicked.connect(self.load)
+        recalculate_button.clicked.connect(self.recalculate)
+        close_button.clicked.connect(self.accept)
+        buttons.addWidget(refresh_button)
+        buttons.addWidget(recalculate_button)
+        buttons.addStretch()
+        buttons.addWidget(close_button)
+
+        layout.addWidget(self.summary)
+        layout.addWidget(table)
+        layout.addLayout(buttons)
+        self.load()
+
+    def load(self):
+        try:
+            premises = self.repository.inconsistent_premises()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load share totals: {str(e)}")
+            premises = []
+        self.model.set_documents(premises)
+        self.summary.setText(f"Premises whose owner shares do not add up to 1: {len(premises)}"
+                             if premises else "All premises with owners add up to 1")
+
+    def recalculate(self):
+        db = self.repository.db
+        start_job(self, "Recalculating share totals", lambda job: rebuild(db),
+                  on_finished=lambda count: self.load(),
+                  on_failed=lambda message: QMessageBox.critical(
+                      self, "Error", f"Recalculation failed: {message}"))
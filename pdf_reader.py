@@ -0,0 +1,173 @@
+import re
+
+import pandas as pd
+
+from process_pool import default_workers, process_pool
+from statements import STATEMENT_HEADERS
+
+
+# Страниц на одну задачу пула: меньше — лучше баланс, больше — меньше
+# повторных открытий файла в рабочих процессах
+PAGES_PER_TASK = 8
+
+DATE_PATTERN = re.compile(r'^\d{2}\.\d{2}\.\d{4}')
+_HEADER_CELLS = {header.lower() for header in STATEMENT_HEADERS}
+PURPOSE_POSITION = STATEMENT_HEADERS.index("Назначение платежа")
+
+# Ключ DataFrame.attrs порции: сообщения о пропущенных строках таблиц
+PARSE_WARNINGS = 'parse_warnings'
+
+
+def clean_cell(value):
+    if value is None:
+        return None
+    text = ' '.join(str(value).split())
+    return text or None
+
+
+def is_header(cells):
+    named = [cell.lower() for cell in cells if cell]
+    return bool(named) and sum(cell in _HEADER_CELLS for cell in named) >= len(named) // 2 + 1
+
+
+def continuation(cells, width):
+    """Текст переноса назначения платежа или None, если это не перенос.
+
+    pdfplumber дополняет строки таблицы пустыми ячейками, поэтому перенос —
+    строка, где заполнена только колонка назначения (или единственная ячейка).
+    """
+    if len(cells) == 1:
+        return cells[0]
+    if len(cells) != width or not cells[PURPOSE_POSITION]:
+        return None
+    if any(cell for position, cell in enumerate(cells) if position != PURPOSE_POSITION):
+        return None
+    return cells[PURPOSE_POSITION]
+
+
+def table_rows(table, width, page=None, warnings=None):
+    """Строки операций таблицы страницы, приведённые к ширине выписки.
+
+    Строки другой ширины пропускаются; если передан warnings, в него
+    добавляется сообщение с номером страницы.
+    """
+    rows = []
+    for raw in table:
+        cells = [clean_cell(value) for value in raw]
+        # Лишние пустые колонки справа не меняют ширину строки
+        while len(cells) > width and not cells[-1]:
+            cells.pop()
+        if not any(cells) or is_header(cells):
+            continue
+        text = continuation(cells, width)
+        if text is not None:
+            if rows:
+                last = rows[-1]
+                last[PURPOSE_POSITION] = ' '.join(filter(None, (last[PURPOSE_POSITION], text)))
+            elif warnings is not None:
+                warnings.append(f"стр. {page}: перенос назначения без строки операции: {text}")
+            continue
+        if len(cells) != width:
+            if warnings is not None:
+                warnings.append(f"стр. {page}: строка таблицы из {len(cells)} колонок "
+                                f"вместо {width} пропущена: {' | '.join(filter(None, cells))}")
+            continue
+        rows.append(cells)
+    return rows
+
+
+def text_rows(text, width):
+    """Запасной разбор текстового слоя: колонки разделены двумя и более пробелами."""
+    rows = []
+    for line in (text or '').splitlines():
+        cells = [clean_cell(cell) for cell in re.split(r'\s{2,}', line.strip())]
+        if len(cells) >= width and any(DATE_PATTERN.match(cell or '') for cell in cells):
+            rows.append(cells[:width])
+    return rows
+
+
+def parse_pages(file_name, start, stop):
+    """Разбирает страницы [start, stop) в рабочем процессе.
+
+    Возвращает (строки операций, сообщения о пропущенных строках таблиц).
+    """
+    import pdfplumber
+
+    width = len(STATEMENT_HEADERS)
+    rows = []
+    warnings = []
+    with pdfplumber.open(file_name, pages=list(range(start + 1, stop + 1))) as pdf:
+        for page in pdf.pages:
+            page_rows = []
+            page_warnings = []
+            for table in page.extract_tables():
+                page_rows.extend(table_rows(table, width, page.page_number, page_warnings))
+            if not page_rows:
+                page_rows = text_rows(page.extract_text(), width)
+                if page_rows:
+                    # Страница прочитана по текстовому слою, таблица не нужна
+                    page_warnings = []
+            rows.extend(page_rows)
+            warnings.extend(page_warnings)
+            page.close()
+    return rows, warnings
+
+
+def page_count(file_name):
+    import pdfplumber
+
+    with pdfplumber.open(file_name) as pdf:
+        return len(pdf.pages)
+
+
+def read_pdf_chunks(file_name, chunksize, workers=None):
+    """Читает таблицу операций из PDF с текстовым слоем.
+
+    Страницы разбираются пачками в пуле процессов; результаты отдаются
+    порциями в порядке страниц, не дожидаясь конца файла. Колонки —
+    STATEMENT_HEADERS, как у выписки из Excel. Сообщения о пропущенных
+    строках таблиц лежат в attrs[PARSE_WARNINGS] той порции, где они
+    встретились.
+    """
+    total = page_count(file_name)
+    if total == 0:
+        return
+    workers = workers or default_workers()
+    ranges = [(start, min(start + PAGES_PER_TASK, total))
+              for start in range(0, total, PAGES_PER_TASK)]
+    if workers == 1:
+        # Уже внутри рабочего процесса (пакетный импорт) — без вложенного пула
+        yield from _chunks((parse_pages(file_name, start, stop) for start, stop in ranges),
+                           chunksize)
+        return
+
+    executor = process_pool(min(workers, len(ranges)))
+    futures = [executor.submit(parse_pages, file_name, start, stop) for start, stop in ranges]
+    try:
+        yield from _chunks((future.result() for future in futures), chunksize)
+    finally:
+        # Прерванный импорт не должен дожидаться разбора оставшихся страниц
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _chunks(page_results, chunksize):
+    pending = []
+    warnings = []
+    row_number = 0
+    for rows, page_warnings in page_results:
+        pending.extend(rows)
+        warnings.extend(page_warnings)
+        while len(pending) >= chunksize:
+            chunk, pending = pending[:chunksize], pending[chunksize:]
+            yield _frame(chunk, row_number, warnings)
+            warnings = []
+            row_number += len(chunk)
+    if pending or warnings:
+        yield _frame(pending, row_number, warnings)
+
+
+def _frame(rows, start, warnings):
+    frame = pd.DataFrame(rows, columns=STATEMENT_HEADERS)
+    frame.index = pd.RangeIndex(start, start + len(rows))
+    frame.attrs[PARSE_WARNINGS] = warnings
+    return frame
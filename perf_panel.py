@@ -0,0 +1,171 @@
+import os
+
+from PyQt6.QtCore import Qt, QObject, QTimer
+from PyQt6.QtGui import QKeySequence, QShortcut
+from PyQt6.QtWidgets import (QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QTableWidget, QTableWidgetItem, QLabel, QPlainTextEdit,
+                             QHeaderView, QFileDialog, QMessageBox)
+
+from metrics import export_snapshot, metrics
+
+
+# Периодический экспорт: путь (.prom — Prometheus, иначе JSON-lines) и интервал
+METRICS_FILE_ENV = 'REGISTRY_METRICS_FILE'
+METRICS_INTERVAL_ENV = 'REGISTRY_METRICS_INTERVAL'
+DEFAULT_EXPORT_INTERVAL = 60
+
+SPAN_HEADERS = ["Span", "Count", "Total ms", "Mean ms", "Max ms", "Last ms"]
+
+
+class MetricsExporter(QObject):
+    """Пишет снимок metrics в файл по таймеру и при остановке."""
+
+    def __init__(self, path, interval_seconds=DEFAULT_EXPORT_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(interval_seconds * 1000))
+        self.timer.timeout.connect(self.export)
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.export()
+
+    def export(self):
+        try:
+            export_snapshot(self.path)
+        except OSError:
+            # Недоступный файл метрик не должен мешать работе окна
+            metrics.count('metrics.export_failed')
+
+
+def exporter_from_env(parent=None):
+    path = os.environ.get(METRICS_FILE_ENV)
+    if not path:
+        return None
+    interval = float(os.environ.get(METRICS_INTERVAL_ENV, DEFAULT_EXPORT_INTERVAL))
+    exporter = MetricsExporter(path, interval, parent)
+    exporter.start()
+    return exporter
+
+
+def install_perf_panel(window, button):
+    """Добавляет PerfPanel в окно; button (checkable) и Ctrl+Shift+P показывают её."""
+    panel = PerfPanel(window)
+    window.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, panel)
+    panel.hide()
+    button.toggled.connect(panel.setVisible)
+    panel.visibilityChanged.connect(button.setChecked)
+    shortcut = QShortcut(QKeySequence('Ctrl+Shift+P'), window)
+    shortcut.activated.connect(button.toggle)
+    return panel
+
+
+class PerfPanel(QDockWidget):
+    """Панель производительности: spans, счётчики и профиль последнего действия.
+
+    Пока панель видна, таблица обновляется раз в секунду. Profile next
+    action включает cProfile для следующего действия (обновление, фильтр,
+    импорт); путь к .prof и первые строки отчёта показываются внизу.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__("Performance", parent)
+        self.setObjectName("performance_panel")
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        self.table = QTableWidget(0, len(SPAN_HEADERS))
+        self.table.setHorizontalHeaderLabels(SPAN_HEADERS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.counters_label = QLabel()
+        self.counters_label.setWordWrap(True)
+
+        buttons = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        self.profile_button = QPushButton("Profile next action")
+        self.profile_button.setCheckable(True)
+        export_button = QPushButton("Export...")
+        reset_button.clicked.connect(self.reset)
+        self.profile_button.toggled.connect(self.toggle_profile)
+        export_button.clicked.connect(self.export)
+        buttons.addWidget(reset_button)
+        buttons.addWidget(self.profile_button)
+        buttons.addWidget(export_button)
+        buttons.addStretch()
+
+        self.profile_output = QPlainTextEdit()
+        self.profile_output.setReadOnly(True)
+        self.profile_output.setMaximumHeight(160)
+        self.profile_output.setPlaceholderText("No profile captured")
+
+        layout.addLayout(buttons)
+        layout.addWidget(self.table)
+        layout.addWidget(self.counters_label)
+        layout.addWidget(self.profile_output)
+        self.setWidget(widget)
+
+        self._shown_summary = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.visibility_changed)
+
+    def visibility_changed(self, visible):
+        if visible:
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        spans = sorted(snapshot['spans'].items(), key=lambda item: item[1]['total_ms'],
+                       reverse=True)
+        self.table.setRowCount(len(spans))
+        for row, (name, stats) in enumerate(spans):
+            values = [name, stats['count'], stats['total_ms'], stats['mean_ms'],
+                      stats['max_ms'], stats['last_ms']]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(f"{value:.1f}" if isinstance(value, float) else str(value))
+                if column:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight
+                                          | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row, column, item)
+        values = {**snapshot['counters'], **snapshot['gauges']}
+        self.counters_label.setText(", ".join(f"{name}: {value}"
+                                              for name, value in sorted(values.items())))
+
+        profiler = metrics.profiler
+        if self.profile_button.isChecked() and not profiler.armed:
+            # Профиль записан — кнопка возвращается в исходное состояние
+            self.profile_button.setChecked(False)
+        if profiler.last_summary is not None and profiler.last_summary is not self._shown_summary:
+            self._shown_summary = profiler.last_summary
+            header = f"Saved to {profiler.last_path}\n" if profiler.last_path else ""
+            self.profile_output.setPlainText(header + profiler.last_summary)
+
+    def toggle_profile(self, enabled):
+        if enabled:
+            metrics.profiler.arm()
+        else:
+            metrics.profiler.disarm()
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
+
+    def export(self):
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Export metrics", "", "JSON Lines (*.jsonl);;Prometheus (*.prom)")
+        if not file_name:
+            return
+        try:
+            export_snapshot(file_name)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to export metrics: {str(e)}")
@@ -0,0 +1,15 @@
+"""Пул процессов для разбора файлов: пакетный импорт и страницы PDF."""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def process_pool(workers):
+    # spawn: пул создаётся из рабочего потока Qt, а fork многопоточного
+    # процесса копирует чужие блокировки в дочерние процессы
+    return ProcessPoolExecutor(max_workers=workers,
+                               mp_context=multiprocessing.get_context('spawn'))
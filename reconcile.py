@@ -0,0 +1,215 @@
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+from registry_cache import registry_cache
+from statements import normalize_statement, parse_amounts
+from validation import as_text
+
+
+MATCHED = "Сопоставлен"
+AMBIGUOUS = "Неоднозначно"
+UNMATCHED = "Не найден"
+
+RESULT_COLUMNS = [
+    "Строка", "ФИО", "Номер счета", "Сумма", "Результат", "Способ",
+    "Владелец", "ID владельца", "Помещение", "Сходство", "Кандидатов",
+]
+
+# Длина префикса фамилии, по которому строятся блоки нечёткого сравнения
+BLOCK_PREFIX = 3
+NAME_THRESHOLD = 0.85
+# Если второй кандидат ближе к лучшему, чем на это значение, совпадение неоднозначно
+AMBIGUITY_MARGIN = 0.03
+
+# Серия и номер паспорта в назначении платежа: «45 06 123456», «4506123456»
+DOCUMENT_PATTERN = r'(?<!\d)(\d{2}\s?\d{2}\s?\d{6})(?!\d)'
+
+OWNER_PROJECTION = {'first_name': 1, 'last_name': 1, 'document.number': 1,
+                    'account': 1, 'premise_id': 1}
+
+
+def normalize_name(series):
+    text = as_text(series).str.lower().str.replace('ё', 'е')
+    text = text.str.replace(r'[^a-zа-я\s-]', ' ', regex=True)
+    return text.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def digits_only(series):
+    return as_text(series).str.replace(r'\D', '', regex=True)
+
+
+def load_owners(db):
+    """Владельцы в виде таблицы с нормализованными ключами сопоставления.
+
+    Таблица хранится в registry_cache до первой записи в owners.
+    """
+    return registry_cache.get_or_load(
+        ('owners_frame', db.owners.full_name), lambda: read_owners(db),
+        lambda frame: int(frame.memory_usage(deep=True).sum()),
+        {db.owners.full_name: None})
+
+
+def read_owners(db):
+    documents = list(db.owners.find({}, OWNER_PROJECTION))
+    frame = pd.DataFrame({
+        'owner_id': [document['_id'] for document in documents],
+        'premise_id': [document.get('premise_id') for document in documents],
+        'last_name': [document.get('last_name') for document in documents],
+        'first_name': [document.get('first_name') for document in documents],
+        'account': [document.get('account') for document in documents],
+        'document': [(document.get('document') or {}).get('number')
+                     for document in documents],
+    })
+    return prepare_owners(frame)
+
+
+def prepare_owners(frame):
+    owners = frame.reset_index(drop=True).copy()
+    owners['owner_name'] = (as_text(owners['last_name']) + ' '
+                            + as_text(owners['first_name'])).str.strip()
+    owners['name_key'] = normalize_name(owners['owner_name'])
+    owners['account_key'] = digits_only(owners['account'])
+    owners['document_key'] = digits_only(owners['document'])
+    owners['block'] = owners['name_key'].str[:BLOCK_PREFIX]
+    return owners
+
+
+def prepare_payments(statement):
+    frame = normalize_statement(statement)
+    payments = pd.DataFrame({
+        'row': np.arange(len(frame)),
+        'payer': as_text(frame["ФИО"]),
+        'account': as_text(frame["Номер счета"]),
+        'amount': parse_amounts(frame["Сумма"]),
+    })
+    payments['account_key'] = digits_only(payments['account'])
+    documents = as_text(frame["Назначение платежа"]).str.extract(DOCUMENT_PATTERN)[0]
+    payments['document_key'] = digits_only(documents)
+    # Владелец хранится как «фамилия имя», отчество плательщика не сравнивается
+    name = normalize_name(payments['payer'])
+    payments['name_key'] = name.str.split(' ').str[:2].str.join(' ')
+    payments['block'] = payments['name_key'].str[:BLOCK_PREFIX]
+    return payments
+
+
+def join_on(payments, owners, key, method):
+    """Хэш-соединение по точному ключу; возвращает кандидатов (row, owner, score)."""
+    left = payments.loc[payments[key].ne(''), ['row', key]]
+    right = owners.loc[owners[key].ne(''), [key]].reset_index().rename(
+        columns={'index': 'owner'})
+    pairs = left.merge(right, on=key, how='inner')[['row', 'owner']]
+    pairs['score'] = 1.0
+    pairs['method'] = method
+    return pairs
+
+
+def fuzzy_candidates(payments, owners):
+    """Нечёткое сравнение ФИО только внутри блоков с общим префиксом фамилии."""
+    names = payments.loc[payments['name_key'].ne(''), ['name_key', 'block']].drop_duplicates()
+    owner_blocks = {block: group for block, group in
+                    owners[owners['name_key'].ne('')].groupby('block', sort=False)}
+
+    found_names, found_owners, found_scores = [], [], []
+    for block, group in names.groupby('block', sort=False):
+        candidates = owner_blocks.get(block)
+        if candidates is None:
+            continue
+        owner_keys = list(zip(candidates.index, candidates['name_key']))
+        for name in group['name_key']:
+            matcher = SequenceMatcher(None, name)
+            for owner, owner_key in owner_keys:
+                matcher.set_seq1(owner_key)
+                if matcher.real_quick_ratio() < NAME_THRESHOLD:
+                    continue
+                if matcher.quick_ratio() < NAME_THRESHOLD:
+                    continue
+                score = matcher.ratio()
+                if score >= NAME_THRESHOLD:
+                    found_names.append(name)
+                    found_owners.append(owner)
+                    found_scores.append(score)
+
+    by_name = pd.DataFrame({'name_key': found_names, 'owner': found_owners,
+                            'score': found_scores})
+    pairs = payments[['row', 'name_key']].merge(by_name, on='name_key', how='inner')
+    pairs = pairs[['row', 'owner', 'score']]
+    pairs['method'] = 'ФИО'
+    return pairs
+
+
+def resolve(pairs):
+    """Сводит кандидатов к одному решению на строку выписки."""
+    if pairs.empty:
+        return pd.DataFrame(columns=['row', 'owner', 'score', 'method', 'candidates',
+                                     'status'])
+    pairs = pairs.drop_duplicates(['row', 'owner'])
+    pairs = pairs.sort_values(['row', 'score'], ascending=[True, False], kind='stable')
+    grouped = pairs.groupby('row', sort=False)
+    rank = grouped.cumcount()
+    best = pairs[rank.eq(0)].set_index('row')
+    runner_up = pairs[rank.eq(1)].set_index('row')['score'].reindex(best.index)
+    best['candidates'] = grouped.size()
+    ambiguous = runner_up.notna() & (best['score'] - runner_up < AMBIGUITY_MARGIN)
+    best['status'] = np.where(ambiguous, AMBIGUOUS, MATCHED)
+    return best.reset_index()
+
+
+def reconcile(statement, owners):
+    """Сопоставляет платежи выписки с владельцами.
+
+    Этапы по убыванию надёжности: номер счёта, номер документа из
+    назначения платежа, точное ФИО и нечёткое ФИО с блокировкой по
+    префиксу фамилии. Каждый этап получает только строки, оставшиеся
+    без кандидатов на предыдущих.
+    """
+    payments = prepare_payments(statement)
+    remaining = payments
+    decided = []
+    stages = [
+        lambda rest: join_on(rest, owners, 'account_key', "Счет"),
+        lambda rest: join_on(rest, owners, 'document_key', "Документ"),
+        lambda rest: join_on(rest, owners, 'name_key', "ФИО"),
+        lambda rest: fuzzy_candidates(rest, owners),
+    ]
+    for stage in stages:
+        if remaining.empty:
+            break
+        resolved = resolve(stage(remaining))
+        decided.append(resolved)
+        remaining = remaining[~remaining['row'].isin(resolved['row'])]
+
+    decisions = (pd.concat(decided, ignore_index=True) if decided
+                 else resolve(pd.DataFrame(columns=['row', 'owner', 'score', 'method'])))
+    result = payments[['row', 'payer', 'account', 'amount']].merge(decisions, on='row',
+                                                                   how='left')
+    owner_rows = result['owner'].dropna().astype(int)
+    matched_owner = owners.loc[owner_rows.to_numpy()]
+
+    frame = pd.DataFrame({
+        "Строка": result['row'] + 1,
+        "ФИО": result['payer'],
+        "Номер счета": result['account'],
+        "Сумма": result['amount'],
+        "Результат": result['status'].fillna(UNMATCHED),
+        "Способ": result['method'].fillna(''),
+        "Владелец": '',
+        "ID владельца": '',
+        "Помещение": '',
+        "Сходство": result['score'].round(3),
+        "Кандидатов": result['candidates'].fillna(0).astype(int),
+    })
+    frame.loc[owner_rows.index, "Владелец"] = matched_owner['owner_name'].to_numpy()
+    frame.loc[owner_rows.index, "ID владельца"] = matched_owner['owner_id'].astype(str).to_numpy()
+    frame.loc[owner_rows.index, "Помещение"] = (matched_owner['premise_id']
+                                                .map(lambda value: '' if value is None
+                                                     else str(value)).to_numpy())
+    return frame
+
+
+def summary(result):
+    counts = result["Результат"].value_counts()
+    return (f"Сопоставлено: {counts.get(MATCHED, 0)}, "
+            f"неоднозначно: {counts.get(AMBIGUOUS, 0)}, "
+            f"не найдено: {counts.get(UNMATCHED, 0)}")
@@ -0,0 +1,158 @@
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+import numpy as np
+from bson import ObjectId
+
+from metrics import metrics
+
+
+DEFAULT_BUDGET_MB = int(os.environ.get('REGISTRY_CACHE_MB', '64'))
+
+
+def encode_ids(ids):
+    # ObjectId хранятся 12-байтными строками, прочие _id — как есть
+    if ids and all(isinstance(value, ObjectId) for value in ids):
+        return np.array([value.binary for value in ids], dtype='S12')
+    return np.array(ids, dtype=object)
+
+
+def decode_id(value):
+    return ObjectId(bytes(value)) if isinstance(value, np.bytes_) else value
+
+
+def array_nbytes(array):
+    if array.dtype != object:
+        return array.nbytes
+    return array.nbytes + sum(len(str(value)) for value in array)
+
+
+class ColumnPage:
+    """Страница таблицы реестра в колоночном виде: по массиву на колонку."""
+
+    def __init__(self, ids, rows, column_count):
+        self.ids = encode_ids(ids)
+        self.columns = [np.array([row[position] for row in rows], dtype=str)
+                        for position in range(column_count)]
+        self.first_id = ids[0] if ids else None
+        self.last_id = ids[-1] if ids else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def value(self, offset, column):
+        return str(self.columns[column][offset])
+
+    def document_id(self, offset):
+        return decode_id(self.ids[offset])
+
+    @property
+    def nbytes(self):
+        return array_nbytes(self.ids) + sum(column.nbytes for column in self.columns)
+
+
+def any_in_range(sorted_ids, id_range):
+    """id_range — (после, до включительно); None на любом конце — без границы."""
+    after, last = id_range
+    try:
+        position = 0 if after is None else bisect_right(sorted_ids, after)
+        if position >= len(sorted_ids):
+            return False
+        return last is None or sorted_ids[position] <= last
+    except TypeError:
+        # _id разных типов не сравниваются — считаем, что запись затронута
+        return True
+
+
+class RegistryCache:
+    """Общий для процесса кэш данных реестра с бюджетом памяти и LRU-вытеснением.
+
+    Каждая запись помнит, от каких коллекций она зависит: либо от диапазона
+    _id (страница таблицы), либо от коллекции целиком (None). invalidate
+    удаляет только записи, которые могла изменить запись в базу.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # ключ -> (значение, байт, зависимости)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes, depends=None):
+        """depends: {полное имя коллекции: (после _id, до _id) или None}."""
+        with self._lock:
+            self._drop(key)
+            if nbytes > self.budget_bytes:
+                return
+            self._entries[key] = (value, nbytes, depends or {})
+            self.size += nbytes
+            while self.size > self.budget_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def get_or_load(self, key, load, nbytes, depends=None):
+        value = self.get(key)
+        if value is None:
+            value = load()
+            self.put(key, value, nbytes(value), depends)
+        return value
+
+    def invalidate(self, collection, ids=None):
+        """Сбрасывает записи, зависящие от изменённых документов коллекции.
+
+        ids=None — изменённые документы неизвестны, сбрасывается всё, что
+        зависит от коллекции.
+        """
+        name = collection if isinstance(collection, str) else collection.full_name
+        if ids is not None:
+            try:
+                ids = sorted(ids)
+            except TypeError:
+                ids = None
+            else:
+                if not ids:
+                    return
+        with self._lock:
+            stale = []
+            for key, (_, _, depends) in self._entries.items():
+                if name not in depends:
+                    continue
+                id_range = depends[name]
+                if ids is None or id_range is None or any_in_range(ids, id_range):
+                    stale.append(key)
+            for key in stale:
+                self._drop(key)
+
+    def invalidate_key(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+registry_cache = RegistryCache()
+metrics.register_gauge('registry_cache.bytes', lambda: registry_cache.size)
+metrics.register_gauge('registry_cache.hits', lambda: registry_cache.hits)
+metrics.register_gauge('registry_cache.misses', lambda: registry_cache.misses)
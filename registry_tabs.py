@@ -0,0 +1,274 @@
+"""Таблицы реестра (дома, помещения, владельцы), общие для окон main, m1 и m2.
+
+RegistryTablesMixin создаёт модели, таблицы и панели фильтров и держит
+логику режима «выбранный дом», серверных фильтров, экспорта, добавления
+владельца и первой загрузки. Окно только раскладывает виджеты: в main и m1 таблицы идут
+столбиком, в m2 — на вкладках.
+"""
+from datetime import datetime
+
+from PyQt6.QtGui import QDoubleValidator
+from PyQt6.QtWidgets import (QAbstractItemView, QApplication, QCheckBox, QDialog, QFileDialog,
+                             QLabel, QLineEdit, QMessageBox, QPushButton, QTableView,
+                             QVBoxLayout)
+
+from columns import HOUSE_COLUMNS, OWNER_COLUMNS, PREMISE_COLUMNS
+from filter_bar import FilterBar
+from filters import (DEFAULT_RESULT_LIMIT, HOUSE_FILTER_FIELDS, OWNER_FILTER_FIELDS,
+                     PREMISE_FILTER_FIELDS, house_query, owner_query, premise_query)
+from house_details import HouseDetailCache
+from jobs import start_job
+from metrics import metrics
+from registry_cache import registry_cache
+from share_totals import SHARE_TOLERANCE
+from startup import first_load
+from table_models import CursorTableModel, DocumentTableModel
+
+
+class OwnerDialog(QDialog):
+    def __init__(self, premise_text, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Add/Edit Owner")
+        self.setMinimumWidth(300)
+        layout = QVBoxLayout()
+        # Владелец добавляется к помещению, выбранному в таблице Premises
+        layout.addWidget(QLabel(f"Premise: {premise_text}"))
+
+        self.first_name = QLineEdit()
+        self.last_name = QLineEdit()
+        self.doc_number = QLineEdit()
+        self.ownership_share = QLineEdit()
+        share_validator = QDoubleValidator(0.0, 1.0, 6)
+        share_validator.setNotation(QDoubleValidator.Notation.StandardNotation)
+        self.ownership_share.setValidator(share_validator)
+
+        layout.addWidget(QLabel("First Name:"))
+        layout.addWidget(self.first_name)
+        layout.addWidget(QLabel("Last Name:"))
+        layout.addWidget(self.last_name)
+        layout.addWidget(QLabel("Document Number:"))
+        layout.addWidget(self.doc_number)
+        layout.addWidget(QLabel("Ownership Share:"))
+        layout.addWidget(self.ownership_share)
+
+        save_button = QPushButton("Save")
+        save_button.clicked.connect(self.accept)
+        layout.addWidget(save_button)
+
+        self.setLayout(layout)
+
+
+class RegistryTablesMixin:
+    """Примесь к QMainWindow с атрибутами repository и db."""
+
+    def create_registry_tables(self):
+        # Режим «выбранный дом»: помещения и владельцы только выбранного дома
+        # читаются по индексу house_id и кэшируются в HouseDetailCache
+        self.detail_mode_checkbox = QCheckBox("Selected house only")
+        self.detail_mode_checkbox.toggled.connect(self.toggle_detail_mode)
+
+        self.houses_model = CursorTableModel(self.repository.houses, HOUSE_COLUMNS,
+                                             parent=self)
+        self.premises_model = CursorTableModel(self.repository.premises, PREMISE_COLUMNS,
+                                               parent=self)
+        self.owners_model = CursorTableModel(self.repository.owners, OWNER_COLUMNS,
+                                             parent=self)
+        self.houses_table = self.registry_table(self.houses_model)
+        self.premises_table = self.registry_table(self.premises_model)
+        self.owners_table = self.registry_table(self.owners_model)
+
+        self.house_details = HouseDetailCache(self.db)
+        self.premises_detail_model = DocumentTableModel(PREMISE_COLUMNS, self)
+        self.owners_detail_model = DocumentTableModel(OWNER_COLUMNS, self)
+        self.houses_table.selectionModel().currentRowChanged.connect(self.show_house_details)
+
+        # Фильтры выполняются на сервере, таблица получает только найденные строки
+        self.houses_filter = self.registry_filter(HOUSE_FILTER_FIELDS, self.houses_model,
+                                                  house_query, "Export houses")
+        self.premises_filter = self.registry_filter(PREMISE_FILTER_FIELDS, self.premises_model,
+                                                    premise_query, "Export premises")
+        self.owners_filter = self.registry_filter(OWNER_FILTER_FIELDS, self.owners_model,
+                                                  owner_query, "Export owners")
+
+    def registry_table(self, model):
+        table = QTableView()
+        table.setModel(model)
+        table.horizontalHeader().setStretchLastSection(True)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        model.load_failed.connect(self.show_load_error)
+        return table
+
+    def registry_filter(self, fields, model, build_query, export_title):
+        bar = FilterBar(fields)
+        bar.filter_changed.connect(lambda values: self.apply_filter(model, build_query, values))
+        bar.export_requested.connect(lambda: self.export_registry(model, export_title))
+        return bar
+
+    def add_owner(self):
+        premise_id = self.selected_premise_id()
+        if premise_id is None:
+            QMessageBox.warning(self, "Add Owner",
+                                "Select the owner's premise in the Premises table first")
+            return
+        try:
+            premise_text = self.premise_caption(premise_id)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load the premise: {str(e)}")
+            return
+        dialog = OwnerDialog(premise_text, self)
+        if dialog.exec():
+            try:
+                # Валидатор принимает десятичный разделитель локали
+                share = float(dialog.ownership_share.text().replace(',', '.'))
+                owner_data = {
+                    'first_name': dialog.first_name.text(),
+                    'last_name': dialog.last_name.text(),
+                    'document': {
+                        'number': dialog.doc_number.text(),
+                        'issue_date': datetime.now()
+                    },
+                    'ownership_share': share,
+                    'status': 'active',
+                    'premise_id': premise_id
+                }
+                total = self.repository.premise_share_total(premise_id) + share
+                if total > 1 + SHARE_TOLERANCE:
+                    reply = QMessageBox.question(
+                        self, "Ownership Share",
+                        f"Shares of this premise would add up to {total:g}. "
+                        "Add the owner anyway?",
+                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                        QMessageBox.StandardButton.No)
+                    if reply != QMessageBox.StandardButton.Yes:
+                        return
+
+                _, house_id = self.repository.add_owner(owner_data)
+                self.owners_changed(house_id)
+                QMessageBox.information(self, "Success", "Owner added successfully")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to add owner: {str(e)}")
+
+    def premise_caption(self, premise_id):
+        premise = self.repository.premise(premise_id) or {}
+        house = self.repository.houses.find_one({'_id': premise.get('house_id')},
+                                                {'address': 1}) or {}
+        return f"{house.get('address', '')}, No. {premise.get('number', '')}"
+
+    def owners_changed(self, house_id=None):
+        # Владельцы дома в режиме «выбранный дом» берутся из кэша — сбрасываем его
+        if house_id is not None:
+            self.house_details.invalidate(house_id)
+        self.update_tables()
+
+    def show_index_problems(self, problems):
+        if problems:
+            QMessageBox.warning(self, "Database Warning",
+                                "Some indexes could not be created:\n" + "\n".join(problems))
+
+    def load_initial_data(self, done):
+        # Ping, индексы и первые страницы читаются фоновой задачей, чтобы окно
+        # не замирало после первой отрисовки; модели заполняются из кэша
+        def finished(problems):
+            self.show_index_problems(problems)
+            self.update_tables()
+            done()
+
+        def failed(message):
+            QMessageBox.critical(self, "Database Error", message)
+            QApplication.exit(1)
+
+        def cancelled():
+            # Без фоновой подготовки таблицы читают первые страницы сами
+            self.update_tables()
+            done()
+
+        models = [self.houses_model, self.premises_model, self.owners_model]
+        start_job(self, "Connecting to MongoDB", first_load(self.repository, models),
+                  on_finished=finished, on_failed=failed, on_cancelled=cancelled)
+
+    def reload_data(self):
+        # Явное обновление перечитывает всё: данные могли изменить другие клиенты
+        with metrics.action('refresh_data'):
+            registry_cache.clear()
+            self.update_tables()
+
+    def update_tables(self):
+        with metrics.span('ui.update_tables'):
+            try:
+                self.houses_model.refresh()
+                self.premises_model.refresh()
+                self.owners_model.refresh()
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to update tables: {str(e)}")
+            self.show_house_details()
+
+    def apply_filter(self, model, build_query, values):
+        try:
+            query = build_query(**values)
+        except ValueError as e:
+            QMessageBox.warning(self, "Filter", f"Invalid filter value: {str(e)}")
+            return
+        # Фильтр относится ко всему реестру, а не к выбранному дому
+        if model is not self.houses_model:
+            self.detail_mode_checkbox.setChecked(False)
+        try:
+            with metrics.action('filter'):
+                model.set_query(query, DEFAULT_RESULT_LIMIT if query else None)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to apply filter: {str(e)}")
+
+    def export_registry(self, model, title):
+        from export import EXPORT_FILTER, ensure_extension, export_collection
+
+        file_name, selected_filter = QFileDialog.getSaveFileName(self, title, "", EXPORT_FILTER)
+        if not file_name:
+            return
+        file_name = ensure_extension(file_name, selected_filter)
+        # Выгружаются строки текущего фильтра прямо из курсора MongoDB
+        collection, columns, query, limit = model.collection, model.columns, model.query, model.limit
+
+        def run_export(job):
+            with metrics.action('export'):
+                return export_collection(collection, columns, file_name, query, limit,
+                                         progress=job.report_progress)
+
+        start_job(self, title, run_export,
+                  on_finished=lambda rows: QMessageBox.information(
+                      self, "Success", f"Exported {rows} rows to {file_name}"),
+                  on_failed=lambda message: QMessageBox.critical(
+                      self, "Error", f"Export failed: {message}"))
+
+    def toggle_detail_mode(self, enabled):
+        if enabled:
+            self.premises_table.setModel(self.premises_detail_model)
+            self.owners_table.setModel(self.owners_detail_model)
+            self.show_house_details()
+        else:
+            self.premises_table.setModel(self.premises_model)
+            self.owners_table.setModel(self.owners_model)
+
+    def selected_house_id(self):
+        index = self.houses_table.currentIndex()
+        return self.houses_model.document_id(index.row()) if index.isValid() else None
+
+    def selected_premise_id(self):
+        index = self.premises_table.currentIndex()
+        return self.premises_table.model().document_id(index.row()) if index.isValid() else None
+
+    def show_house_details(self, *args):
+        if not self.detail_mode_checkbox.isChecked():
+            return
+        house_id = self.selected_house_id()
+        premises, owners = [], []
+        if house_id is not None:
+            try:
+                with metrics.span('ui.house_details'):
+                    premises, owners = self.house_details.get(house_id)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to load house details: {str(e)}")
+        self.premises_detail_model.set_documents(premises)
+        self.owners_detail_model.set_documents(owners)
+
+    def show_load_error(self, message):
+        QMessageBox.critical(self, "Error", f"Failed to load rows: {message}")
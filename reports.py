@@ -0,0 +1,128 @@
+import hashlib
+from collections import OrderedDict
+
+import pandas as pd
+
+from statements import normalize_statement, operation_direction, parse_amounts, parse_dates
+
+
+TOP_PURPOSES = 20
+
+
+def content_hash(frame):
+    """Хэш содержимого выписки; не зависит от индекса строк."""
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    digest = hashlib.blake2b(hashes.tobytes(), digest_size=16)
+    digest.update('\x1f'.join(map(str, frame.columns)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def prepare(frame):
+    frame = normalize_statement(frame)
+    frame["Сумма"] = parse_amounts(frame["Сумма"])
+    frame["Дата операции"] = parse_dates(frame["Дата операции"])
+    frame["Направление"] = operation_direction(frame["Тип операции"], frame["Сумма"])
+    return frame
+
+
+def totals_by(frame, key):
+    grouped = frame.groupby(key, dropna=False)
+    report = grouped.agg(
+        Операций=("Сумма", "size"),
+        Сумма=("Сумма", "sum"),
+        Первая_операция=("Дата операции", "min"),
+        Последняя_операция=("Дата операции", "max"),
+    )
+    report.columns = ["Операций", "Сумма", "Первая операция", "Последняя операция"]
+    return report.sort_values("Сумма", ascending=False).reset_index()
+
+
+def totals_by_account(frame):
+    return totals_by(frame, "Номер счета")
+
+
+def totals_by_name(frame):
+    report = totals_by(frame, "ФИО")
+    accounts = frame.groupby("ФИО", dropna=False)["Номер счета"].nunique()
+    report.insert(1, "Счетов", report["ФИО"].map(accounts).fillna(0).astype(int))
+    return report
+
+
+def monthly_breakdown(frame):
+    frame = frame.assign(Месяц=frame["Дата операции"].dt.to_period('M').astype(str),
+                         Модуль=frame["Сумма"].abs())
+    report = frame.pivot_table(index=["Месяц", "Тип операции"], columns="Направление",
+                               values="Модуль", aggfunc="sum", fill_value=0)
+    for direction in ("Дебет", "Кредит"):
+        if direction not in report.columns:
+            report[direction] = 0.0
+    report = report[["Дебет", "Кредит"]]
+    report["Операций"] = frame.groupby(["Месяц", "Тип операции"]).size()
+    report.columns.name = None
+    return report.reset_index()
+
+
+def top_purposes(frame, limit=TOP_PURPOSES):
+    purpose = (frame["Назначение платежа"].astype(str).str.lower()
+               .str.replace(r'\s+', ' ', regex=True).str.strip())
+    grouped = frame.assign(Назначение=purpose).groupby("Назначение")
+    report = grouped.agg(Операций=("Сумма", "size"), Сумма=("Сумма", "sum"))
+    return report.nlargest(limit, "Операций").reset_index()
+
+
+REPORTS = OrderedDict([
+    ("Итоги по счетам", totals_by_account),
+    ("Итоги по ФИО", totals_by_name),
+    ("Помесячно по типам операций", monthly_breakdown),
+    ("Частые назначения платежа", top_purposes),
+])
+
+
+class ReportCache:
+    """Кэш отчётов по ключу (хэш содержимого выписки, имя отчёта)."""
+
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self._reports = OrderedDict()
+        self._prepared = OrderedDict()
+
+    def prepared(self, frame, key):
+        # Разобранная выписка нужна всем отчётам, поэтому тоже кэшируется
+        if key in self._prepared:
+            self._prepared.move_to_end(key)
+            return self._prepared[key]
+        prepared = prepare(frame)
+        self._prepared[key] = prepared
+        while len(self._prepared) > 2:
+            self._prepared.popitem(last=False)
+        return prepared
+
+    def get(self, frame, name, key=None):
+        if key is None:
+            key = content_hash(frame)
+        cache_key = (key, name)
+        if cache_key in self._reports:
+            self._reports.move_to_end(cache_key)
+            return self._reports[cache_key]
+
+        report = REPORTS[name](self.prepared(frame, key))
+        self._reports[cache_key] = report
+        while len(self._reports) > self.capacity:
+            self._reports.popitem(last=False)
+        return report
+
+
+report_cache = ReportCache()
+
+
+def build_reports(frame, names=None, key=None):
+    if key is None:
+        key = content_hash(frame)
+    return OrderedDict((name, report_cache.get(frame, name, key)) for name in (names or REPORTS))
+
+
+def write_reports_xlsx(file_name, reports):
+    with pd.ExcelWriter(file_name, engine='openpyxl') as writer:
+        for name, report in reports.items():
+            # Имя листа Excel ограничено 31 символом
+            report.to_excel(writer, sheet_name=name[:31], index=False)
@@ -0,0 +1,267 @@
+import os
+
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+from filters import prefix_condition
+from metrics import CommandMetrics, metrics
+import ownership
+import ownership_links
+import share_totals
+from registry_cache import registry_cache
+from schema import DATABASE_NAME
+
+
+class RepositoryUnavailable(Exception):
+    """Сервер MongoDB недоступен или отклонил подключение."""
+
+
+def env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class RepositoryConfig:
+    """Параметры подключения; по умолчанию читаются из переменных окружения."""
+
+    def __init__(self, uri='mongodb://localhost:27017/', database=DATABASE_NAME,
+                 max_pool_size=20, min_pool_size=0, server_selection_timeout_ms=3000,
+                 connect_timeout_ms=3000, socket_timeout_ms=None, compressors=None,
+                 retry_reads=True, retry_writes=True, app_name='real-estate-registry',
+                 command_metrics=True):
+        self.uri = uri
+        self.database = database
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.server_selection_timeout_ms = server_selection_timeout_ms
+        self.connect_timeout_ms = connect_timeout_ms
+        self.socket_timeout_ms = socket_timeout_ms
+        # Например 'zstd,zlib'; zstd и snappy требуют дополнительных пакетов
+        self.compressors = compressors
+        self.retry_reads = retry_reads
+        self.retry_writes = retry_writes
+        self.app_name = app_name
+        # Длительности команд попадают в metrics как spans 'mongo.<команда>'
+        self.command_metrics = command_metrics
+
+    @classmethod
+    def from_env(cls, **overrides):
+        socket_timeout = os.environ.get('REGISTRY_MONGO_SOCKET_TIMEOUT_MS')
+        values = {
+            'uri': os.environ.get('REGISTRY_MONGO_URI', 'mongodb://localhost:27017/'),
+            'database': os.environ.get('REGISTRY_MONGO_DATABASE', DATABASE_NAME),
+            'max_pool_size': int(os.environ.get('REGISTRY_MONGO_POOL_SIZE', '20')),
+            'min_pool_size': int(os.environ.get('REGISTRY_MONGO_MIN_POOL_SIZE', '0')),
+            'server_selection_timeout_ms':
+                int(os.environ.get('REGISTRY_MONGO_SELECTION_TIMEOUT_MS', '3000')),
+            'connect_timeout_ms': int(os.environ.get('REGISTRY_MONGO_CONNECT_TIMEOUT_MS', '3000')),
+            'socket_timeout_ms': int(socket_timeout) if socket_timeout else None,
+            'compressors': os.environ.get('REGISTRY_MONGO_COMPRESSORS') or None,
+            'retry_reads': env_flag('REGISTRY_MONGO_RETRY_READS', True),
+            'retry_writes': env_flag('REGISTRY_MONGO_RETRY_WRITES', True),
+            'command_metrics': env_flag('REGISTRY_MONGO_COMMAND_METRICS', True),
+        }
+        values.update(overrides)
+        return cls(**values)
+
+    def client_options(self):
+        options = {
+            'maxPoolSize': self.max_pool_size,
+            'minPoolSize': self.min_pool_size,
+            'serverSelectionTimeoutMS': self.server_selection_timeout_ms,
+            'connectTimeoutMS': self.connect_timeout_ms,
+            'retryReads': self.retry_reads,
+            'retryWrites': self.retry_writes,
+            'appname': self.app_name,
+        }
+        if self.socket_timeout_ms is not None:
+            options['socketTimeoutMS'] = self.socket_timeout_ms
+        if self.compressors:
+            options['compressors'] = self.compressors
+        if self.command_metrics:
+            options['event_listeners'] = [CommandMetrics(metrics)]
+        return options
+
+
+class Repository:
+    """Владелец MongoClient и типовые запросы к коллекциям реестра.
+
+    Клиент подключается лениво, поэтому connect() сразу выполняет ping:
+    недоступный сервер даёт RepositoryUnavailable через
+    server_selection_timeout_ms, а не зависание первого запроса. Окна
+    вызывают open() без сетевых операций, а ping() — в фоновой задаче.
+    """
+
+    def __init__(self, config=None):
+        self.config = config if config is not None else RepositoryConfig.from_env()
+        self.client = None
+        self.db = None
+
+    def open(self):
+        """Создаёт клиент без обращения к серверу."""
+        try:
+            self.client = MongoClient(self.config.uri, **self.config.client_options())
+        except PyMongoError as e:
+            self.close()
+            raise RepositoryUnavailable(f"Cannot connect to MongoDB at {self.config.uri}: {e}")
+        self.db = self.client[self.config.database]
+        return self
+
+    def ping(self):
+        try:
+            self.client.admin.command('ping')
+        except (ConnectionFailure, PyMongoError) as e:
+            raise RepositoryUnavailable(f"Cannot connect to MongoDB at {self.config.uri}: {e}")
+
+    def connect(self):
+        self.open()
+        try:
+            self.ping()
+        except RepositoryUnavailable:
+            self.close()
+            raise
+        return self
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self.db = None
+
+    @property
+    def houses(self):
+        return self.db.houses
+
+    @property
+    def premises(self):
+        return self.db.premises
+
+    @property
+    def owners(self):
+        return self.db.owners
+
+    @property
+    def statements(self):
+        return self.db.statements
+
+    @property
+    def vtb_registers(self):
+        return self.db.vtb_registers
+
+    # Дома
+
+    def houses_by_address(self, prefix, limit=100):
+        query = {'address': prefix_condition(prefix)} if prefix else {}
+        return list(self.houses.find(query).sort('address', ASCENDING).limit(limit))
+
+    def add_house(self, address, build_year):
+        house_id = self.houses.insert_one({'address': address,
+                                           'build_year': int(build_year)}).inserted_id
+        registry_cache.invalidate(self.houses, [house_id])
+        return house_id
+
+    # Помещения
+
+    def premise(self, premise_id):
+        return self.premises.find_one({'_id': premise_id})
+
+    def premises_of_house(self, house_id):
+        return list(self.premises.find({'house_id': house_id}).sort('number', ASCENDING))
+
+    # Владельцы
+
+    def owners_of_premise(self, premise_id):
+        return list(self.owners.find({'premise_id': premise_id}))
+
+    def owner_by_document(self, number):
+        return self.owners.find_one({'document.number': number})
+
+    def add_owner(self, owner):
+        """Добавляет владельца; возвращает (_id владельца, _id дома или None).
+
+        Владелец помещения сразу получает событие acquire в журнале владения
+        и связь с помещением в ownership_links.
+        """
+        share = owner.get('ownership_share')
+        if share is not None and not 0 <= share <= 1:
+            raise ValueError(f"Ownership share must be between 0 and 1, got {share}")
+        owner_id = self.owners.insert_one(owner).inserted_id
+        registry_cache.invalidate(self.owners, [owner_id])
+        share_totals.apply_change(self.db, None, owner)
+        house_id = None
+        if owner.get('premise_id') is not None:
+            ownership.acquire(self.db, owner['premise_id'], owner_id, ownership.owner_share(owner))
+            house_id = self.house_of_premise(owner['premise_id'])
+        return owner_id, house_id
+
+    def house_of_premise(self, premise_id):
+        premise = self.premises.find_one({'_id': premise_id}, {'house_id': 1})
+        return premise.get('house_id') if premise is not None else None
+
+    # История владения
+
+    @property
+    def ownership_events(self):
+        return self.db.ownership_events
+
+    def owners_on(self, premise_id, at):
+        return ownership.owners_on(self.db, premise_id, at)
+
+    def owner_history(self, owner_id):
+        return ownership.owner_history(self.db, owner_id)
+
+    def premise_history(self, premise_id):
+        return ownership.premise_history(self.db, premise_id)
+
+    def current_share(self, premise_id, owner_id):
+        return ownership.current_share(self.db, premise_id, owner_id)
+
+    def change_share(self, premise_id, owner_id, share, effective_date=None, note=None):
+        return ownership.change_share(self.db, premise_id, owner_id, share, effective_date, note)
+
+    def release(self, premise_id, owner_id, effective_date=None, note=None):
+        return ownership.release(self.db, premise_id, owner_id, effective_date, note)
+
+    def transfer(self, premise_id, from_owner_id, to_owner_id, share=None, effective_date=None,
+                 note=None):
+        return ownership.transfer(self.db, premise_id, from_owner_id, to_owner_id, share,
+                                  effective_date, note)
+
+    # Связи владелец — помещение
+
+    @property
+    def ownership_links(self):
+        return self.db.ownership_links
+
+    def portfolio(self, owner_id, include_inactive=False):
+        return ownership_links.portfolio(self.db, owner_id, include_inactive)
+
+    def premise_owners(self, premise_id, include_inactive=False):
+        return ownership_links.premise_owners(self.db, premise_id, include_inactive)
+
+    # Сумма долей по помещениям
+
+    def premise_share_total(self, premise_id):
+        return share_totals.premise_total(self.db, premise_id)
+
+    def inconsistent_premises(self, limit=1000):
+        return share_totals.inconsistent_premises(self.db, limit)
+
+    # Выписки
+
+    def statements_for_account(self, account, date_from=None, date_to=None, limit=1000):
+        query = {'account': account}
+        date_range = {}
+        if date_from is not None:
+            date_range['$gte'] = date_from
+        if date_to is not None:
+            date_range['$lt'] = date_to
+        if date_range:
+            query['operation_date'] = date_range
+        return list(self.statements.find(query).sort('operation_date', ASCENDING).limit(limit))
+
+
+def connect(config=None):
+    return Repository(config).connect()
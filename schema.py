@@ -0,0 +1,196 @@
+import sys
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, MongoClient
+from pymongo.errors import OperationFailure
+
+
+DATABASE_NAME = 'real_estate_registry'
+
+# Индексы, которые нужны запросам приложения
+INDEXES = {
+    'houses': [
+        IndexModel([('address', ASCENDING)], name='address'),
+        IndexModel([('build_year', ASCENDING)], name='build_year'),
+    ],
+    'premises': [
+        IndexModel([('house_id', ASCENDING), ('number', ASCENDING)],
+                   name='house_id_number', unique=True),
+        IndexModel([('area', ASCENDING)], name='area'),
+    ],
+    'owners': [
+        IndexModel([('document.number', ASCENDING)], name='document_number', unique=True,
+                   partialFilterExpression={'document.number': {'$type': 'string', '$gt': ''}}),
+        IndexModel([('last_name', ASCENDING), ('first_name', ASCENDING)], name='full_name'),
+        IndexModel([('premise_id', ASCENDING)], name='premise_id'),
+        IndexModel([('status', ASCENDING), ('ownership_share', ASCENDING)],
+                   name='status_share'),
+    ],
+    'vtb_registers': [
+        IndexModel([('account', ASCENDING), ('row_id', ASCENDING)],
+                   name='account_row_id', unique=True),
+        # load_frame сортирует по (operation_date, _id): _id в конце ключа
+        # избавляет от сортировки в памяти
+        IndexModel([('account', ASCENDING), ('operation_date', ASCENDING), ('_id', ASCENDING)],
+                   name='account_date_id'),
+        IndexModel([('full_name', ASCENDING), ('operation_date', ASCENDING)],
+                   name='full_name_date'),
+        IndexModel([('operation_date', ASCENDING), ('_id', ASCENDING)], name='operation_date_id'),
+    ],
+    'statements': [
+        # Отпечаток операции: повторный импорт пересекающейся выписки не дублирует строки
+        IndexModel([('fingerprint', ASCENDING)], name='fingerprint', unique=True,
+                   partialFilterExpression={'fingerprint': {'$type': 'string'}}),
+        IndexModel([('account', ASCENDING), ('operation_date', ASCENDING), ('_id', ASCENDING)],
+                   name='account_date_id'),
+        IndexModel([('full_name', ASCENDING), ('operation_date', ASCENDING)],
+                   name='full_name_date'),
+        IndexModel([('operation_date', ASCENDING), ('_id', ASCENDING)], name='operation_date_id'),
+    ],
+    'ownership_events': [
+        IndexModel([('premise_id', ASCENDING), ('seq', ASCENDING)],
+                   name='premise_seq', unique=True),
+        # Воспроизведение после снимка и состояние на дату
+        IndexModel([('premise_id', ASCENDING), ('effective_date', ASCENDING),
+                    ('seq', ASCENDING)], name='premise_date_seq'),
+        # История владельца по всем помещениям
+        IndexModel([('owner_id', ASCENDING), ('effective_date', ASCENDING),
+                    ('seq', ASCENDING)], name='owner_date_seq'),
+    ],
+    'premise_shares': [
+        # Список помещений с суммой долей, отличной от 1
+        IndexModel([('total', ASCENDING)], name='total'),
+    ],
+    'ownership_snapshots': [
+        IndexModel([('premise_id', ASCENDING), ('effective_date', DESCENDING),
+                    ('seq', DESCENDING)], name='premise_date_seq'),
+    ],
+    'ownership_links': [
+        # Портфель владельца; одна связь на пару владелец — помещение
+        IndexModel([('owner_id', ASCENDING), ('premise_id', ASCENDING)],
+                   name='owner_premise', unique=True),
+        # Владельцы помещения
+        IndexModel([('premise_id', ASCENDING), ('owner_id', ASCENDING)],
+                   name='premise_owner'),
+    ],
+}
+
+# Порядок строк регистров и выписок, загружаемых из базы (statement_store.load_frame)
+STORED_ROWS_SORT = [('operation_date', ASCENDING), ('_id', ASCENDING)]
+
+# Типовые запросы приложения для проверки планов: (имя, коллекция, фильтр, сортировка)
+APP_QUERIES = [
+    ('houses page', 'houses', {'_id': {'$gt': ObjectId()}}, [('_id', ASCENDING)]),
+    ('houses by address', 'houses', {'address': 'x'}, None),
+    ('houses by address prefix', 'houses', {'address': {'$regex': '^x'}}, None),
+    ('houses by build year', 'houses', {'build_year': {'$gte': 1900, '$lte': 2000}}, None),
+    ('premises by area', 'premises', {'area': {'$gte': 10.0, '$lte': 100.0}}, None),
+    ('premises by house', 'premises', {'house_id': ObjectId()}, None),
+    ('owners by document', 'owners', {'document.number': 'x'}, None),
+    ('owners by last name', 'owners', {'last_name': 'x'}, None),
+    ('owners by premise', 'owners', {'premise_id': ObjectId()}, None),
+    ('owners by status and share', 'owners',
+     {'status': 'active', 'ownership_share': {'$gte': 0.5}}, None),
+    ('vtb registers by account', 'vtb_registers', {'account': 'x'},
+     [('operation_date', ASCENDING)]),
+    ('vtb registers by name', 'vtb_registers', {'full_name': {'$regex': '^x'}}, None),
+    ('statements by account', 'statements', {'account': 'x'}, [('operation_date', ASCENDING)]),
+    ('statements by name', 'statements', {'full_name': {'$regex': '^x'}}, None),
+    ('statements by fingerprint', 'statements', {'fingerprint': {'$in': ['x', 'y']}}, None),
+    ('statements by date', 'statements',
+     {'operation_date': {'$gte': datetime(2024, 1, 1)}}, [('operation_date', ASCENDING)]),
+    ('stored vtb registers', 'vtb_registers', {}, STORED_ROWS_SORT),
+    ('stored vtb registers by account and date', 'vtb_registers',
+     {'account': 'x', 'operation_date': {'$gte': datetime(2024, 1, 1),
+                                         '$lt': datetime(2024, 2, 1)}}, STORED_ROWS_SORT),
+    ('stored vtb registers by date', 'vtb_registers',
+     {'operation_date': {'$gte': datetime(2024, 1, 1)}}, STORED_ROWS_SORT),
+    ('stored statements', 'statements', {}, STORED_ROWS_SORT),
+    ('stored statements by account and date', 'statements',
+     {'account': 'x', 'operation_date': {'$gte': datetime(2024, 1, 1),
+                                         '$lt': datetime(2024, 2, 1)}}, STORED_ROWS_SORT),
+    ('stored statements by date', 'statements',
+     {'operation_date': {'$gte': datetime(2024, 1, 1)}}, STORED_ROWS_SORT),
+    ('ownership events of premise', 'ownership_events',
+     {'premise_id': ObjectId(), 'effective_date': {'$lte': datetime(2024, 1, 1)}},
+     [('effective_date', ASCENDING), ('seq', ASCENDING)]),
+    ('ownership events of owner', 'ownership_events', {'owner_id': ObjectId()},
+     [('effective_date', ASCENDING), ('seq', ASCENDING)]),
+    ('premises with inconsistent shares', 'premise_shares',
+     {'owners': {'$gt': 0}, '$or': [{'total': {'$lt': 0.999999}}, {'total': {'$gt': 1.000001}}]},
+     [('total', ASCENDING)]),
+    ('nearest ownership snapshot', 'ownership_snapshots',
+     {'premise_id': ObjectId(), 'effective_date': {'$lte': datetime(2024, 1, 1)}},
+     [('effective_date', DESCENDING), ('seq', DESCENDING)]),
+    ('portfolio of owner', 'ownership_links', {'owner_id': ObjectId(), 'active': True},
+     [('premise_id', ASCENDING)]),
+    ('owners of premise by links', 'ownership_links', {'premise_id': ObjectId(), 'active': True},
+     [('owner_id', ASCENDING)]),
+    ('owners by document list', 'owners',
+     {'document.number': {'$in': ['x', 'y'], '$type': 'string', '$gt': ''}}, None),
+]
+
+
+def ensure_indexes(db):
+    """Создаёт недостающие индексы; повторный вызов ничего не меняет.
+
+    Возвращает список проблем (например, дубликаты мешают уникальному индексу),
+    не прерываясь на первой из них.
+    """
+    problems = []
+    for collection_name, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                db[collection_name].create_indexes([index])
+            except OperationFailure as e:
+                name = index.document['name']
+                problems.append(f"{collection_name}.{name}: {e.details.get('errmsg', e)}")
+    return problems
+
+
+def plan_stages(plan):
+    if not isinstance(plan, dict):
+        return
+    if 'stage' in plan:
+        yield plan['stage']
+    for key in ('inputStage', 'queryPlan', 'winningPlan'):
+        yield from plan_stages(plan.get(key))
+    for child in plan.get('inputStages', []):
+        yield from plan_stages(child)
+
+
+def verify_query_plans(db, queries=APP_QUERIES):
+    """Возвращает (имя запроса, стадия) для планов с COLLSCAN или сортировкой в памяти."""
+    offenders = []
+    for name, collection_name, query, sort in queries:
+        cursor = db[collection_name].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = cursor.explain()
+        stages = set(plan_stages(explain.get('queryPlanner', {}).get('winningPlan')))
+        for stage in ('COLLSCAN', 'SORT'):
+            if stage in stages:
+                offenders.append((name, stage))
+    return offenders
+
+
+def main():
+    uri = sys.argv[1] if len(sys.argv) > 1 else 'mongodb://localhost:27017/'
+    client = MongoClient(uri)
+    try:
+        db = client[DATABASE_NAME]
+        for problem in ensure_indexes(db):
+            print(f"index problem: {problem}")
+        offenders = verify_query_plans(db)
+        for name, stage in offenders:
+            print(f"{stage}: {name}")
+        if not offenders:
+            print("All application queries use indexes")
+        return 1 if offenders else 0
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
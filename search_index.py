@@ -0,0 +1,75 @@
+import bisect
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnIndex:
+    """Триграммный и префиксный индекс по различным значениям колонки.
+
+    Строки колонки кодируются номерами уникальных значений, поэтому индекс
+    строится по словарю значений, а строки находятся одной векторной
+    операцией над кодами.
+    """
+
+    def __init__(self, values):
+        codes, uniques = pd.factorize(pd.Series(values).astype(str).str.lower())
+        self.codes = codes
+        self.values = list(uniques)
+
+        grams = {}
+        for value_id, text in enumerate(self.values):
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                grams.setdefault(gram, []).append(value_id)
+        self.grams = {gram: np.array(ids, dtype=np.int64) for gram, ids in grams.items()}
+
+        order = sorted(range(len(self.values)), key=self.values.__getitem__)
+        self.sorted_values = [self.values[i] for i in order]
+        self.sorted_ids = np.array(order, dtype=np.int64)
+
+    def match_values(self, text):
+        if len(text) < 3:
+            # Короткий запрос ищется как префикс значения
+            start = bisect.bisect_left(self.sorted_values, text)
+            end = bisect.bisect_left(self.sorted_values, text + '\uffff')
+            return self.sorted_ids[start:end]
+
+        postings = [self.grams.get(text[i:i + 3]) for i in range(len(text) - 2)]
+        if any(posting is None for posting in postings):
+            return np.empty(0, dtype=np.int64)
+        postings.sort(key=len)
+        candidates = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), postings)
+        # Триграммы дают кандидатов, окончательно проверяем вхождение подстроки
+        return np.array([value_id for value_id in candidates
+                         if text in self.values[value_id]], dtype=np.int64)
+
+    def match_rows(self, text):
+        value_ids = self.match_values(text)
+        if not len(value_ids):
+            return np.zeros(len(self.codes), dtype=bool)
+        return np.isin(self.codes, value_ids)
+
+
+class FrameSearchIndex:
+    """Поиск подстроки по колонкам DataFrame; строится один раз при импорте."""
+
+    def __init__(self, frame):
+        self.row_count = len(frame)
+        self.columns = [ColumnIndex(frame.iloc[:, position])
+                        for position in range(frame.shape[1])]
+
+    def search(self, text, columns=None):
+        """Возвращает номера подходящих строк или None для пустого запроса.
+
+        columns — позиции колонок для поиска по отдельным полям.
+        """
+        text = text.strip().lower()
+        if not text:
+            return None
+        positions = range(len(self.columns)) if columns is None else columns
+        mask = np.zeros(self.row_count, dtype=bool)
+        for position in positions:
+            if position < len(self.columns):
+                mask |= self.columns[position].match_rows(text)
+        return np.flatnonzero(mask)
@@ -0,0 +1,107 @@
+"""Сумма долей владельцев по помещениям, поддерживаемая инкрементально.
+
+premise_shares хранит для каждого помещения сумму ownership_share
+активных владельцев (total) и их число (owners). Каждая запись владельца
+меняет сводку через $inc на разницу вклада до и после, поэтому список
+помещений, где сумма долей не равна 1, читается по индексу total без
+пересчёта по коллекции owners. rebuild пересчитывает сводку агрегацией,
+ограниченной переданными помещениями.
+"""
+from datetime import datetime
+
+from pymongo import ASCENDING
+
+
+# Допустимое расхождение суммы долей с 1 (накопление ошибок float при $inc)
+SHARE_TOLERANCE = 1e-6
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def contribution(owner):
+    """Вклад владельца в сводку: (premise_id, доля) или None."""
+    if owner is None or owner.get('premise_id') is None:
+        return None
+    if owner.get('status') != 'active':
+        return None
+    return owner['premise_id'], float(owner.get('ownership_share') or 0.0)
+
+
+def apply_change(db, before, after):
+    """Переносит в сводку изменение документа владельца (before/after или None)."""
+    deltas = {}
+    for owner, sign in ((before, -1), (after, 1)):
+        part = contribution(owner)
+        if part is None:
+            continue
+        premise_id, share = part
+        total, owners = deltas.get(premise_id, (0.0, 0))
+        deltas[premise_id] = (total + sign * share, owners + sign)
+    for premise_id, (total, owners) in deltas.items():
+        if total == 0 and owners == 0:
+            continue
+        db.premise_shares.update_one(
+            {'_id': premise_id},
+            {'$inc': {'total': total, 'owners': owners},
+             '$set': {'updated_at': datetime.now()}},
+            upsert=True)
+
+
+def inconsistency_query(tolerance=SHARE_TOLERANCE):
+    # Помещения без активных владельцев не считаются ошибкой
+    return {'owners': {'$gt': 0},
+            '$or': [{'total': {'$lt': 1 - tolerance}}, {'total': {'$gt': 1 + tolerance}}]}
+
+
+def inconsistent_premises(db, limit=1000):
+    """Помещения с суммой долей, отличной от 1, с номером и домом помещения."""
+    summaries = list(db.premise_shares.find(inconsistency_query())
+                     .sort('total', ASCENDING).limit(limit))
+    premises = {premise['_id']: premise for premise in db.premises.find(
+        {'_id': {'$in': [summary['_id'] for summary in summaries]}},
+        {'house_id': 1, 'number': 1})}
+    result = []
+    for summary in summaries:
+        premise = premises.get(summary['_id'], {})
+        result.append({
+            'premise_id': summary['_id'],
+            'house_id': premise.get('house_id'),
+            'number': premise.get('number'),
+            'total': round(summary['total'], 6),
+            'owners': summary['owners'],
+        })
+    return result
+
+
+def premise_total(db, premise_id):
+    summary = db.premise_shares.find_one({'_id': premise_id}, {'total': 1})
+    return summary['total'] if summary is not None else 0.0
+
+
+def rebuild(db, premise_ids=None):
+    """Пересчитывает сводку агрегацией по owners; premise_ids ограничивает пересчёт.
+
+    Нужен один раз для данных, записанных до появления сводки, и после
+    правок owners в обход приложения. Возвращает число обновлённых помещений.
+    """
+    match = {'status': 'active', 'premise_id': {'$ne': None}}
+    if premise_ids is not None:
+        match['premise_id'] = {'$in': list(premise_ids)}
+    totals = db.owners.aggregate([
+        {'$match': match},
+        {'$group': {'_id': '$premise_id',
+                    'total': {'$sum': {'$ifNull': ['$ownership_share', 0]}},
+                    'owners': {'$sum': 1}}},
+    ])
+    now = datetime.now()
+    summaries = [{'_id': summary['_id'], 'total': summary['total'],
+                  'owners': summary['owners'], 'updated_at': now} for summary in totals]
+    # Сводка пересчитываемых помещений заменяется целиком, включая
+    # помещения, у которых не осталось активных владельцев
+    if premise_ids is None:
+        db.premise_shares.delete_many({})
+    else:
+        db.premise_shares.delete_many({'_id': {'$in': list(premise_ids)}})
+    for start in range(0, len(summaries), DEFAULT_BATCH_SIZE):
+        db.premise_shares.insert_many(summaries[start:start + DEFAULT_BATCH_SIZE])
+    return len(summaries)
@@ -0,0 +1,88 @@
+import json
+import os
+import sys
+import time
+
+from PyQt6.QtCore import QEvent, QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from schema import ensure_indexes
+from startup_probe import PROBE_ENV, PROBE_PREFIX
+
+
+_started = time.perf_counter()
+
+
+def probe_enabled():
+    return bool(os.environ.get(PROBE_ENV))
+
+
+def report(event):
+    if not probe_enabled():
+        return
+    payload = {
+        'event': event,
+        'ms': round((time.perf_counter() - _started) * 1000, 1),
+        'modules': len(sys.modules),
+        'pandas_loaded': 'pandas' in sys.modules,
+    }
+    print(PROBE_PREFIX + json.dumps(payload), flush=True)
+
+
+class FirstPaintFilter(QObject):
+    """Вызывает callback один раз, после первой отрисовки окна."""
+
+    def __init__(self, window, callback):
+        super().__init__(window)
+        self.window = window
+        self.callback = callback
+        window.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if watched is self.window and event.type() == QEvent.Type.Paint:
+            self.window.removeEventFilter(self)
+            # Сначала даём событию отрисовки завершиться
+            QTimer.singleShot(0, self.callback)
+        return False
+
+
+def defer_first_load(window, load):
+    """Откладывает первую загрузку данных до появления окна на экране.
+
+    load(done) запускает загрузку (обычно фоновой задачей, см. first_load)
+    и вызывает done(), когда данные показаны.
+    """
+
+    def done():
+        report('first_data')
+        if probe_enabled():
+            # exit(), а не quit(): quit() в Qt 6 шлёт окнам closeEvent с подтверждением
+            QApplication.exit(0)
+
+    def run():
+        report('first_paint')
+        load(done)
+
+    FirstPaintFilter(window, run)
+
+
+def first_load(repository, models):
+    """Функция фоновой задачи первой загрузки: ping, индексы и первые страницы.
+
+    Всё сетевое выполняется в рабочем потоке: первые страницы моделей
+    попадают в registry_cache, и refresh() в GUI-потоке берёт их из кэша.
+    Возвращает список проблем с индексами.
+    """
+
+    def run(job):
+        repository.ping()
+        try:
+            problems = ensure_indexes(repository.db)
+        except Exception as e:
+            problems = [str(e)]
+        for model in models:
+            job.check_cancelled()
+            model.prefetch()
+        return problems
+
+    return run
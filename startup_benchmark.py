@@ -0,0 +1,106 @@
+"""Замер холодного старта окон: время до первой отрисовки и первых данных.
+
+    python startup_benchmark.py [main.py m1.py m2.py] [--runs 5] [--json out.json]
+
+Каждый запуск — отдельный процесс с -X importtime и REGISTRY_STARTUP_PROBE=1:
+окно печатает события first_paint/first_data и закрывается. Время считается
+от запуска процесса; из отчёта importtime выводятся самые дорогие импорты.
+Нужен доступный MongoDB; без дисплея используется QT_QPA_PLATFORM=offscreen.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from startup_probe import PROBE_ENV, PROBE_PREFIX
+
+
+DEFAULT_SCRIPTS = ['main.py', 'm1.py', 'm2.py']
+
+
+def parse_importtime(lines, top=10):
+    """Самые долгие импорты верхнего уровня: [(модуль, мс накопительно)]."""
+    imports = []
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Отступ в имени — уровень вложенности; берём только прямые импорты
+        if name.startswith('  '):
+            continue
+        imports.append((name.strip(), int(cumulative) / 1000))
+    imports.sort(key=lambda item: item[1], reverse=True)
+    return imports[:top]
+
+
+def run_once(script, timeout):
+    env = dict(os.environ)
+    env[PROBE_ENV] = '1'
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as stderr:
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-X', 'importtime', script],
+                                   stdout=subprocess.PIPE, stderr=stderr, env=env, text=True)
+        events = {}
+        try:
+            for line in process.stdout:
+                if line.startswith(PROBE_PREFIX):
+                    payload = json.loads(line[len(PROBE_PREFIX):])
+                    payload['wall_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                    events[payload['event']] = payload
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        stderr.seek(0)
+        imports = parse_importtime(stderr.read().splitlines())
+    return {'returncode': process.returncode, 'events': events, 'imports': imports}
+
+
+def summarize(script, runs):
+    result = {'script': script, 'runs': len(runs)}
+    for event in ('first_paint', 'first_data'):
+        walls = [run['events'][event]['wall_ms'] for run in runs if event in run['events']]
+        if walls:
+            result[f'{event}_ms_median'] = statistics.median(walls)
+            result[f'{event}_ms_min'] = min(walls)
+    painted = [run['events']['first_paint'] for run in runs if 'first_paint' in run['events']]
+    if painted:
+        result['pandas_loaded_before_paint'] = any(event['pandas_loaded'] for event in painted)
+    result['failed_runs'] = sum(1 for run in runs if 'first_data' not in run['events'])
+    result['top_imports'] = runs[-1]['imports'] if runs else []
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument('scripts', nargs='*', default=DEFAULT_SCRIPTS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--json', dest='json_path')
+    args = parser.parse_args()
+
+    results = []
+    for script in args.scripts:
+        runs = [run_once(script, args.timeout) for _ in range(args.runs)]
+        summary = summarize(script, runs)
+        results.append(summary)
+        print(f"{script}: first paint {summary.get('first_paint_ms_median', 'n/a')} ms, "
+              f"first data {summary.get('first_data_ms_median', 'n/a')} ms "
+              f"(median of {args.runs}, failed {summary['failed_runs']})")
+        if summary.get('pandas_loaded_before_paint'):
+            print("  warning: pandas is imported before the first paint")
+        for name, ms in summary['top_imports']:
+            print(f"  {ms:8.1f} ms  {name}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 1 if any(result['failed_runs'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
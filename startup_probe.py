@@ -0,0 +1,9 @@
+"""Протокол пробы холодного старта, общий для окон и startup_benchmark.py.
+
+Модуль не импортирует Qt: бенчмарк читает константы, не искажая замер.
+"""
+
+# При установленной переменной окно сообщает о первой отрисовке и первой
+# загрузке данных в stdout и закрывается
+PROBE_ENV = 'REGISTRY_STARTUP_PROBE'
+PROBE_PREFIX = 'STARTUP '
@@ -0,0 +1,398 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from chunked_reader import iter_chunks
+from filters import prefix_condition
+from metrics import metrics
+from pdf_reader import PARSE_WARNINGS
+from schema import STORED_ROWS_SORT
+from statements import STATEMENT_HEADERS, normalize_statement, parse_amounts, parse_dates
+from validation import VTB_HEADERS, as_text, normalize_register
+
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_LOAD_LIMIT = 200000
+
+# Порции выписки от этого размера сверяются с базой через фильтр Блума,
+# а не через ошибки уникального индекса
+BLOOM_THRESHOLD = 5000
+# Поля операции, из которых складывается её отпечаток
+FINGERPRINT_FIELDS = ('account', 'operation_date', 'amount', 'operation_type', 'purpose')
+DUPLICATE_KEY = 11000
+
+# Заголовок колонки таблицы -> поле документа MongoDB
+VTB_FIELDS = [
+    ("ID", "row_id"),
+    ("Номер счета", "account"),
+    ("ФИО владельца", "full_name"),
+    ("Дата операции", "operation_date"),
+    ("Тип операции", "operation_type"),
+    ("Сумма", "amount"),
+    ("Статус", "status"),
+]
+
+STATEMENT_FIELDS = [
+    ("ID", "row_id"),
+    ("ФИО", "full_name"),
+    ("Номер счета", "account"),
+    ("Дата операции", "operation_date"),
+    ("Тип операции", "operation_type"),
+    ("Сумма", "amount"),
+    ("Назначение платежа", "purpose"),
+    ("Статус", "status"),
+]
+
+class StoreReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        # (номер пакета, сообщение)
+        self.failures = []
+        # Строки файла, пропущенные при разборе (например, таблицы PDF другой ширины)
+        self.warnings = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self, max_failures=10):
+        lines = [
+            f"Строк обработано: {self.rows}",
+            f"Добавлено в базу: {self.inserted}",
+            f"Обновлено: {self.updated}",
+            f"Пропущено (уже в базе): {self.skipped}",
+            f"Скорость: {self.rows_per_second:.0f} строк/с",
+        ]
+        if self.failures:
+            lines.append(f"Ошибок записи: {len(self.failures)}")
+            for batch, message in self.failures[:max_failures]:
+                lines.append(f"  пакет {batch}: {message}")
+        if self.warnings:
+            lines.append(f"Пропущено при разборе: {len(self.warnings)}")
+            lines.extend(f"  {message}" for message in self.warnings[:max_failures])
+        return "\n".join(lines)
+
+
+def document_frame(frame, fields, normalize, source):
+    """Преобразует порцию файла в колонки документов одним проходом."""
+    # Номера строк файла для строк без ID (заголовок — первая строка)
+    lines = pd.Series(frame.index, dtype='int64') + 2
+    frame = normalize(frame)
+
+    columns = {}
+    for header, field in fields:
+        series = frame[header]
+        if field == 'amount':
+            columns[field] = parse_amounts(series)
+        elif field == 'operation_date':
+            columns[field] = parse_dates(series)
+        else:
+            columns[field] = as_text(series)
+    documents = pd.DataFrame(columns)
+
+    missing_id = documents['row_id'].eq('')
+    documents.loc[missing_id, 'row_id'] = source + ':' + lines[missing_id].astype(str)
+    documents['source'] = source
+    return documents
+
+
+def to_records(documents):
+    documents = documents.astype(object).where(documents.notna(), None)
+    return documents.to_dict('records')
+
+
+def to_documents(frame, fields, normalize, source):
+    return to_records(document_frame(frame, fields, normalize, source))
+
+
+def fingerprint_keys(documents):
+    """Нормализованная строка операции: счёт|дата|сумма|тип|назначение."""
+    dates = documents['operation_date'].dt.strftime('%Y-%m-%d').fillna('')
+    amounts = documents['amount'].map('{:.2f}'.format, na_action='ignore').fillna('')
+    parts = [documents['account'], dates, amounts]
+    for field in ('operation_type', 'purpose'):
+        parts.append(documents[field].str.lower().str.replace(r'\s+', ' ', regex=True))
+    return parts[0].str.cat(parts[1:], sep='|')
+
+
+def digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class BloomFilter:
+    """Битовый фильтр Блума по hex-отпечаткам (ложные «есть», но не «нет»)."""
+
+    def __init__(self, capacity, bits_per_item=10, hashes=7):
+        size = max(1 << 16, int(capacity) * bits_per_item)
+        self.size = 1 << int(np.ceil(np.log2(size)))
+        self.hashes = hashes
+        self.bits = np.zeros(self.size // 8, dtype=np.uint8)
+
+    def _positions(self, fingerprints):
+        # Двойное хэширование: позиции h1 + i*h2 из двух половин отпечатка
+        h1 = np.array([int(value[:16], 16) for value in fingerprints], dtype=np.uint64)
+        h2 = np.array([int(value[16:32], 16) | 1 for value in fingerprints], dtype=np.uint64)
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        positions = h1[:, None] + steps[None, :] * h2[:, None]
+        return positions & np.uint64(self.size - 1)
+
+    def add(self, fingerprints):
+        if len(fingerprints):
+            positions = self._positions(fingerprints).ravel()
+            masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+            np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+
+    def might_contain(self, fingerprints):
+        if not len(fingerprints):
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(fingerprints)
+        shifts = (positions & np.uint64(7)).astype(np.uint8)
+        bits = (self.bits[positions >> np.uint64(3)] >> shifts) & 1
+        return bits.all(axis=1)
+
+
+class StatementDeduplicator:
+    """Отпечатки операций одного импорта выписки.
+
+    Одинаковые операции внутри файла различаются номером повтора, поэтому
+    пересекающиеся выписки (месяц, затем квартал) дают одни и те же
+    отпечатки и повторно не вставляются. Состояние переносится между
+    порциями файла.
+    """
+
+    def __init__(self, collection, bloom_threshold=BLOOM_THRESHOLD):
+        self.collection = collection
+        self.bloom_threshold = bloom_threshold
+        self.occurrences = {}
+        self.bloom = None
+        self.loaded_accounts = set()
+
+    def fingerprints(self, documents):
+        keys = fingerprint_keys(documents)
+        repeat = keys.groupby(keys, sort=False).cumcount()
+        repeat += keys.map(self.occurrences).fillna(0).astype('int64')
+        for key, count in keys.value_counts(sort=False).items():
+            self.occurrences[key] = self.occurrences.get(key, 0) + count
+        return [digest(f"{key}#{number}") for key, number in zip(keys, repeat)]
+
+    def existing(self, documents):
+        """Маска строк, отпечатки которых уже есть в базе (только для больших порций)."""
+        fingerprints = documents['fingerprint'].tolist()
+        if len(fingerprints) < self.bloom_threshold:
+            return np.zeros(len(fingerprints), dtype=bool)
+        self._load_accounts(set(documents['account']))
+        maybe = self.bloom.might_contain(fingerprints)
+        candidates = [value for value, flag in zip(fingerprints, maybe) if flag]
+        found = set()
+        for start in range(0, len(candidates), DEFAULT_BATCH_SIZE):
+            cursor = self.collection.find(
+                {'fingerprint': {'$in': candidates[start:start + DEFAULT_BATCH_SIZE]}},
+                {'fingerprint': 1, '_id': 0})
+            found.update(document['fingerprint'] for document in cursor)
+        return np.fromiter((value in found for value in fingerprints), dtype=bool,
+                           count=len(fingerprints))
+
+    def remember(self, fingerprints):
+        if self.bloom is not None:
+            self.bloom.add(fingerprints)
+
+    def _load_accounts(self, accounts):
+        if self.bloom is None:
+            self.bloom = BloomFilter(self.collection.estimated_document_count()
+                                     + self.bloom_threshold)
+        accounts = accounts - self.loaded_accounts
+        if not accounts:
+            return
+        cursor = self.collection.find({'account': {'$in': sorted(accounts)},
+                                       'fingerprint': {'$type': 'string'}},
+                                      {'fingerprint': 1, '_id': 0})
+        batch = []
+        for document in cursor:
+            batch.append(document['fingerprint'])
+            if len(batch) >= DEFAULT_BATCH_SIZE * 10:
+                self.bloom.add(batch)
+                batch = []
+        self.bloom.add(batch)
+        self.loaded_accounts |= accounts
+
+
+def insert_new_documents(collection, documents, report, batch_size=DEFAULT_BATCH_SIZE):
+    """Вставляет документы; нарушения уникального отпечатка считаются пропусками."""
+    for batch_number, start in enumerate(range(0, len(documents), batch_size), 1):
+        batch = documents[start:start + batch_size]
+        try:
+            result = collection.insert_many(batch, ordered=False)
+            report.inserted += len(result.inserted_ids)
+        except BulkWriteError as e:
+            report.inserted += e.details.get('nInserted', 0)
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') == DUPLICATE_KEY:
+                    report.skipped += 1
+                else:
+                    report.failures.append((batch_number, error.get('errmsg', '')))
+        except PyMongoError as e:
+            report.failures.append((batch_number, str(e)))
+        report.rows += len(batch)
+
+
+def upsert_documents(collection, documents, report, batch_size=DEFAULT_BATCH_SIZE):
+    imported_at = datetime.now()
+    for batch_number, start in enumerate(range(0, len(documents), batch_size), 1):
+        batch = documents[start:start + batch_size]
+        requests = [
+            UpdateOne({'account': document['account'], 'row_id': document['row_id']},
+                      {'$set': document, '$setOnInsert': {'imported_at': imported_at}},
+                      upsert=True)
+            for document in batch
+        ]
+        try:
+            result = collection.bulk_write(requests, ordered=False)
+            report.inserted += result.upserted_count
+            report.updated += result.modified_count
+        except BulkWriteError as e:
+            report.inserted += e.details.get('nUpserted', 0)
+            report.updated += e.details.get('nModified', 0)
+            for error in e.details.get('writeErrors', []):
+                report.failures.append((batch_number, error.get('errmsg', '')))
+        except PyMongoError as e:
+            report.failures.append((batch_number, str(e)))
+        report.rows += len(batch)
+
+
+def store_vtb_registers(db, frame, source, report, batch_size=DEFAULT_BATCH_SIZE):
+    started = time.perf_counter()
+    with metrics.span('store.prepare'):
+        documents = to_documents(frame, VTB_FIELDS, normalize_register, source)
+    with metrics.span('store.write'):
+        upsert_documents(db.vtb_registers, documents, report, batch_size)
+    report.elapsed += time.perf_counter() - started
+
+
+def store_statements(db, frame, source, report, batch_size=DEFAULT_BATCH_SIZE,
+                     deduplicator=None):
+    """Добавляет в базу только новые операции выписки.
+
+    deduplicator переносит нумерацию повторов между порциями одного файла;
+    без него каждая порция считается отдельным файлом.
+    """
+    started = time.perf_counter()
+    if deduplicator is None:
+        deduplicator = StatementDeduplicator(db.statements)
+    with metrics.span('store.prepare'):
+        documents = document_frame(frame, STATEMENT_FIELDS, normalize_statement, source)
+        documents['fingerprint'] = deduplicator.fingerprints(documents)
+
+    with metrics.span('store.deduplicate'):
+        existing = deduplicator.existing(documents)
+    report.skipped += int(existing.sum())
+    report.rows += int(existing.sum())
+    documents = documents[~existing]
+
+    with metrics.span('store.write'):
+        insert_new_documents(db.statements, to_records(documents), report, batch_size)
+    deduplicator.remember(documents['fingerprint'].tolist())
+    report.elapsed += time.perf_counter() - started
+
+
+def store_frame(db, kind, frame, source, report, batch_size=DEFAULT_BATCH_SIZE,
+                deduplicator=None):
+    if kind == 'vtb':
+        store_vtb_registers(db, frame, source, report, batch_size)
+    else:
+        store_statements(db, frame, source, report, batch_size, deduplicator)
+
+
+def import_file(db, kind, file_name, batch_size=DEFAULT_BATCH_SIZE, progress=None,
+                check_cancelled=None, preview_rows=DEFAULT_LOAD_LIMIT):
+    """Читает регистр ('vtb') или выписку ('statement') порциями и сохраняет в базу.
+
+    Каждая порция сразу пишется в MongoDB; для показа остаются только первые
+    preview_rows строк, поэтому память не растёт с размером файла. Остальное
+    читается из базы (load_vtb_registers/load_statements). Возвращает
+    (DataFrame первых строк, StoreReport); check_cancelled() может прервать
+    импорт исключением между порциями.
+    """
+    source = source_name(file_name)
+    report = StoreReport()
+    # Отпечатки операций считаются по всему файлу, а не по отдельной порции
+    deduplicator = StatementDeduplicator(db.statements) if kind == 'statement' else None
+    preview = []
+    previewed = 0
+    rows = 0
+    for chunk in metrics.iterate('import.read_chunk', iter_chunks(file_name)):
+        if check_cancelled is not None:
+            check_cancelled()
+        report.warnings.extend(chunk.attrs.get(PARSE_WARNINGS, []))
+        if not len(chunk):
+            continue
+        store_frame(db, kind, chunk, source, report, batch_size, deduplicator)
+        if previewed < preview_rows:
+            part = chunk.iloc[:preview_rows - previewed]
+            preview.append(part)
+            previewed += len(part)
+        rows += len(chunk)
+        if progress is not None:
+            progress(rows)
+    df = pd.concat(preview) if preview else pd.DataFrame()
+    return df.reset_index(drop=True), report
+
+
+def source_name(file_name):
+    return os.path.basename(file_name)
+
+
+def parse_day(text):
+    text = (text or '').strip()
+    if not text:
+        return None
+    day = pd.to_datetime(text, errors='coerce', dayfirst=True)
+    if pd.isna(day):
+        raise ValueError(f"'{text}' is not a date")
+    return day.to_pydatetime()
+
+
+def stored_query(account='', name_prefix='', date_from='', date_to=''):
+    query = {}
+    if account.strip():
+        query['account'] = account.strip()
+    if name_prefix.strip():
+        query['full_name'] = prefix_condition(name_prefix.strip())
+    date_range = {}
+    day_from, day_to = parse_day(date_from), parse_day(date_to)
+    if day_from is not None:
+        date_range['$gte'] = day_from
+    if day_to is not None:
+        date_range['$lt'] = day_to + timedelta(days=1)
+    if date_range:
+        query['operation_date'] = date_range
+    return query
+
+
+def load_frame(collection, fields, headers, query, limit=DEFAULT_LOAD_LIMIT):
+    projection = {field: 1 for _, field in fields}
+    cursor = (collection.find(query, projection)
+              .sort(STORED_ROWS_SORT)
+              .limit(limit))
+    with metrics.span('store.load'):
+        frame = pd.DataFrame(list(cursor), columns=['_id'] + [field for _, field in fields])
+    frame = frame.drop(columns='_id')
+    frame.columns = [header for header, _ in fields]
+    return frame[headers]
+
+
+def load_vtb_registers(db, query, limit=DEFAULT_LOAD_LIMIT):
+    return load_frame(db.vtb_registers, VTB_FIELDS, VTB_HEADERS, query, limit)
+
+
+def load_statements(db, query, limit=DEFAULT_LOAD_LIMIT):
+    return load_frame(db.statements, STATEMENT_FIELDS, STATEMENT_HEADERS, query, limit)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from columns import STATEMENT_HEADERS
+
+
+# Подстроки типа операции, по которым определяется направление платежа
+CREDIT_MARKERS = ('приход', 'зачисл', 'поступ', 'кредит')
+DEBIT_MARKERS = ('расход', 'списан', 'дебет')
+
+
+def normalize_statement(frame):
+    """Приводит колонки выписки к STATEMENT_HEADERS по позиции, как в таблице."""
+    frame = frame.iloc[:, :len(STATEMENT_HEADERS)].copy()
+    frame.columns = STATEMENT_HEADERS[:frame.shape[1]]
+    for header in STATEMENT_HEADERS[frame.shape[1]:]:
+        frame[header] = np.nan
+    return frame.reset_index(drop=True)
+
+
+def parse_amounts(series):
+    text = series.astype(str).str.replace(r'\s', '', regex=True).str.replace(',', '.')
+    return pd.to_numeric(text.where(series.notna()), errors='coerce')
+
+
+def parse_dates(series):
+    return pd.to_datetime(series, errors='coerce', dayfirst=True)
+
+
+def operation_direction(types, amounts):
+    """'Кредит' для поступлений и 'Дебет' для списаний.
+
+    Направление определяется по типу операции, а если тип не распознан —
+    по знаку суммы.
+    """
+    text = types.astype(str).str.lower()
+    credit = text.str.contains('|'.join(CREDIT_MARKERS), regex=True)
+    debit = text.str.contains('|'.join(DEBIT_MARKERS), regex=True)
+    by_sign = np.where(amounts < 0, 'Дебет', 'Кредит')
+    return pd.Series(np.where(credit, 'Кредит', np.where(debit, 'Дебет', by_sign)),
+                     index=types.index)
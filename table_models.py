@@ -0,0 +1,291 @@
+from bson import json_util
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from columns import field_value, format_value
+from metrics import metrics
+from registry_cache import ColumnPage, registry_cache
+
+
+def decode_documents(documents, columns):
+    ids = []
+    rows = []
+    for document in documents:
+        ids.append(document.get('_id'))
+        rows.append(tuple(format_value(field_value(document, path)) for _, path in columns))
+    return ids, rows
+
+
+class DocumentTableModel(QAbstractTableModel):
+    """Модель таблицы для уже загруженного списка документов."""
+
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self._ids = []
+        self._rows = []
+
+    def set_documents(self, documents):
+        self.beginResetModel()
+        self._ids, self._rows = decode_documents(documents, self.columns)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section][0]
+        return str(section + 1)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return self._rows[index.row()][index.column()]
+
+    def document_id(self, row):
+        return self._ids[row] if 0 <= row < len(self._ids) else None
+
+
+class CursorTableModel(QAbstractTableModel):
+    """Модель таблицы поверх коллекции MongoDB.
+
+    Строки подгружаются страницами по мере прокрутки (canFetchMore/fetchMore)
+    с пагинацией по _id. Страницы хранятся в колоночном виде в общем
+    registry_cache: одинаковые страницы разделяются между окнами, а
+    вытесненные или сброшенные записью в базу перечитываются по индексу _id.
+    """
+
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, collection, columns, page_size=500, cache=None, parent=None):
+        super().__init__(parent)
+        self.collection = collection
+        self.columns = columns
+        self.page_size = page_size
+        self.cache = cache if cache is not None else registry_cache
+        self.query = {}
+        self.limit = None
+        self.projection = {path.split('.')[0]: 1 for _, path in columns}
+        self._query_key = None
+        self._bounds = []            # (_id, после которого начинается страница, размер)
+        self._last_id = None
+        self._loaded = 0
+        self._exhausted = False
+        self._failed = False
+
+    def set_query(self, query, limit=None):
+        # limit ограничивает общее число строк, загружаемых с сервера
+        self.query = query or {}
+        self.limit = limit
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        self._query_key = json_util.dumps(self.query, sort_keys=True)
+        self._bounds = []
+        self._last_id = None
+        self._loaded = 0
+        self._exhausted = False
+        self._failed = False
+        self.endResetModel()
+        # Первая страница читается сразу, чтобы ошибки доходили до вызывающего кода
+        self._load_next_page()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section][0]
+        return str(section + 1)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        page = self._page(index.row() // self.page_size)
+        if page is None:
+            return None
+        offset = index.row() % self.page_size
+        if offset >= len(page):
+            return None
+        return page.value(offset, index.column())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        # Исключения из виртуальных методов Qt нельзя пропускать наружу
+        try:
+            self._load_next_page()
+        except Exception as e:
+            self._exhausted = True
+            self._fail(str(e))
+
+    def document_id(self, row):
+        page = self._page(row // self.page_size)
+        if page is None:
+            return None
+        offset = row % self.page_size
+        return page.document_id(offset) if offset < len(page) else None
+
+    def _find(self, id_condition, limit):
+        query = self.query
+        if id_condition:
+            id_filter = {'_id': id_condition}
+            query = {'$and': [query, id_filter]} if query else id_filter
+        return (self.collection.find(query, self.projection)
+                .sort('_id', 1)
+                .limit(limit))
+
+    def prefetch(self):
+        """Читает первую страницу текущего запроса в кэш, не меняя модель.
+
+        Можно вызывать из рабочего потока: следующий refresh() возьмёт
+        страницу из registry_cache без запроса к серверу.
+        """
+        limit = self.page_size if self.limit is None else min(self.page_size, self.limit)
+        if limit > 0:
+            self._read_page(None, limit, json_util.dumps(self.query, sort_keys=True))
+
+    def _read_page(self, after, limit, query_key=None):
+        if query_key is None:
+            query_key = self._query_key
+        key = ('page', self.collection.full_name, query_key, tuple(self.columns),
+               after, limit)
+        page = self.cache.get(key)
+        if page is not None:
+            return page
+        condition = {'$gt': after} if after is not None else None
+        # fetch — запросы и разбор BSON, format — подготовка строк таблицы
+        with metrics.span('table.fetch'):
+            documents = list(self._find(condition, limit))
+        with metrics.span('table.format'):
+            ids, rows = decode_documents(documents, self.columns)
+        page = ColumnPage(ids, rows, len(self.columns))
+        # Неполная страница — хвост выборки: её меняет любая вставка после after
+        last = page.last_id if len(page) == limit else None
+        self.cache.put(key, page, page.nbytes, {self.collection.full_name: (after, last)})
+        return page
+
+    def _load_next_page(self):
+        if self._exhausted:
+            return
+        page_limit = self.page_size
+        if self.limit is not None:
+            page_limit = min(page_limit, self.limit - self._loaded)
+            if page_limit <= 0:
+                self._exhausted = True
+                return
+        page = self._read_page(self._last_id, page_limit)
+        if len(page) < page_limit or (self.limit is not None
+                                      and self._loaded + len(page) >= self.limit):
+            self._exhausted = True
+        if not len(page):
+            return
+
+        self._bounds.append((self._last_id, page_limit))
+        self._last_id = page.last_id
+
+        with metrics.span('table.insert_rows'):
+            self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + len(page) - 1)
+            self._loaded += len(page)
+            self.endInsertRows()
+
+    def _page(self, page_number):
+        # После первой ошибки ячейки пустые до refresh: data() вызывается при
+        # отрисовке для каждой ячейки, и ошибка не должна повторяться на каждой
+        if self._failed or page_number >= len(self._bounds):
+            return None
+        after, limit = self._bounds[page_number]
+        try:
+            return self._read_page(after, limit)
+        except Exception as e:
+            self._fail(str(e))
+            return None
+
+    def _fail(self, message):
+        if not self._failed:
+            self._failed = True
+            self.load_failed.emit(message)
+
+
+class FrameTableModel(QAbstractTableModel):
+    """Модель таблицы поверх pandas DataFrame.
+
+    Значения берутся по позиции колонки под заданными заголовками;
+    set_visible_rows ограничивает показ подмножеством строк (номера строк
+    frame), не трогая сами данные.
+    """
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.frame = None
+        self._visible = None
+
+    def set_frame(self, frame):
+        self.beginResetModel()
+        self.frame = frame
+        self._visible = None
+        self.endResetModel()
+
+    def set_visible_rows(self, rows):
+        self.beginResetModel()
+        self._visible = rows
+        self.endResetModel()
+
+    def visible_rows(self):
+        return self._visible
+
+    def source_row(self, row):
+        return int(self._visible[row]) if self._visible is not None else row
+
+    def view_row(self, source_row):
+        if self._visible is None:
+            return source_row
+        positions = (self._visible == source_row).nonzero()[0]
+        return int(positions[0]) if len(positions) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.frame is None:
+            return 0
+        return len(self._visible) if self._visible is not None else len(self.frame)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return str(self.source_row(section) + 1)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.column() >= self.frame.shape[1]:
+            return None
+        value = self.frame.iat[self.source_row(index.row()), index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(value)
+        if role == Qt.ItemDataRole.UserRole:
+            # Исходное значение для сортировки через QSortFilterProxyModel
+            return value.item() if hasattr(value, 'item') else value
+        return None
@@ -0,0 +1,126 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from columns import ERROR_COLUMNS, VTB_HEADERS
+
+
+# БИК банка для проверки контрольного ключа счёта (по умолчанию ВТБ, Москва)
+VTB_BIK = os.environ.get('VTB_BIK', '044525187')
+
+# Весовые коэффициенты для 3 последних цифр БИК и 20 цифр счёта
+_KEY_WEIGHTS = np.tile(np.array([7, 1, 3], dtype=np.int64), 8)[:23]
+
+
+def normalize_register(frame):
+    """Приводит колонки регистра к VTB_HEADERS по позиции, как в таблице."""
+    frame = frame.iloc[:, :len(VTB_HEADERS)].copy()
+    frame.columns = VTB_HEADERS[:frame.shape[1]]
+    for header in VTB_HEADERS[frame.shape[1]:]:
+        frame[header] = np.nan
+    return frame.reset_index(drop=True)
+
+
+def as_text(series):
+    return series.astype(str).str.strip().where(series.notna(), '')
+
+
+def is_blank(series):
+    return as_text(series).eq('')
+
+
+class Rule:
+    """Правило проверки: check(series) возвращает маску ошибочных строк.
+
+    Пустые значения проверяет только правило required; остальные правила
+    применяются к заполненным ячейкам.
+    """
+
+    def __init__(self, code, column, message, check, skip_blank=True):
+        self.code = code
+        self.column = column
+        self.message = message
+        self.check = check
+        self.skip_blank = skip_blank
+
+    def evaluate(self, frame):
+        series = frame[self.column]
+        mask = np.asarray(self.check(series), dtype=bool)
+        if self.skip_blank:
+            mask &= ~is_blank(series).to_numpy()
+        return mask
+
+
+def account_format_errors(series):
+    return ~as_text(series).str.fullmatch(r'\d{20}')
+
+
+def account_key_errors(series, bik=VTB_BIK):
+    text = as_text(series)
+    well_formed = text.str.fullmatch(r'\d{20}').to_numpy()
+    mask = np.zeros(len(text), dtype=bool)
+    if not well_formed.any():
+        return mask
+    # Матрица цифр «3 цифры БИК + 20 цифр счёта» без цикла по строкам
+    keyed = (bik[-3:] + text[well_formed]).str.cat()
+    digits = (np.frombuffer(keyed.encode('ascii'), dtype=np.uint8) - ord('0')).reshape(-1, 23)
+    checksum = ((digits.astype(np.int64) * _KEY_WEIGHTS) % 10).sum(axis=1) % 10
+    mask[well_formed] = checksum != 0
+    return mask
+
+
+def date_errors(series):
+    return pd.to_datetime(series, errors='coerce', dayfirst=True).isna()
+
+
+def amount_errors(series):
+    text = as_text(series).str.replace(r'\s', '', regex=True)
+    return ~text.str.fullmatch(r'-?\d+(?:[.,]\d{1,2})?')
+
+
+def duplicate_errors(series):
+    text = as_text(series)
+    return text.duplicated(keep=False) & text.ne('')
+
+
+def required_rule(column):
+    return Rule('required', column, "Не заполнено обязательное поле", is_blank, skip_blank=False)
+
+
+def vtb_rules(bik=VTB_BIK):
+    rules = [required_rule(column) for column in
+             ("ID", "Номер счета", "ФИО владельца", "Дата операции", "Сумма")]
+    rules += [
+        Rule('account_format', "Номер счета", "Номер счета должен состоять из 20 цифр",
+             account_format_errors),
+        Rule('date_format', "Дата операции", "Неверный формат даты", date_errors),
+        Rule('amount_format', "Сумма", "Неверный формат суммы", amount_errors),
+        Rule('duplicate_id', "ID", "Повторяющийся ID", duplicate_errors),
+    ]
+    if bik:
+        rules.append(Rule('account_key', "Номер счета", "Неверный контрольный ключ счета",
+                          lambda series: account_key_errors(series, bik)))
+    return rules
+
+
+def validate(frame, rules=None):
+    """Проверяет регистр и возвращает таблицу ошибок (по строке на ошибку)."""
+    frame = normalize_register(frame)
+    if rules is None:
+        rules = vtb_rules()
+
+    parts = []
+    for rule in rules:
+        rows = np.flatnonzero(rule.evaluate(frame))
+        if len(rows):
+            parts.append(pd.DataFrame({
+                "Строка": rows + 1,
+                "Колонка": rule.column,
+                "Код": rule.code,
+                "Сообщение": rule.message,
+            }))
+    if not parts:
+        return pd.DataFrame(columns=ERROR_COLUMNS)
+    return pd.concat(parts, ignore_index=True).sort_values("Строка", kind='stable',
+                                                           ignore_index=True)